@@ -1,8 +1,9 @@
+import asyncio
 import json
+import threading
 from ninja import Router, NinjaAPI, Schema, File
 from ninja.files import UploadedFile as NinjaUploadedFile
 from ninja.errors import HttpError
-import threading
 from datetime import datetime
 import traceback
 import requests
@@ -11,7 +12,7 @@ import re
 
 
 from django.conf import settings
-from django.http import JsonResponse, StreamingHttpResponse 
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse 
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from api.pages.auth_page import router as auth_router
@@ -19,6 +20,7 @@ from api.pages.item_page import router as item_router
 from api.pages.auth_page import AuthSchema, LoginPage
 from api.models.models_transactions import BorrowingTransaction
 from api.models.models_items import LibraryItem
+from api.catalog_search import search_catalog
 from api.models.models_users import LibraryUser
 from api.models.models_downloads import Download
 from services.openlibrary.search_page import (
@@ -27,11 +29,32 @@ from services.openlibrary.search_page import (
     SearchByInsideStrategy,
     SearchBySubjectStrategy,
     SearchByAdvanceSearchtrategy,
+    SubjectWorksStrategy,
+    SearchByLocalIndexStrategy,
     SearchContext,
+    SearchStrategy,
 )
-from services.semantic_scholar.search_page import scrape_semantic_scholar, safe_filename
+from services.semantic_scholar.jobs import semantic_scholar_jobs
+from services.semantic_scholar.search_page import load_cached_results
 from services.openlibrary.homepage_content import get_homepage_data
-from services.openlibrary.book_details import BookDetailPage
+from services.openlibrary.book_details import (
+    BookDetailPage,
+    book_detail_stats,
+    dynamic_jobs,
+    EDITIONS_PAGE_SIZE,
+    with_editions_preview,
+)
+from services.openlibrary.book_index import get_book_index
+from services.openlibrary.carousels import carousel_stats
+from services.openlibrary import covers
+from services.openlibrary.covers import CoverNotFound, cover_proxy, proxy_cover_urls
+from services.openlibrary.http_client import async_http_stats, get_http_client
+from services.openlibrary.prefetcher import page_prefetcher
+from services.openlibrary.coalescer import search_coalescer
+from services.browser_pool import browser_pool
+from services.cache_manager import cache_manager
+from services.query_normalizer import query_key_stats
+from services.openlibrary.facets import facet_stats
 
 from typing import Optional, List
 from django.views.decorators.csrf import csrf_exempt
@@ -43,6 +66,23 @@ from api.AI_Features.google_text_to_speech_v6 import TextToSpeechPlayer
 from api.utils.jwt_auth import JWTAuth
 
 
+# Where the cover endpoint is served (the API is mounted at api/ in backend/urls.py)
+COVER_PROXY_PATH = "/api/covers/"
+# Covers by numeric id never change upstream; olid/isbn keys can be re-pointed
+COVER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COVER_CACHE_CONTROL_MUTABLE = "public, max-age=86400"
+
+
+def _with_proxied_covers(request, data):
+    """
+    `data` with its covers.openlibrary.org URLs pointing at the cover proxy.
+    Applied by the scraper endpoints whose results carry imgSrc / image_src.
+    """
+    if not covers.ENABLED:
+        return data
+    return proxy_cover_urls(data, request.build_absolute_uri(COVER_PROXY_PATH))
+
+
 router = Router()
 api = NinjaAPI()
 
@@ -51,17 +91,42 @@ api = NinjaAPI()
 def test_api(request):
     return {"message": "LibraAI API is working!"}
 
+
+@api.get("/metrics/scrapers")
+def scraper_metrics(request):
+    """
+    Counters for the shared scraping infrastructure
+    (e.g. new vs reused connections of the pooled OpenLibrary client).
+    """
+    return {
+        "http": get_http_client().stats(),
+        "async_http": async_http_stats(),
+        "prefetch": page_prefetcher.stats(),
+        "coalescing": search_coalescer.stats(),
+        "browsers": browser_pool.stats(),
+        "facets": facet_stats(),
+        "data_cache": cache_manager.stats(),
+        "query_keys": query_key_stats.stats(),
+        "book_index": {"books": get_book_index().count()},
+        "book_detail": book_detail_stats(),
+        "book_detail_dynamic": dynamic_jobs.stats(),
+        "carousels": carousel_stats(),
+        "covers": cover_proxy.stats(),
+        "semantic_scholar_jobs": semantic_scholar_jobs.stats(),
+    }
+
 @api.get("/homepage/content")
 def get_homepage_content(request, force_refresh: bool = False):
     """
     Fetches dynamic homepage content (Trending, Classics, Books We Love)
     from the OpenLibrary scraper, utilizing the cache.
+    Answers from memory; stale data is refreshed in the background.
     Set force_refresh=true to bypass the cache.
     """
     try:
         # This function already handles caching, as seen in homepage_content.py
         data = get_homepage_data(force_refresh=force_refresh)
-        return data
+        return _with_proxied_covers(request, data)
     except Exception as e:
         # Handle potential errors during scraping or file access
         raise HttpError(500, f"Failed to retrieve homepage data: {str(e)}")
@@ -80,36 +145,136 @@ def auth(request, data: AuthSchema):
     return login_page.auth(request, data)
 
 
+def _page_range(
+    pages: Optional[str], page_from: Optional[int], page_to: Optional[int]
+) -> Optional[tuple]:
+    """
+    (first, last) page of a range request, from `pages=1-5` or
+    `page_from`/`page_to`; None for a plain single-page request.
+    """
+    if pages:
+        match = re.fullmatch(r"\s*(\d+)\s*-\s*(\d+)\s*", pages)
+        if not match:
+            raise HttpError(400, "Invalid 'pages'. Use a range like pages=1-5.")
+        page_from, page_to = int(match.group(1)), int(match.group(2))
+    elif page_from is None and page_to is None:
+        return None
+    else:
+        page_from = 1 if page_from is None else page_from
+        page_to = page_from if page_to is None else page_to
+
+    if page_from < 1 or page_to < page_from:
+        raise HttpError(400, "Invalid page range.")
+    if page_to - page_from + 1 > SearchStrategy.MAX_RANGE_PAGES:
+        raise HttpError(
+            400, f"At most {SearchStrategy.MAX_RANGE_PAGES} pages per request."
+        )
+    return page_from, page_to
+
+
+async def _search_page_range(context: SearchContext, page_range: tuple) -> dict:
+    page_from, page_to = page_range
+    data = await context.asearch_pages(page_from, page_to)
+    return {
+        "results": [book for books in data["pages"].values() for book in books],
+        "page_from": page_from,
+        "page_to": page_to,
+        **data,
+    }
+
+
+async def _iterate_in_thread(iterable):
+    """
+    Run a blocking iterator on a worker thread and yield its items on the
+    event loop as they arrive, so that an ASGI server streams them instead
+    of buffering the whole response. Stops the iterator once the client
+    goes away (the generator is closed).
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass  # event loop already closed: nobody is listening
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                put((item, None))
+                if stop.is_set():
+                    break
+        except Exception as e:
+            put((None, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+            put(done)
+
+    loop.run_in_executor(None, produce)
+    try:
+        while (entry := await queue.get()) is not done:
+            item, error = entry
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
+
+
 @api.get("/search")
-def general_search_api(
+async def general_search_api(
     request,
     q: str,
     mode: Optional[str] = "everything",
     sort_by: Optional[str] = "relevance",
     page: Optional[int] = 1,
+    pages: Optional[str] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None,
 ):
+    """
+    One result page, or with `pages=1-5` (or `page_from`/`page_to`) a range
+    of pages fetched concurrently; range requests are mode=everything only.
+    mode=local answers book searches from the local index when it has
+    enough matches, and from OpenLibrary otherwise (see "source").
+    """
+    page_range = _page_range(pages, page_from, page_to)
+
     if mode == "everything":
         strategy = SearchByBookStrategy(query=q, sort_by=sort_by, headless=True)
+    elif page_range:
+        raise HttpError(400, "Page ranges are only supported for mode=everything.")
     elif mode == "authors":
         strategy = SearchByAuthorStrategy(query=q)
     elif mode == "inside":
         strategy = SearchByInsideStrategy(query=q)
     elif mode == "subject":
         strategy = SearchBySubjectStrategy(query=q)
+    elif mode == "local":
+        strategy = SearchByLocalIndexStrategy(query=q, sort_by=sort_by)
     else:
-        return {"error": "Invalid 'mode'. Use: everything, authors, inside, subject."}
+        return {"error": "Invalid 'mode'. Use: everything, local, authors, inside, subject."}
 
     context = SearchContext(strategy)
-    data = context.search(page=page)
+    if page_range:
+        return _with_proxied_covers(request, await _search_page_range(context, page_range))
 
-    return {
+    data = await context.asearch(page=page)
+
+    return _with_proxied_covers(request, {
         "results": data.get("pages", {}).get(f"page_{page}", []),
         **data,
-    }
+    })
 
 
 @api.get("/search/advancedsearch")
-def advanced_search_api(
+async def advanced_search_api(
     request,
     title: Optional[str] = "",
     author: Optional[str] = "",
@@ -118,7 +283,11 @@ def advanced_search_api(
     publisher: Optional[str] = "",
     sort_by: Optional[str] = "relevance",
     page: Optional[int] = 1,
+    pages: Optional[str] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None,
 ):
+    page_range = _page_range(pages, page_from, page_to)
     strategy = SearchByAdvanceSearchtrategy(
         title=title,
         author=author,
@@ -129,7 +298,65 @@ def advanced_search_api(
         headless=True,
     )
     context = SearchContext(strategy)
-    return context.search(page=page)
+    if page_range:
+        return _with_proxied_covers(request, await _search_page_range(context, page_range))
+    return _with_proxied_covers(request, await context.asearch(page=page))
+
+
+@api.get("/search/author/bibliography")
+def author_bibliography_api(request, q: str):
+    """
+    Streams every book page of the first author matching `q` as NDJSON, one
+    {"page", "total_pages", "books"} line per page, in the order they arrive.
+    """
+    strategy = SearchByAuthorStrategy(query=q)
+    strategy.record_lookup()
+
+    async def lines():
+        async for page in _iterate_in_thread(strategy.iter_bibliography()):
+            yield json.dumps(_with_proxied_covers(request, page), ensure_ascii=False) + "\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+
+@api.get("/search/subject/works")
+async def subject_works_api(request, subject: str, page: Optional[int] = 1):
+    """
+    One page of works of a subject, loaded on demand. `subject` is a name,
+    slug or the `url` of a mode=subject search result.
+    """
+    context = SearchContext(SubjectWorksStrategy(subject))
+    return _with_proxied_covers(request, await context.asearch(page=page))
+
+
+@api.get("/catalog/search")
+def catalog_search_api(
+    request,
+    q: Optional[str] = "",
+    match: Optional[str] = "prefix",
+    field: Optional[str] = "title",
+    item_type: Optional[str] = None,
+    availability_status: Optional[str] = None,
+    limit: Optional[int] = 20,
+    cursor: Optional[str] = None,
+):
+    """
+    Search our own holdings (no OpenLibrary). match=prefix matches the start
+    of the title (or field=authors); match=fulltext matches words of the
+    title and authors. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        return search_catalog(
+            q=q,
+            match=match,
+            field=field,
+            item_type=item_type,
+            availability_status=availability_status,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HttpError(400, str(e))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -145,26 +372,9 @@ class ResearchPaperOut(Schema):
     pdf_link: str
 
 
-# In-memory set to track running jobs. For production, a more robust solution like Redis is recommended.
-SCRAPING_IN_PROGRESS = set()
-SCRAPING_LOCK = threading.Lock()
-
-def scrape_and_cache_task(query: str):
-    """
-    This function runs in the background to scrape and cache the data.
-    """
-    print(f"✅ Starting background scraping for: {query}")
-    try:
-        # This function blocks until scraping is complete, but it's running in a separate thread.
-        scrape_semantic_scholar(query)
-    except Exception as e:
-        print(f"❌ Scraping failed for '{query}': {e}")
-    finally:
-        # When done (or if it fails), remove the query from the in-progress set.
-        with SCRAPING_LOCK:
-            if query in SCRAPING_IN_PROGRESS:
-                SCRAPING_IN_PROGRESS.remove(query)
-        print(f"✅ Finished background task for: {query}")
+# Bounds of the Retry-After sent with a queued or running research search
+RESEARCH_RETRY_AFTER_MIN = 2
+RESEARCH_RETRY_AFTER_MAX = 10
 
 
 @api.get("/search/research", response=List[ResearchPaperOut], auth=JWTAuth())
@@ -173,49 +383,62 @@ def research_search_api(request, title: str):
     Scrape Semantic Scholar for `title`.
 
     - If results are cached, returns them immediately with a 200 OK status.
-    - If not cached, starts a background scraping task and returns a
-      202 Accepted status, telling the client to poll this endpoint again.
+    - If not cached, queues a scrape job (one per query over all worker
+      processes) and returns 202 Accepted with the job's "status" ("queued"
+      or "running"), "position" in the queue and "eta_seconds"; poll again
+      after Retry-After seconds.
+    - If the job failed after its retries, returns 502 with the last error.
     """
     if not title:
         raise HttpError(400, "The 'title' query parameter is required.")
 
     query = title.strip()
-    cache_path = os.path.join("data_cache", "semantic_scholar", safe_filename(query))
 
-    # 1. If the result is already cached, return it.
-    if os.path.exists(cache_path):
-        with open(cache_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    # 1. If the result is already cached, return it. A lookup is counted in
+    #    query_key_stats here, when it is answered: right away, or on the
+    #    poll that finds its job's results (the 202 polls are not lookups).
+    data = load_cached_results(query)
+    if data is not None:
+        query_key_stats.record("semantic_scholar", query)
         # For Ninja, we return data directly for a 200 OK response.
         # The ResearchPaperOut schema will validate this.
         return data
 
-    # 2. If not cached, check if a job is already running.
-    with SCRAPING_LOCK:
-        if query in SCRAPING_IN_PROGRESS:
-            # Tell the client we're still processing.
-            return JsonResponse({"status": "processing"}, status=202)
-
-        # 3. If not cached and not running, start the new background task.
-        SCRAPING_IN_PROGRESS.add(query)
-        # Use a standard Python thread to run the task in the background.
-        thread = threading.Thread(target=scrape_and_cache_task, args=(query,))
-        thread.start()
-
-    # Immediately return a 202 Accepted response.
-    return JsonResponse({"status": "processing"}, status=202)
+    # 2. If not cached, queue a job (a no-op while one is queued or running).
+    job = semantic_scholar_jobs.submit(query)
+    if job["status"] == "failed":
+        raise HttpError(502, f"Semantic Scholar scrape failed: {job['error']}")
+    if job["status"] == "done":
+        # Finished between the cache read and now
+        data = load_cached_results(query)
+        if data is not None:
+            query_key_stats.record("semantic_scholar", query)
+            return data
+
+    retry_after = min(max(job.get("eta_seconds", 0), RESEARCH_RETRY_AFTER_MIN), RESEARCH_RETRY_AFTER_MAX)
+    return JsonResponse(
+        {
+            "status": job["status"],
+            "position": job.get("position", 0),
+            "eta_seconds": job.get("eta_seconds"),
+            "attempts": job["attempts"],
+            "last_error": job["error"],
+        },
+        status=202,
+        headers={"Retry-After": str(retry_after)},
+    )
 
 
 # =======================================================================
 #                  NEW BOOK DETAIL ENDPOINT
 # =======================================================================
-@api.get("/book-detail/{workId}/{slug}")
-def get_book_detail(request, workId: str, slug: str, edition: str):
-    """
-    Fetches details for a specific book edition from OpenLibrary by scraping.
-    The 'edition' query parameter is required and contains the book's key.
-    Example: ?edition=key%3A/books/OL27918581M
-    """
+# Seconds a client should wait between polls of the carousels
+BOOK_DETAIL_RETRY_AFTER = 3
+# How long one SSE connection waits for the carousels
+BOOK_DETAIL_STREAM_TIMEOUT = 60
+
+
+def _book_detail_page(workId: str, slug: str, edition: str) -> BookDetailPage:
     # 1. Validate and extract the book ID (e.g., OL27918581M) from the edition key
     if not edition:
         raise HttpError(400, "The 'edition' query parameter is required.")
@@ -228,23 +451,142 @@ def get_book_detail(request, workId: str, slug: str, edition: str):
 
     # 2. Construct the full URL for the scraper
     # This URL format is reliable for scraping a specific book edition page.
-    scrape_url = f"https://openlibrary.org/books/{book_id}/{slug}"
+    return BookDetailPage(f"https://openlibrary.org/books/{book_id}/{slug}", work_id=workId)
 
-    print(f"▶️  Initiating scrape for URL: {scrape_url}")
+
+def _dynamic_part(details: dict) -> dict:
+    return {
+        "dynamic_status": details["dynamic_status"],
+        "you_might_also_like": details.get("you_might_also_like", []),
+        "more_by_author": details.get("more_by_author", []),
+    }
+
+
+@api.get("/book-detail/{workId}/{slug}")
+def get_book_detail(request, workId: str, slug: str, edition: str):
+    """
+    Fetches details for a specific book edition from OpenLibrary by scraping.
+    The 'edition' query parameter is required and contains the book's key.
+    Example: ?edition=key%3A/books/OL27918581M
+
+    Static fields are returned at once. "dynamic_status" tells whether
+    "You might also like" and "More by author" are included ("ready"), are
+    still being scraped ("pending": poll /dynamic or listen to
+    /dynamic/stream) or could not be scraped ("failed").
+
+    Only the first few editions are inline; "editions_total" counts them
+    all and "editions_next_cursor" continues in /editions.
+    """
+    book_scraper = _book_detail_page(workId, slug, edition)
+    print(f"▶️  Initiating scrape for URL: {book_scraper.url}")
 
     try:
-        # 3. Instantiate the scraper and get the data
-        book_scraper = BookDetailPage(scrape_url)
-        book_data = book_scraper.get_details()
-        
-        # 4. Return the data as a JSON response
-        return book_data
+        # 3. Get the static data; the carousels are scraped in the background
+        return _with_proxied_covers(request, with_editions_preview(book_scraper.get_static_details()))
         
     except Exception as e:
         print("❌ Error during book detail scraping:")
         traceback.print_exc()
         raise HttpError(500, f"An unexpected error occurred while fetching book details: {str(e)}")
 
+
+@api.get("/book-detail/{workId}/{slug}/editions")
+def get_book_detail_editions(
+    request, workId: str, slug: str, edition: str, cursor: Optional[str] = None, limit: int = EDITIONS_PAGE_SIZE
+):
+    """
+    The work's editions, one page at a time: {"editions", "total", "next_cursor"}.
+    Pass `next_cursor` (or a detail response's "editions_next_cursor") as
+    `cursor` for the next page; it is null on the last one.
+    """
+    book_scraper = _book_detail_page(workId, slug, edition)
+    try:
+        return _with_proxied_covers(request, book_scraper.get_editions(cursor=cursor, limit=limit))
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    except Exception as e:
+        traceback.print_exc()
+        raise HttpError(500, f"An unexpected error occurred while fetching book details: {str(e)}")
+
+
+@api.get("/book-detail/{workId}/{slug}/dynamic")
+def get_book_detail_dynamic(request, workId: str, slug: str, edition: str):
+    """
+    The carousels of a book detail page.
+
+    - 202 Accepted with {"dynamic_status": "pending"} and a Retry-After
+      header while they are being scraped: poll again.
+    - 200 OK with dynamic_status "ready" (or "failed", with empty lists).
+    """
+    book_scraper = _book_detail_page(workId, slug, edition)
+    try:
+        details = book_scraper.get_static_details()
+    except Exception as e:
+        traceback.print_exc()
+        raise HttpError(500, f"An unexpected error occurred while fetching book details: {str(e)}")
+
+    if details["dynamic_status"] == "pending":
+        return JsonResponse(
+            {"dynamic_status": "pending"},
+            status=202,
+            headers={"Retry-After": str(BOOK_DETAIL_RETRY_AFTER)},
+        )
+    return _with_proxied_covers(request, _dynamic_part(details))
+
+
+@api.get("/book-detail/{workId}/{slug}/dynamic/stream")
+def stream_book_detail_dynamic(request, workId: str, slug: str, edition: str):
+    """
+    Server-sent events for the carousels of a book detail page: a "status"
+    event right away, then one "dynamic" event with the carousels once they
+    are scraped (or failed, or after BOOK_DETAIL_STREAM_TIMEOUT seconds,
+    still "pending": reconnect).
+    """
+    book_scraper = _book_detail_page(workId, slug, edition)
+
+    async def events():
+        try:
+            details = await asyncio.to_thread(book_scraper.get_static_details)
+        except Exception as e:
+            traceback.print_exc()
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        if details["dynamic_status"] == "pending":
+            yield f"event: status\ndata: {json.dumps({'dynamic_status': 'pending'})}\n\n"
+            details = await asyncio.to_thread(book_scraper.wait_for_dynamic, BOOK_DETAIL_STREAM_TIMEOUT)
+        payload = json.dumps(_with_proxied_covers(request, _dynamic_part(details)), ensure_ascii=False)
+        yield f"retry: {BOOK_DETAIL_RETRY_AFTER * 1000}\nevent: dynamic\ndata: {payload}\n\n"
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+@api.get("/covers/{kind}/{key_type}/{value}")
+def get_cover(request, kind: str, key_type: str, value: str, size: str = covers.DEFAULT_SIZE):
+    """
+    A covers.openlibrary.org cover as a WebP thumbnail (size s, m or l),
+    e.g. /covers/b/id/6979861?size=m. Fetched and resized on first request,
+    then served from the disk cache. API responses link covers here.
+    """
+    try:
+        data = cover_proxy.cover(kind, key_type, value, size)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    except CoverNotFound:
+        raise HttpError(404, "Cover not found")
+    except Exception as e:
+        print(f"[Covers] {kind}/{key_type}/{value} failed: {e}")
+        raise HttpError(502, "Cover could not be fetched")
+
+    tag = covers.etag(data)
+    if covers.etag_matches(request.headers.get("If-None-Match", ""), tag):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(data, content_type="image/webp")
+    response["ETag"] = tag
+    response["Cache-Control"] = COVER_CACHE_CONTROL if key_type == "id" else COVER_CACHE_CONTROL_MUTABLE
+    return response
+
 # =======================================================================
 #                  END OF NEW ENDPOINT
 # =======================================================================
@@ -0,0 +1,216 @@
+import base64
+import json
+from contextlib import contextmanager
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from api.models.models_items import (
+    AVAILABILITY_STATUS_CHOICES,
+    LIBRARY_ITEM_TYPE_CHOICES,
+    LibraryItem,
+)
+from services.query_normalizer import canonical_query
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# One SELECT per page (specialized models are joined in); more is an N+1 bug
+QUERY_BUDGET = 1
+
+MATCH_MODES = ("prefix", "fulltext")
+PREFIX_FIELDS = ("title", "authors")
+ITEM_TYPES = [value for value, _ in LIBRARY_ITEM_TYPE_CHOICES]
+AVAILABILITY_STATUSES = [value for value, _ in AVAILABILITY_STATUS_CHOICES]
+
+# item_type -> (related_name of the specialized model, fields returned as "details")
+SPECIALIZED = {
+    "EBook": ("ebook", ("file_format", "download_link")),
+    "PrintedBook": ("printed_book", ("location", "copy_number", "no_of_books_available", "physical_condition")),
+    "ResearchPaper": ("research_paper", ("doi", "citation_count", "source_api")),
+    "Audiobook": ("audiobook", ("audio_format", "duration", "narrator")),
+    "Journal": ("journal", ("volume", "issue", "issn")),
+}
+
+_BOOLEAN_OPERATORS = str.maketrans("", "", '+-<>()~*"@')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Raise QueryBudgetExceeded as soon as the block runs more than
+    `max_queries` SQL queries. Yields a dict whose "queries" is the count so far.
+    """
+    counter = {"queries": 0}
+
+    def count(execute, sql, params, many, context):
+        counter["queries"] += 1
+        if counter["queries"] > max_queries:
+            raise QueryBudgetExceeded(f"More than {max_queries} queries; next was: {sql[:200]}")
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        yield counter
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw.decode("utf-8"))
+        int(position["id"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor.")
+    return position
+
+
+def prefix_upper_bound(key: str):
+    """
+    Smallest string above every string that starts with `key`, so
+    key <= value < bound is "starts with key"; None when there is none.
+    Made by bumping the last character rather than appending a maximal one,
+    so the bound stays a character the column can hold (MySQL's utf8mb3
+    has no 4-byte characters).
+    """
+    while key:
+        last = ord(key[-1]) + 1
+        if 0xD800 <= last <= 0xDFFF:
+            last = 0xE000  # surrogates are not characters
+        if last <= 0x10FFFF:
+            return key[:-1] + chr(last)
+        key = key[:-1]
+    return None
+
+
+def fulltext_terms(query: str) -> list:
+    """Words of a query, without anything MySQL's boolean mode would read as an operator."""
+    return [word for word in canonical_query(query).translate(_BOOLEAN_OPERATORS).split() if word]
+
+
+def _fulltext_filter(queryset, terms: list):
+    if connection.vendor == "mysql":
+        # Every word required, each as a prefix; served by the FULLTEXT index
+        table = LibraryItem._meta.db_table
+        return queryset.extra(
+            where=[f"MATCH ({table}.title, {table}.authors) AGAINST (%s IN BOOLEAN MODE)"],
+            params=[" ".join(f"+{term}*" for term in terms)],
+        )
+    # Other backends (development SQLite): substring match, a table scan
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(authors__icontains=term))
+    return queryset
+
+
+def _serialize(item: LibraryItem) -> dict:
+    result = {
+        "id": item.id,
+        "title": item.title,
+        "authors": item.authors,
+        "genre": item.genre,
+        "publication_date": item.publication_date,
+        "item_type": item.item_type,
+        "availability_status": item.availability_status,
+        "digital_source": item.digital_source,
+        "openlibrary_key": item.openlibrary_key,
+        "details": None,
+    }
+    related_name, fields = SPECIALIZED.get(item.item_type, (None, ()))
+    if related_name:
+        try:
+            specialized = getattr(item, related_name)
+        except ObjectDoesNotExist:
+            specialized = None
+        if specialized is not None:
+            result["details"] = {field: getattr(specialized, field) for field in fields}
+    return result
+
+
+def search_catalog(
+    q: str = "",
+    match: str = "prefix",
+    field: str = "title",
+    item_type: str = None,
+    availability_status: str = None,
+    limit: int = PAGE_SIZE,
+    cursor: str = None,
+) -> dict:
+    """
+    One page of our own holdings (LibraryItem with its specialized model).
+
+    - match=prefix: `field` (title or authors) starts with `q`, case-insensitive,
+      in alphabetical order. A range scan on the lower-cased column's index.
+    - match=fulltext: every word of `q` in the title or authors, in id order.
+    - no `q`: every item, in id order.
+
+    item_type and availability_status filter on the composite indexes.
+    Pages are keyset-paginated: pass back `next_cursor` for the next one, so
+    page 1000 costs the same as page 1. The page is one query; more raises
+    QueryBudgetExceeded. Invalid arguments raise ValueError.
+    """
+    if match not in MATCH_MODES:
+        raise ValueError(f"Invalid 'match'. Use: {', '.join(MATCH_MODES)}.")
+    if field not in PREFIX_FIELDS:
+        raise ValueError(f"Invalid 'field'. Use: {', '.join(PREFIX_FIELDS)}.")
+    if item_type and item_type not in ITEM_TYPES:
+        raise ValueError(f"Invalid 'item_type'. Use: {', '.join(ITEM_TYPES)}.")
+    if availability_status and availability_status not in AVAILABILITY_STATUSES:
+        raise ValueError(f"Invalid 'availability_status'. Use: {', '.join(AVAILABILITY_STATUSES)}.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}.")
+    position = decode_cursor(cursor) if cursor else None
+
+    # Join only the specialized model(s) the page can contain
+    related = [SPECIALIZED[item_type][0]] if item_type else [name for name, _ in SPECIALIZED.values()]
+    queryset = LibraryItem.objects.select_related(*related)
+    if item_type:
+        queryset = queryset.filter(item_type=item_type)
+    if availability_status:
+        queryset = queryset.filter(availability_status=availability_status)
+
+    q = (q or "").strip()
+    prefix = match == "prefix" and bool(q)
+    if prefix:
+        # SQLite's LOWER() only folds ASCII; MySQL's matches Python's
+        key = q.lower()
+        queryset = queryset.annotate(sort_key=Lower(field)).filter(sort_key__gte=key)
+        bound = prefix_upper_bound(key)
+        if bound is not None:
+            queryset = queryset.filter(sort_key__lt=bound)
+        order = ("sort_key", "id")
+    else:
+        if q:
+            terms = fulltext_terms(q)
+            if not terms:
+                return {"results": [], "next_cursor": None, "queries": 0}
+            queryset = _fulltext_filter(queryset, terms)
+        order = ("id",)
+
+    if position:
+        if prefix:
+            key, last_id = str(position.get("key", "")), position["id"]
+            queryset = queryset.filter(Q(sort_key__gt=key) | Q(sort_key=key, id__gt=last_id))
+        else:
+            queryset = queryset.filter(id__gt=position["id"])
+
+    with query_budget(QUERY_BUDGET) as budget:
+        # One extra row tells whether there is a next page
+        items = list(queryset.order_by(*order)[: limit + 1])
+        results = [_serialize(item) for item in items[:limit]]
+
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = encode_cursor(
+            {"key": last.sort_key, "id": last.id} if prefix else {"id": last.id}
+        )
+
+    return {"results": results, "next_cursor": next_cursor, "queries": budget["queries"]}
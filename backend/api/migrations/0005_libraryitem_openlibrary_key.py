@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_download'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='openlibrary_key',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 00:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# Django has no portable full-text index; MySQL gets a FULLTEXT index, other
+# backends fall back to substring matching (see api/catalog_search.py).
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX libraryitem_title_authors_ft ON api_libraryitem (title, authors)'
+        )
+
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX libraryitem_title_authors_ft ON api_libraryitem')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_libraryitem_openlibrary_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(django.db.models.functions.text.Lower('title'), models.F('id'), name='libraryitem_title_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(django.db.models.functions.text.Lower('authors'), models.F('id'), name='libraryitem_authors_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['item_type', 'availability_status', 'id'], name='libraryitem_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['availability_status', 'id'], name='libraryitem_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['genre'], name='libraryitem_genre_idx'),
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from api.states.item_states import AvailableState, CheckedOutState, ReservedState, UnderReviewState
 from api.observer.user_observer import UserObserver
 from api.observer.observer import Subject
@@ -53,6 +54,20 @@ class LibraryItem(models.Model):
     item_type = models.CharField(
         max_length=20, choices=LIBRARY_ITEM_TYPE_CHOICES, default='PrintedBook'
     )
+    # OpenLibrary work ID (e.g. "OL45883W") of items ingested from OpenLibrary
+    openlibrary_key = models.CharField(max_length=32, unique=True, null=True, blank=True)
+
+    class Meta:
+        # Catalog search (api/catalog_search.py). Title/author prefixes are
+        # range scans on the lower-cased columns; full-text search uses a
+        # MySQL FULLTEXT index on (title, authors) created in migration 0006.
+        indexes = [
+            models.Index(Lower("title"), "id", name="libraryitem_title_lower_idx"),
+            models.Index(Lower("authors"), "id", name="libraryitem_authors_lower_idx"),
+            models.Index(fields=["item_type", "availability_status", "id"], name="libraryitem_type_status_idx"),
+            models.Index(fields=["availability_status", "id"], name="libraryitem_status_idx"),
+            models.Index(fields=["genre"], name="libraryitem_genre_idx"),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.item_type})"
@@ -0,0 +1,76 @@
+"""
+Per-page parse time of BookDetailPage's static extraction.
+
+Times building the lxml tree and evaluating the extraction spec
+(BOOK_DETAIL_SPEC, one walk over the tree) separately for every saved
+edition page, and the html.parser BeautifulSoup tree the select()-per-field
+parser used to build, for comparison.
+
+Usage (from backend/):
+    python api/scripts/benchmark_book_detail_parse.py --runs 50
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from services.openlibrary.book_details import BookDetailPage  # noqa: E402
+from services.openlibrary.extraction import parse_html  # noqa: E402
+
+FIXTURES_DIR = BACKEND_DIR / "html" / "openlibrary"
+PAGES = [
+    FIXTURES_DIR / "book_detail" / "atomic_habits.html",
+    FIXTURES_DIR / "book_detail" / "the_hobbit_sparse.html",
+]
+
+
+def median_ms(run, runs: int) -> float:
+    run()  # warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    report = []
+    for path in PAGES:
+        html = path.read_text(encoding="utf-8")
+        page = BookDetailPage("https://openlibrary.org/books/OL1M/benchmark")
+        page.root = parse_html(html)
+
+        def extract():
+            page.book_details = {}
+            page._extract_book_details()
+
+        tree_ms = median_ms(lambda: parse_html(html), args.runs)
+        extract_ms = median_ms(extract, args.runs)
+        report.append({
+            "page": path.name,
+            "kb": round(len(html.encode("utf-8")) / 1024),
+            "elements": sum(1 for _ in page.root.iter()),
+            "tree_ms": tree_ms,
+            "extract_ms": extract_ms,
+            "total_ms": round(tree_ms + extract_ms, 2),
+            "html_parser_tree_ms": median_ms(lambda: BeautifulSoup(html, "html.parser"), args.runs),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Catalog search latency on a synthetic catalog (default 1M LibraryItems).
+
+Builds the catalog once (kept in --db for later runs), then times
+search_catalog() for prefix, full-text and filtered browse queries, page 1
+and deep keyset pages, and prints each query's plan. --without-indexes
+repeats the run with the catalog search indexes dropped (they are
+recreated afterwards), which is what every lookup cost before them.
+
+Runs on SQLite by default, so full-text search is the substring fallback
+(a scan); --settings-db uses the configured database instead (MySQL, where
+the FULLTEXT index serves it). Specialized models are not generated.
+
+Usage (from backend/):
+    python api/scripts/benchmark_catalog_search.py --items 1000000 --without-indexes
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--items", type=int, default=1_000_000)
+parser.add_argument("--runs", type=int, default=20)
+parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "catalog_benchmark.sqlite3"))
+parser.add_argument("--settings-db", action="store_true", help="Use the database from settings.")
+parser.add_argument("--without-indexes", action="store_true", help="Also time the queries without the indexes.")
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not args.settings_db:
+    settings.DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": args.db}}
+settings.DEBUG = False  # no query log
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from api.catalog_search import search_catalog  # noqa: E402
+from api.models.models_items import LibraryItem  # noqa: E402
+
+SEARCH_INDEXES = [index for index in LibraryItem._meta.indexes]
+
+
+def synthetic_words(count: int, rng: random.Random) -> list:
+    syllables = ["ka", "lo", "ri", "sen", "tor", "mi", "an", "bel", "qu", "dra", "vin", "el", "os", "the", "mar", "un"]
+    return sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(count)})
+
+
+def build_catalog(items: int):
+    have = LibraryItem.objects.count()
+    if have >= items:
+        print(f"[Benchmark] Catalog has {have} items")
+        return
+    rng = random.Random(42)
+    words = synthetic_words(3000, rng)
+    names = [word.capitalize() for word in words[:800]]
+    types = ["PrintedBook"] * 5 + ["EBook"] * 3 + ["ResearchPaper", "Audiobook", "Journal"]
+    statuses = ["Available"] * 6 + ["CheckedOut"] * 2 + ["Reserved", "UnderReview"]
+
+    started = time.perf_counter()
+    batch_size = 20000
+    for start in range(have, items, batch_size):
+        batch = [
+            LibraryItem(
+                title=" ".join(rng.choices(words, k=rng.randint(1, 5))).capitalize(),
+                authors=f"{rng.choice(names)} {rng.choice(names)}",
+                publication_date=date(1900, 1, 1) + timedelta(days=rng.randrange(45000)),
+                genre=rng.choice(words[:60]),
+                availability_status=rng.choice(statuses),
+                item_type=rng.choice(types),
+            )
+            for _ in range(min(batch_size, items - start))
+        ]
+        with transaction.atomic():
+            LibraryItem.objects.bulk_create(batch)
+        print(f"[Benchmark] {start + len(batch)} items ({time.perf_counter() - started:.0f} s)")
+
+
+def query_plan(run) -> list:
+    """Plan of the SELECT `run` sends (EXPLAIN QUERY PLAN on SQLite, EXPLAIN elsewhere)."""
+    captured = []
+
+    def capture(execute, sql, params, many, context):
+        captured.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        run()
+    sql, params = captured[-1]
+    explain = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(explain + sql, params)
+        return [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+def deep_cursor(pages: int, **kwargs) -> str:
+    """The cursor of page `pages` + 1, by following next_cursor."""
+    cursor = None
+    for _ in range(pages):
+        cursor = search_catalog(cursor=cursor, **kwargs)["next_cursor"]
+    return cursor
+
+
+def time_queries(runs: int) -> list:
+    cases = [
+        ("prefix title", dict(q="kalo")),
+        ("prefix title + type + status", dict(q="kalo", item_type="EBook", availability_status="Available")),
+        ("prefix authors", dict(q="Anmi", field="authors")),
+        ("fulltext 2 words", dict(q="sen tor", match="fulltext")),
+        ("browse type + status", dict(item_type="Journal", availability_status="Reserved")),
+    ]
+    report = []
+    for name, kwargs in cases:
+        for label, cursor in (("page 1", None), ("page 100", deep_cursor(99, **kwargs))):
+            timings, found = [], 0
+            for _ in range(runs):
+                started = time.perf_counter()
+                found = len(search_catalog(cursor=cursor, **kwargs)["results"])
+                timings.append((time.perf_counter() - started) * 1000)
+            report.append(
+                {
+                    "query": f"{name}, {label}",
+                    "results": found,
+                    "median_ms": round(statistics.median(timings), 2),
+                    "plan": query_plan(lambda: search_catalog(cursor=cursor, **kwargs)),
+                }
+            )
+            print(f"[Benchmark] {report[-1]['query']}: {report[-1]['median_ms']} ms")
+    return report
+
+
+def set_indexes(enabled: bool):
+    with connection.schema_editor() as editor:
+        for index in SEARCH_INDEXES:
+            if enabled:
+                editor.add_index(LibraryItem, index)
+            else:
+                editor.remove_index(LibraryItem, index)
+
+
+def main():
+    call_command("migrate", verbosity=0)
+    build_catalog(args.items)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    result = {"items": LibraryItem.objects.count(), "database": connection.vendor}
+    result["with_indexes"] = time_queries(args.runs)
+    if args.without_indexes:
+        set_indexes(False)
+        try:
+            result["without_indexes"] = time_queries(max(1, args.runs // 10))
+        finally:
+            set_indexes(True)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-page parse time of every search result parser backend.
+
+Runs each backend over the saved fixtures in html/openlibrary/search_page.
+The book search page is also blown up to a 100-result page (the fixture's
+20 items repeated) to match a full OpenLibrary result page.
+
+Usage (from backend/):
+    python api/scripts/benchmark_parsers.py --runs 50
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from services.openlibrary.parsers import PARSERS, get_search_parser  # noqa: E402
+
+FIXTURES_DIR = BACKEND_DIR / "html" / "openlibrary" / "search_page"
+
+
+def hundred_result_page() -> str:
+    html = (FIXTURES_DIR / "search_results_atomic_habits.html").read_text(encoding="utf-8")
+    items = re.findall(r"\s*<li class=\"searchResultItem.*?</li>", html, re.S)
+    start = html.index(items[0])
+    end = html.index(items[-1]) + len(items[-1])
+    return html[:start] + "".join(items * 5) + html[end:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = [
+        ("search page (100 results)", "parse_search_page", hundred_result_page()),
+        (
+            "search page (20 results)",
+            "parse_search_page",
+            (FIXTURES_DIR / "search_results_atomic_habits.html").read_text(encoding="utf-8"),
+        ),
+        (
+            "author books",
+            "parse_author_books",
+            (FIXTURES_DIR / "author_books_james_clear.html").read_text(encoding="utf-8"),
+        ),
+        (
+            "search inside",
+            "parse_inside_results",
+            (FIXTURES_DIR / "search_inside_atomic_habits.html").read_text(encoding="utf-8"),
+        ),
+    ]
+
+    report = []
+    for label, method, html in pages:
+        row = {"page": label}
+        results = {}
+        for name in PARSERS:
+            parse = getattr(get_search_parser(name), method)
+            parse(html)  # warm up
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                results[name] = parse(html)
+                timings.append((time.perf_counter() - start) * 1000)
+            row[f"{name}_median_ms"] = round(statistics.median(timings), 2)
+        row["identical"] = len({json.dumps(r, sort_keys=True) for r in results.values()}) == 1
+        row["speedup"] = round(row["bs4_median_ms"] / row["lxml_median_ms"], 1)
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Sidebar facets benchmark: plain HTTP partial vs. Selenium (pooled browser).
+
+Both paths run against a local stub of openlibrary.org that replays the
+recorded facet fixture, so the numbers measure our side only (no network):
+  - /partials.json  -> {"sidebar": <fixture>}          (HTTP path)
+  - /search         -> search page whose JS injects the
+                       same fixture after a short delay   (Selenium path)
+
+Reports per-call latency and the resident memory (this process + any Chrome
+children) for each path, and checks both paths return the same sidebar_info.
+
+Usage (from backend/):
+    python api/scripts/benchmark_sidebar.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import psutil
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from services.openlibrary import facets  # noqa: E402
+
+FIXTURE = BACKEND_DIR / "html" / "openlibrary" / "search_page" / "facets_atomic_habits.html"
+
+# Mimics the real page: sidebar arrives after first paint via JS
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><body>
+<div id="searchResults">results</div>
+<div id="sidebar"></div>
+<script>
+  setTimeout(function () {{
+    document.getElementById("sidebar").innerHTML = {sidebar};
+  }}, {delay_ms});
+</script>
+</body></html>
+"""
+
+
+def start_stub(sidebar_html: str, delay_ms: int):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/partials.json"):
+                body = json.dumps({"sidebar": sidebar_html}).encode("utf-8")
+                content_type = "application/json"
+            else:
+                body = SEARCH_PAGE.format(
+                    sidebar=json.dumps(sidebar_html), delay_ms=delay_ms
+                ).encode("utf-8")
+                content_type = "text/html; charset=utf-8"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def rss_mb() -> float:
+    """RSS of this process plus all child processes (chromedriver, Chrome)."""
+    proc = psutil.Process(os.getpid())
+    total = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def bench(name: str, fetch, url: str, runs: int) -> tuple:
+    """(latency and memory report, sidebar_info of the last run) of `runs` calls of fetch(url)."""
+    rss_before = rss_mb()
+    latencies, rss_peak, result = [], rss_before, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fetch(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rss_peak = max(rss_peak, rss_mb())
+
+    report = {
+        "path": name,
+        "runs": runs,
+        "first_ms": round(latencies[0], 1),
+        "median_ms": round(statistics.median(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_peak_mb": round(rss_peak, 1),
+    }
+    return report, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--js-delay-ms", type=int, default=300,
+        help="Delay before the stub search page injects its sidebar.",
+    )
+    parser.add_argument("--skip-selenium", action="store_true")
+    args = parser.parse_args()
+
+    sidebar_html = FIXTURE.read_text(encoding="utf-8")
+    server = start_stub(sidebar_html, args.js_delay_ms)
+    url = (
+        f"http://127.0.0.1:{server.server_port}/search?q=atomic+habits&mode=everything"
+    )
+
+    reports = []
+    http_report, http_result = bench("http", facets.fetch_facets_http, url, args.runs)
+    reports.append(http_report)
+
+    if not args.skip_selenium:
+        try:
+            selenium_report, selenium_result = bench(
+                "selenium", facets.fetch_facets_selenium, url, args.runs
+            )
+            reports.append(selenium_report)
+            selenium_report["same_sidebar_info"] = selenium_result == http_result
+        except Exception as e:
+            print(f"[Benchmark] Selenium path skipped: {e}")
+        finally:
+            facets.browser_pool.shutdown()
+
+    server.shutdown()
+    print(f"facet groups: {len(http_result)}, entries: {sum(map(len, http_result.values()))}")
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
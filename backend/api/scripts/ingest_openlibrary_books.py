@@ -0,0 +1,145 @@
+"""
+Stream OpenLibrary works into the catalog (LibraryItem + EBookModel).
+
+Reads a JSONL file (one work per line, as written by fetch_openlibrary_books.py)
+or a JSON array of works one record at a time, maps each work to LibraryItem
+fields (services.openlibrary.catalog_ingest.catalog_row) and loads them in
+batches: one transaction and two bulk_create calls per batch. Works whose OpenLibrary key is already in the catalog are skipped, so
+memory stays at one batch however large the input, and re-running a batch
+never duplicates rows.
+
+Progress is checkpointed after every committed batch; an interrupted load
+started again with the same input resumes after the last committed batch
+(--restart ignores the checkpoint).
+
+Ingested works become E-Books whose download link is the OpenLibrary work
+page, since OpenLibrary metadata says nothing about physical copies.
+
+Usage (from backend/):
+    python api/scripts/ingest_openlibrary_books.py sources/open_library/books_metadata.jsonl
+    python api/scripts/ingest_openlibrary_books.py works.jsonl --batch-size 2000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import reset_queries, transaction  # noqa: E402
+
+from api.models.models_items import EBookModel, LibraryItem  # noqa: E402
+from services.openlibrary.catalog_ingest import IngestCheckpoint, catalog_row, iter_records  # noqa: E402
+
+CHECKPOINT_DIR = BACKEND_DIR / "data_cache" / "ingest"
+
+
+def load_batch(rows: list) -> int:
+    """
+    Insert the rows whose OpenLibrary key is not in the catalog yet, with
+    their EBookModel, in one transaction. Returns how many were inserted.
+    """
+    rows = list({row["openlibrary_key"]: row for row in rows}.values())
+    keys = [row["openlibrary_key"] for row in rows]
+
+    with transaction.atomic():
+        existing = set(
+            LibraryItem.objects.filter(openlibrary_key__in=keys).values_list("openlibrary_key", flat=True)
+        )
+        new_rows = [row for row in rows if row["openlibrary_key"] not in existing]
+        if not new_rows:
+            return 0
+        LibraryItem.objects.bulk_create(
+            [LibraryItem(item_type="EBook", **row) for row in new_rows]
+        )
+        # Not every backend (MySQL) sets primary keys on bulk_create; look them up by key
+        ids = dict(
+            LibraryItem.objects.filter(
+                openlibrary_key__in=[row["openlibrary_key"] for row in new_rows]
+            ).values_list("openlibrary_key", "id")
+        )
+        EBookModel.objects.bulk_create(
+            [
+                EBookModel(
+                    library_item_id=ids[row["openlibrary_key"]],
+                    file_format="web",
+                    download_link=row["digital_source"],
+                )
+                for row in new_rows
+            ]
+        )
+    return len(new_rows)
+
+
+def ingest(input_path: Path, batch_size: int, checkpoint: IngestCheckpoint) -> dict:
+    state = checkpoint.load()
+    if state["offset"]:
+        print(f"[Ingest] Resuming {input_path} at byte {state['offset']} ({state['records']} records done)")
+
+    started = time.perf_counter()
+    loaded_here = 0
+    records = iter_records(input_path, state["offset"])
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        rows = [row for row in (catalog_row(record) for _, record in batch) if row]
+        inserted = load_batch(rows) if rows else 0
+
+        state["offset"] = batch[-1][0]
+        state["records"] += len(batch)
+        state["inserted"] += inserted
+        state["duplicates"] += len(rows) - inserted
+        state["skipped"] += len(batch) - len(rows)
+        checkpoint.save(state)
+        # With DEBUG on, Django keeps every query (IN lists of a whole batch) in memory
+        reset_queries()
+
+        loaded_here += len(batch)
+        elapsed = time.perf_counter() - started
+        print(
+            f"[Ingest] {state['records']} records, {state['inserted']} inserted,"
+            f" {state['duplicates']} duplicates, {state['skipped']} skipped"
+            f" ({loaded_here / elapsed:.0f} records/s)"
+        )
+
+    elapsed = time.perf_counter() - started
+    return dict(
+        state,
+        seconds=round(elapsed, 2),
+        records_per_second=round(loaded_here / elapsed, 1) if elapsed else None,
+        # ru_maxrss is KiB on Linux
+        max_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", type=Path, help="JSONL file or JSON array of OpenLibrary works.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint file (default: data_cache/ingest/<input>.checkpoint.json).")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the top.")
+    args = parser.parse_args()
+
+    checkpoint = IngestCheckpoint(
+        args.checkpoint or CHECKPOINT_DIR / f"{args.input.name}.checkpoint.json", args.input
+    )
+    if args.restart:
+        checkpoint.clear()
+
+    print(json.dumps(ingest(args.input, args.batch_size, checkpoint), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Load test: concurrent-request throughput of the sync vs. async search endpoint,
+through real servers.
+
+Each run starts the Django application in a server process of its own and
+drives it over HTTP. Every OpenLibrary fetch goes to a local stub (own
+process) that answers after --latency-ms, like the real site would.
+
+  - async: the real GET /api/search endpoint (async view, async HTTP client)
+  - sync:  a sync copy of the previous /api/search view, mounted under /sync/
+           for this test only
+
+and each of them is served by
+  - asgi: uvicorn, as in production (backend/asgi.py). Sync views run on a
+          worker thread that is blocked for the whole upstream fetch.
+  - wsgi: Django's threaded WSGI server (what runserver uses). Async views
+          run in an event loop of their own per request.
+
+peak_threads is the thread count of the server process.
+
+Every request uses a distinct query, so every request is a real upstream
+fetch (no cache hits, no coalescing). The sidebar facets are fetched on a
+background thread after the response is sent, so they are switched off to
+keep the run about request handling alone. The search endpoints never touch
+the database, so it is swapped for in-memory SQLite to run without MySQL.
+
+Usage (from backend/):
+    python api/scripts/load_test_search.py --requests 200 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+settings.ALLOWED_HOSTS = ["*"]
+settings.ROOT_URLCONF = __name__
+django.setup()
+
+import httpx  # noqa: E402
+import psutil  # noqa: E402
+import uvicorn  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.servers.basehttp import WSGIServer, run as run_wsgi  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.urls import path  # noqa: E402
+from ninja import NinjaAPI  # noqa: E402
+
+from api.api import api  # noqa: E402
+from services.openlibrary import search_cache, search_page  # noqa: E402
+from services.openlibrary.coalescer import RequestCoalescer  # noqa: E402
+from services.openlibrary.search_cache import SearchCacheStore  # noqa: E402
+from services.openlibrary.search_page import SearchByBookStrategy, SearchContext  # noqa: E402
+
+FIXTURES_DIR = BACKEND_DIR / "html" / "openlibrary" / "search_page"
+
+baseline = NinjaAPI(urls_namespace="sync_baseline")
+
+
+@baseline.get("/search")
+def sync_search_api(request, q: str, sort_by: Optional[str] = "relevance", page: Optional[int] = 1):
+    strategy = SearchByBookStrategy(query=q, sort_by=sort_by, headless=True)
+    data = SearchContext(strategy).search(page=page)
+    return {"results": data.get("pages", {}).get(f"page_{page}", []), **data}
+
+
+urlpatterns = [
+    path("api/", api.urls),
+    path("sync/", baseline.urls),
+]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve_stub(latency: float, ports: multiprocessing.Queue):
+    # One result page without pagination, so no background prefetch kicks in
+    search_html = (FIXTURES_DIR / "search_results_atomic_habits.html").read_text(encoding="utf-8")
+    search_html = search_html.replace('<div class="pagination">', '<div class="no-pagination">')
+    facets_json = json.dumps(
+        {"sidebar": (FIXTURES_DIR / "facets_atomic_habits.html").read_text(encoding="utf-8")}
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path.startswith("/partials.json"):
+                body, content_type = facets_json, "application/json"
+            else:
+                body, content_type = search_html, "text/html; charset=utf-8"
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = StubServer(("127.0.0.1", 0), Handler)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def start_stub(latency: float):
+    """Run the stub in its own process, so its threads stay out of peak_threads."""
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_stub, args=(latency, ports), daemon=True)
+    process.start()
+    return process, ports.get(timeout=10)
+
+
+class LoadTestWSGIServer(WSGIServer):
+    request_queue_size = 1024  # runserver's 10 would refuse most of a burst
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_app(server: str, port: int, stub_url: str):
+    """Server process: the application, fetching from the stub, behind `server`."""
+    SearchByBookStrategy.SEARCH_URL_TEMPLATE = stub_url + "/search?q={query}{sort_suffix}&page={page}"
+    SearchByBookStrategy._fetch_sidebar_info = lambda self: {}
+    tmp = Path(tempfile.mkdtemp())
+    search_cache._store = SearchCacheStore(tmp / "search_cache.db")
+    search_page.search_coalescer = RequestCoalescer(tmp / "locks")
+
+    sys.stdout = open(os.devnull, "w")  # per-request [Cache]/[Fetch] logging
+    logging.disable(logging.CRITICAL)  # and the access log
+    if server == "asgi":
+        uvicorn.run(get_asgi_application(), host="127.0.0.1", port=port, log_level="critical")
+    else:
+        run_wsgi("127.0.0.1", port, get_wsgi_application(), threading=True, server_cls=LoadTestWSGIServer)
+
+
+def start_app(server: str, stub_url: str):
+    port = free_port()
+    process = multiprocessing.Process(target=serve_app, args=(server, port, stub_url), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{server} server did not start")
+
+
+async def run_load(base_url: str, path: str, label: str, total: int, concurrency: int, pid: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    server = psutil.Process(pid)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def one(client: httpx.AsyncClient, i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params={"q": f"load test {label} {i}"})
+                ok = response.status_code == 200 and bool(response.json().get("results"))
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, server.num_threads())
+            await asyncio.sleep(0.01)
+
+    peak_threads = server.num_threads()
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        sampler = asyncio.create_task(sample_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    latencies.sort()
+    return {
+        "endpoint": label,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_s": round(elapsed, 2),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "peak_threads": peak_threads,
+    }
+
+
+async def main(args):
+    stub, port = start_stub(args.latency_ms / 1000)
+    stub_url = f"http://127.0.0.1:{port}"
+
+    reports = []
+    for server, label, path in (
+        ("wsgi", "sync (wsgi)", "/sync/search"),
+        ("wsgi", "async (wsgi)", "/api/search"),
+        ("asgi", "sync (asgi)", "/sync/search"),
+        ("asgi", "async (asgi)", "/api/search"),
+    ):
+        app, base_url = start_app(server, stub_url)
+        try:
+            reports.append(await run_load(base_url, path, label, args.requests, args.concurrency, app.pid))
+        finally:
+            app.terminate()
+            app.join(10)
+
+    stub.terminate()
+    print(f"upstream latency: {args.latency_ms} ms")
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
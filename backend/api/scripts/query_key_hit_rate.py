@@ -0,0 +1,54 @@
+"""
+Cache-key hit rate of a query log: legacy keys vs. canonical keys.
+
+Replays the queries in order through QueryKeyStats (the counters behind
+"query_keys" in /api/metrics/scrapers). A query is a hit for a key scheme
+when an earlier query had the same key, so the two rates are what a cache
+keyed each way would reach on that traffic.
+
+The log has one query per line, either plain text or a JSON object with a
+"q", "query" or "title" field (e.g. extracted from access logs).
+
+Usage (from backend/):
+    python api/scripts/query_key_hit_rate.py queries.log [--namespace books]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from services.query_normalizer import QueryKeyStats  # noqa: E402
+
+
+def read_queries(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if line.lstrip().startswith("{"):
+                record = json.loads(line)
+                line = record.get("q") or record.get("query") or record.get("title") or ""
+            yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log", type=Path)
+    parser.add_argument("--namespace", default="log")
+    args = parser.parse_args()
+
+    stats = QueryKeyStats()
+    stats.MAX_KEYS = sys.maxsize  # the whole log, not only recent keys
+    for query in read_queries(args.log):
+        stats.record(args.namespace, query)
+
+    print(json.dumps(stats.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,1787 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from filelock import FileLock
+from PIL import Image
+from selenium.common.exceptions import WebDriverException
+
+from services.browser_pool import BrowserPool, BrowserPoolTimeout, PooledBrowser
+from services.cache_manager import BookIndexSource, CacheManager, FileCacheSource, SearchCacheSource
+from services.openlibrary import book_details, book_index, carousels, facets, search_cache, search_page
+from services.openlibrary import covers, homepage_content
+from services.openlibrary.covers import CoverNotFound, CoverProxy, proxy_cover_urls
+from services.openlibrary.book_details import BookDetailPage, DynamicContentJobs, editions_page, with_editions_preview
+from services.openlibrary.extraction import ExtractionSpec, Field, parse_html
+from services.openlibrary.book_index import BookIndex, fts_query
+from services.openlibrary import catalog_ingest
+from services.openlibrary.catalog_ingest import IngestCheckpoint, catalog_row, iter_records
+from services.openlibrary.harvester import CatalogHarvester, HarvestFrontier, TokenBucket
+from services.semantic_scholar.jobs import ScrapeJobQueue
+from services.query_normalizer import QueryKeyStats, canonical_query, query_filename
+from services.openlibrary.coalescer import RequestCoalescer
+from services.openlibrary.http_client import OpenLibraryHTTPClient, async_http_stats, get_async_http_client
+from services.openlibrary.parsers import PARSERS, get_search_parser
+from services.openlibrary.prefetcher import PagePrefetcher
+from services.openlibrary.search_cache import SearchCacheStore
 
 # Create your tests here.
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "html" / "openlibrary" / "search_page"
+BOOK_DETAIL_FIXTURES_DIR = FIXTURES_DIR.parent / "book_detail"
+
+
+STUB_SEARCH_HTML = """
+<html><body>
+  <div class="search-results-stats">1 hits</div>
+  <div class="resultsContainer"><ul class="list-books">
+    <li class="searchResultItem">
+      <img itemprop="image" src="//covers.openlibrary.org/b/id/1-M.jpg">
+      <h3 class="booktitle"><a class="results" href="/works/OL1W">Atomic Habits</a></h3>
+      <span class="bookauthor"><a href="/authors/OL1A">James Clear</a></span>
+    </li>
+  </ul></div>
+</body></html>
+"""
+
+
+class StubOpenLibrary:
+    """
+    Local stand-in for openlibrary.org that counts upstream fetches.
+    `body` is the page to serve, or a function of the request path.
+    `respond`, when given, replaces it: a function of the request path and
+    headers that returns (status, page, response headers). Pages may be
+    bytes, served with the Content-Type of the response headers.
+    With keep_alive, connections stay open between requests (HTTP/1.1).
+    """
+
+    def __init__(self, body=STUB_SEARCH_HTML, delay: float = 0.2, respond=None, keep_alive: bool = False):
+        self.hits = 0
+        self.paths = []
+        self.request_headers = []
+        self.in_flight = self.peak_in_flight = 0
+        stub = self
+        guard = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" if keep_alive else "HTTP/1.0"
+
+            def do_GET(self):
+                with guard:
+                    stub.hits += 1
+                    stub.paths.append(self.path)
+                    stub.request_headers.append(dict(self.headers))
+                    stub.in_flight += 1
+                    stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+                time.sleep(delay)  # keep the fetch in flight while others arrive
+                with guard:
+                    stub.in_flight -= 1
+                if respond:
+                    status, page, headers = respond(self.path, self.headers)
+                else:
+                    status, page, headers = 200, body(self.path) if callable(body) else body, {}
+                payload = page if isinstance(page, bytes) else page.encode("utf-8")
+                self.send_response(status)
+                if "Content-Type" not in headers:
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def use_temp_book_index(test: unittest.TestCase, tmp: Path) -> BookIndex:
+    """Cache writes of the test are indexed into a temporary book index."""
+    index = BookIndex(tmp / "book_index.db")
+    patcher = mock.patch.object(book_index, "_index", index)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return index
+
+
+class HTTPClientTests(unittest.TestCase):
+    """The pooled client reuses kept-alive connections and never loses counts."""
+
+    def test_connections_are_reused(self):
+        client = OpenLibraryHTTPClient()
+        with StubOpenLibrary(delay=0, keep_alive=True) as upstream:
+            for _ in range(5):
+                self.assertEqual(client.get(upstream.base_url + "/search").status_code, 200)
+
+        self.assertEqual(client.stats(), {"requests": 5, "new_connections": 1, "reused_connections": 4})
+
+    def test_counters_survive_evicted_host_pools(self):
+        client = OpenLibraryHTTPClient()
+        stubs = [StubOpenLibrary(delay=0, keep_alive=True) for _ in range(client.POOL_CONNECTIONS + 2)]
+        for stub in stubs:
+            with stub:
+                client.get(stub.base_url + "/search")
+                client.get(stub.base_url + "/search")
+
+        stats = client.stats()
+        self.assertEqual((stats["requests"], stats["new_connections"]), (2 * len(stubs), len(stubs)))
+
+    def test_async_client_is_closed_with_its_loop(self):
+        # Under WSGI every async view runs in an event loop of its own
+        async def fetch(url):
+            client = get_async_http_client()
+            self.assertEqual((await client.get(url)).status_code, 200)
+            return client
+
+        before = async_http_stats()
+        with StubOpenLibrary(delay=0, keep_alive=True) as upstream:
+            clients = [async_to_sync(fetch)(upstream.base_url + "/search") for _ in range(3)]
+
+        self.assertTrue(all(client.client.is_closed for client in clients))
+        after = async_http_stats()
+        self.assertEqual(after["closed_clients"] - before["closed_clients"], 3)
+        self.assertEqual(after["requests"] - before["requests"], 3)
+
+
+class StubSearchTestCase(unittest.TestCase):
+    """Searches against a temporary cache and a StubOpenLibrary."""
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.store = SearchCacheStore(tmp / "search_cache.db")
+        self.lock_dir = tmp / "locks"
+        patcher = mock.patch.object(search_cache, "_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = use_temp_book_index(self, tmp)
+
+    def _strategy_class(self, base_url: str):
+        class StubBookStrategy(search_page.SearchByBookStrategy):
+            SEARCH_URL_TEMPLATE = base_url + "/search?q={query}{sort_suffix}&page={page}"
+
+            def _fetch_sidebar_info(self):
+                return {}
+
+        return StubBookStrategy
+
+
+class SearchCacheStoreTests(StubSearchTestCase):
+    """Pages are stored one row each; legacy JSON caches migrate to the keys the strategies read."""
+
+    BOOKS = [{"title": "Atomic Habits"}]
+
+    def test_pages_and_meta_round_trip(self):
+        scope = self.store.scope("books", "Atomic  Habits", "most editions")
+        scope.put_page(2, self.BOOKS)
+        scope.update_meta(last_page=4, hits=70)
+        scope.update_meta(sidebar_info={"subjects": []})
+
+        same = self.store.scope("books", "atomic habits", "most editions")
+        self.assertEqual(same.get_page(2), self.BOOKS)
+        self.assertIsNone(same.get_page(1))
+        self.assertEqual(same.cached_pages(), [2])
+        self.assertEqual(same.get_meta(), {"last_page": 4, "hits": 70, "sidebar_info": {"subjects": []}})
+        self.assertIsNone(self.store.scope("books", "atomic habits", "relevance").get_page(2))
+
+    def test_legacy_files_with_a_multi_word_sort_migrate_to_the_strategy_keys(self):
+        legacy_dir = Path(tempfile.mkdtemp())
+        legacy = {"pages": {"page_1": self.BOOKS, "page_2": []}, "last_page": 2, "hits": 21}
+        files = {
+            "search_by_books/atomic_habits__most editions.json": legacy,
+            "search_by_advance_search/title=atomic_habits_author=james_clear_isbn=_subject=_publisher="
+            "_most_editions.json": legacy,
+        }
+        for name, data in files.items():
+            (legacy_dir / name).parent.mkdir(parents=True, exist_ok=True)
+            (legacy_dir / name).write_text(json.dumps(data), encoding="utf-8")
+
+        with mock.patch.object(search_cache, "SEARCH_CACHE_DIR", legacy_dir):
+            counts = search_cache.migrate_json_caches(self.store)
+
+        self.assertEqual(counts["books"], {"files": 1, "pages": 2})
+        self.assertEqual(counts["advance"], {"files": 1, "pages": 2})
+        for strategy in (
+            search_page.SearchByBookStrategy("Atomic Habits", sort_by="Most Editions"),
+            search_page.SearchByAdvanceSearchtrategy(title="Atomic Habits", author="James Clear", sort_by="most editions"),
+        ):
+            with self.subTest(strategy=type(strategy).__name__):
+                self.assertEqual(strategy.cache.get_page(1), self.BOOKS)
+                self.assertEqual(strategy.cache.get_meta(), {"last_page": 2, "hits": 21})
+
+
+class SearchCoalescingTests(StubSearchTestCase):
+    """Concurrent identical searches must reach the upstream exactly once."""
+
+    def _fire(self, n: int, search) -> list:
+        barrier = threading.Barrier(n)
+        results, errors = [], []
+
+        def worker(i):
+            barrier.wait()
+            try:
+                results.append(search(i))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_50_parallel_identical_searches_fetch_upstream_once(self):
+        coalescer = RequestCoalescer(self.lock_dir)
+        with StubOpenLibrary() as upstream, mock.patch.object(
+            search_page, "search_coalescer", coalescer
+        ):
+            strategy_class = self._strategy_class(upstream.base_url)
+            results = self._fire(
+                50, lambda _: strategy_class("atomic habits").search(page=1)
+            )
+
+        self.assertEqual(upstream.hits, 1)
+        self.assertEqual(len(results), 50)
+        for result in results:
+            self.assertEqual(result["pages"]["page_1"][0]["title"], "Atomic Habits")
+
+    def test_50_concurrent_async_searches_fetch_upstream_once(self):
+        coalescer = RequestCoalescer(self.lock_dir)
+
+        async def fire(strategy_class):
+            searches = [strategy_class("atomic habits").asearch(page=1) for _ in range(50)]
+            return await asyncio.gather(*searches)
+
+        with StubOpenLibrary() as upstream, mock.patch.object(
+            search_page, "search_coalescer", coalescer
+        ):
+            results = asyncio.run(fire(self._strategy_class(upstream.base_url)))
+
+        self.assertEqual(upstream.hits, 1)
+        self.assertEqual(coalescer.stats()["leaders"], 1)
+        for result in results:
+            self.assertEqual(result["pages"]["page_1"][0]["title"], "Atomic Habits")
+
+    def test_identical_searches_from_two_workers_fetch_upstream_once(self):
+        # Two coalescers sharing the lock directory and cache stand in for two gunicorn workers
+        workers = [RequestCoalescer(self.lock_dir), RequestCoalescer(self.lock_dir)]
+        assigned = threading.local()
+
+        def run(key, fetch):
+            return workers[assigned.worker].run(key, fetch)
+
+        def search(i):
+            assigned.worker = i % 2
+            return strategy_class("atomic habits").search(page=1)
+
+        with StubOpenLibrary() as upstream, mock.patch.object(
+            search_page, "search_coalescer", mock.Mock(run=run)
+        ):
+            strategy_class = self._strategy_class(upstream.base_url)
+            results = self._fire(20, search)
+
+        self.assertEqual(upstream.hits, 1)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(sum(w.stats()["leaders"] for w in workers), 2)
+
+
+def paged_search_html(path: str, last_page: int = 8) -> str:
+    """A result page titled after its page number, with pagination up to last_page."""
+    page = int(parse_qs(urlparse(path).query).get("page", ["1"])[0])
+    return STUB_SEARCH_HTML.replace("Atomic Habits", f"Result page {page}").replace(
+        "</ul></div>",
+        f'</ul></div><div class="pagination"><a href="?page={last_page}">{last_page}</a></div>',
+    )
+
+
+class PagePrefetcherTests(StubSearchTestCase):
+    """The next pages are warmed within the per-query and global caps and their reads counted."""
+
+    def setUp(self):
+        super().setUp()
+        self.prefetcher = PagePrefetcher()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        for target, name, value in (
+            (search_page, "search_coalescer", RequestCoalescer(self.lock_dir)),
+            (search_page, "page_prefetcher", self.prefetcher),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _wait_idle(self):
+        deadline = time.time() + 5
+        while self.prefetcher.stats()["in_flight"] and time.time() < deadline:
+            time.sleep(0.02)
+
+    def test_per_query_and_global_caps(self):
+        self.prefetcher.MAX_PENDING = 7
+        blocked = lambda page: self.release.wait(5)
+
+        self.assertEqual(self.prefetcher.schedule("a", range(2, 20), blocked), 5)
+        self.assertEqual(self.prefetcher.schedule("a", range(2, 20), blocked), 0)  # already queued
+        self.assertEqual(self.prefetcher.schedule("b", range(2, 20), blocked), 2)
+        self.assertEqual(self.prefetcher.stats()["dropped"], 3)
+
+        self.release.set()
+        self._wait_idle()
+        self.assertEqual(self.prefetcher.stats()["completed"], 7)
+
+    def test_oldest_unread_page_is_forgotten_first(self):
+        self.prefetcher.MAX_TRACKED = 3
+        for page in range(2, 6):
+            self.prefetcher.schedule("a", [page], lambda page: None)
+            self._wait_idle()
+
+        for page in range(2, 6):
+            self.prefetcher.record_read("a", page)
+        self.assertEqual(self.prefetcher.stats()["read"], 3)  # page 2 was evicted
+
+    def test_reading_page_2_after_page_1_counts_a_prefetch_hit(self):
+        with StubOpenLibrary(body=paged_search_html, delay=0) as upstream:
+            strategy_class = self._strategy_class(upstream.base_url)
+            strategy_class("atomic habits").search(page=1)
+            self._wait_idle()
+            page_2 = strategy_class("atomic habits").search(page=2)
+
+        self.assertEqual(page_2["pages"]["page_2"][0]["title"], "Result page 2")
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats["completed"], stats["read"]), (5, 1))
+        self.assertEqual(upstream.hits, 6)  # page 1 and the 5 prefetched, nothing for the read
+
+
+class SearchPageRangeTests(StubSearchTestCase):
+    """pages=N-M fetches only missing pages, concurrently and bounded."""
+
+    def setUp(self):
+        super().setUp()
+        for target, patch in (
+            (search_page, {"search_coalescer": RequestCoalescer(self.lock_dir)}),
+            (search_page.page_prefetcher, {"schedule": lambda *args: None}),
+        ):
+            patcher = mock.patch.multiple(target, **patch)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_range_on_fresh_search(self):
+        with StubOpenLibrary(body=paged_search_html, delay=0.1) as upstream:
+            strategy = self._strategy_class(upstream.base_url)("atomic habits")
+            data = asyncio.run(strategy.asearch_pages(3, 8))
+
+        self.assertEqual(list(data["pages"]), [f"page_{n}" for n in range(3, 9)])
+        self.assertEqual(data["pages"]["page_5"][0]["title"], "Result page 5")
+        self.assertEqual(data["last_page"], 8)
+        # page 1 (meta) once, then pages 3-8 once each, never more than the bound at a time
+        self.assertEqual(sorted(upstream.paths), sorted(
+            f"/search?q=atomic+habits&page={n}" for n in (1, 3, 4, 5, 6, 7, 8)
+        ))
+        self.assertLessEqual(upstream.peak_in_flight, search_page.SearchStrategy.RANGE_CONCURRENCY)
+
+    def test_range_reuses_cached_pages_and_clamps_to_last_page(self):
+        with StubOpenLibrary(body=paged_search_html, delay=0) as upstream:
+            strategy = self._strategy_class(upstream.base_url)("atomic habits")
+            asyncio.run(strategy.asearch_pages(1, 2))
+            upstream.paths.clear()
+            data = asyncio.run(strategy.asearch_pages(2, 20))
+
+        self.assertEqual(list(data["pages"]), [f"page_{n}" for n in range(2, 9)])
+        self.assertNotIn("/search?q=atomic+habits&page=2", upstream.paths)
+        self.assertEqual(len(upstream.paths), 6)
+
+    def test_range_request_counts_one_lookup(self):
+        stats = QueryKeyStats()
+        with StubOpenLibrary(body=paged_search_html, delay=0) as upstream, mock.patch.object(
+            search_cache, "query_key_stats", stats
+        ):
+            context = search_page.SearchContext(self._strategy_class(upstream.base_url)("atomic habits"))
+            asyncio.run(context.asearch_pages(1, 5))
+
+        self.assertEqual(stats.stats()["books"]["lookups"], 1)
+
+
+def subject_pages(path: str) -> str:
+    """Subject search result pages (3 of them), or a subject works JSON page."""
+    query = parse_qs(urlparse(path).query)
+    if path.startswith("/subjects/"):
+        offset = int(query["offset"][0])
+        works = [
+            {"key": f"/works/OL{n}W", "title": f"Work {n}", "cover_id": n,
+             "authors": [{"name": "Author"}], "first_publish_year": 1900 + n, "edition_count": 2}
+            for n in range(offset, min(offset + int(query["limit"][0]), 45))
+        ]
+        return json.dumps({"name": "Fiction", "work_count": 45, "works": works})
+    page = query["page"][0]
+    return f"""
+    <p class="search-results-stats">300 hits</p>
+    <ul class="subjectList"><li><a href="/subjects/fiction_{page}">Fiction {page}</a>
+      <span class="count"><b>10</b> books</span></li></ul>
+    <div class="pagination"><a href="?page=2">2</a><a href="?page=3">3</a></div>
+    """
+
+
+class SubjectSearchTests(StubSearchTestCase):
+    """Subject results and subject works are paged and cached per page."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search_page, "search_coalescer", RequestCoalescer(self.lock_dir))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_subject_search_pages(self):
+        with StubOpenLibrary(body=subject_pages, delay=0) as upstream, mock.patch.object(
+            search_page.SearchBySubjectStrategy,
+            "SUBJECT_SEARCH_URL",
+            upstream.base_url + "/search/subjects?q={query}&page={page}",
+        ):
+            strategy = search_page.SearchBySubjectStrategy("fiction")
+            page_2 = search_page.SearchContext(strategy).search(page=2)
+            self.assertEqual(strategy.search(page=2), page_2)
+
+        self.assertEqual(upstream.paths, ["/search/subjects?q=fiction&page=2"])
+        self.assertEqual((page_2["page"], page_2["last_page"]), (2, 3))
+        self.assertEqual(page_2["subjects"][0]["subject"], "Fiction 2")
+        self.assertEqual(self.store.get_page("subject", "fiction", "", 1), None)
+
+    def test_subject_works_load_lazily(self):
+        with StubOpenLibrary(body=subject_pages, delay=0) as upstream, mock.patch.object(
+            search_page.SubjectWorksStrategy,
+            "SUBJECT_WORKS_URL",
+            upstream.base_url + "/subjects/{slug}.json?limit={limit}&offset={offset}",
+        ):
+            strategy = search_page.SubjectWorksStrategy("https://openlibrary.org/subjects/fiction")
+            last = strategy.search(page=3)
+
+        self.assertEqual(upstream.paths, ["/subjects/fiction.json?limit=20&offset=40"])
+        self.assertEqual((last["page"], last["last_page"], len(last["works"])), (3, 3, 5))
+        self.assertEqual(last["works"][0], {
+            "imgSrc": "https://covers.openlibrary.org/b/id/40-M.jpg",
+            "title": "Work 40",
+            "url": "https://openlibrary.org/works/OL40W",
+            "author": "Author",
+            "first_published": "1940",
+            "num_editions": "2 editions",
+        })
+
+
+class AuthorBibliographyTests(StubSearchTestCase):
+    """The bibliography loader fetches each author page once, concurrently."""
+
+    TOTAL_PAGES = 7
+
+    def author_pages(self, path: str) -> str:
+        if path.startswith("/search/authors"):
+            return f"""<ul class="authorList"><li class="searchResultItem">
+              <a class="larger" href="{self.base_url}/authors/OL1A">James Patterson</a>
+            </li></ul>"""
+        page = parse_qs(urlparse(path).query)["page"][0]
+        return f"""<ul><li class="searchResultItem sri--w-main">
+          <h3 class="booktitle"><a class="results" href="/works/OL{page}W">Book {page}</a></h3>
+        </li></ul>
+        <div class="pagination"><a href="?page=2">2</a><a>{self.TOTAL_PAGES}</a><a>Next</a></div>"""
+
+    def test_bibliography_fetches_every_page_once(self):
+        coalescer = RequestCoalescer(self.lock_dir)
+        with StubOpenLibrary(body=self.author_pages, delay=0.05) as upstream, mock.patch.object(
+            search_page.SearchByAuthorStrategy,
+            "AUTHOR_SEARCH_URL",
+            upstream.base_url + "/search/authors?q={query}&page={page}",
+        ), mock.patch.object(search_page, "search_coalescer", coalescer):
+            self.base_url = upstream.base_url
+            pages = list(search_page.SearchByAuthorStrategy("james patterson").iter_bibliography())
+            upstream.paths.clear()
+            again = list(search_page.SearchByAuthorStrategy("james patterson").iter_bibliography())
+
+        self.assertEqual(sorted(p["page"] for p in pages), list(range(1, self.TOTAL_PAGES + 1)))
+        self.assertEqual(pages[0]["page"], 1)
+        for page in pages:
+            self.assertEqual(page["books"][0]["title"], f"Book {page['page']}")
+            self.assertEqual(page["total_pages"], self.TOTAL_PAGES)
+        self.assertEqual(upstream.hits, 1 + self.TOTAL_PAGES)  # author search + each page once
+        self.assertLessEqual(upstream.peak_in_flight, search_page.SearchByAuthorStrategy.BIBLIOGRAPHY_WORKERS)
+        self.assertEqual(upstream.paths, [])
+        self.assertEqual(sorted(p["page"] for p in again), sorted(p["page"] for p in pages))
+
+    def test_endpoint_streams_pages_as_they_arrive(self):
+        release = threading.Event()
+        served = []
+
+        def pages(path: str) -> str:
+            if not path.startswith("/search/authors"):
+                page = parse_qs(urlparse(path).query)["page"][0]
+                if page != "1":
+                    release.wait(5)  # hold the other pages until the first line is read
+                served.append(page)
+            return self.author_pages(path)
+
+        async def first_line_then_rest():
+            response = await AsyncClient().get("/api/search/author/bibliography", {"q": "james patterson"})
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            served_at_first_line = list(served)
+            release.set()
+            return first, served_at_first_line, [first] + [chunk async for chunk in chunks]
+
+        coalescer = RequestCoalescer(self.lock_dir)
+        with StubOpenLibrary(body=pages, delay=0) as upstream, mock.patch.object(
+            search_page.SearchByAuthorStrategy,
+            "AUTHOR_SEARCH_URL",
+            upstream.base_url + "/search/authors?q={query}&page={page}",
+        ), mock.patch.object(search_page, "search_coalescer", coalescer):
+            self.base_url = upstream.base_url
+            first, served_at_first_line, lines = async_to_sync(first_line_then_rest)()
+
+        self.assertEqual(json.loads(first)["page"], 1)
+        self.assertEqual(served_at_first_line, ["1"])  # no later page was fetched yet
+        self.assertEqual(len(lines), self.TOTAL_PAGES)
+
+
+class FakeBrowserPool:
+    """browser_pool stand-in whose driver renders `page_source` for any URL."""
+
+    def __init__(self, page_source: str):
+        self.page_source = page_source
+        self.urls = []
+
+    @contextmanager
+    def browser(self):
+        pool = self
+
+        class Driver:
+            page_source = pool.page_source
+
+            def get(self, url):
+                pool.urls.append(url)
+
+            def find_element(self, *args):
+                return object()
+
+        yield Driver()
+
+
+class FacetTests(unittest.TestCase):
+    """Sidebar facets come from the SearchFacets partial; the browser is a fallback."""
+
+    FIXTURE = (FIXTURES_DIR / "facets_atomic_habits.html").read_text(encoding="utf-8")
+    SEARCH_PATH = "/search?q=atomic+habits&mode=everything"
+
+    def setUp(self):
+        self.browsers = FakeBrowserPool(f"<html><body><div id='sidebar'>{self.FIXTURE}</div></body></html>")
+        patcher = mock.patch.object(facets, "browser_pool", self.browsers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _serve_partial(self, status=200, sidebar=None):
+        def respond(path, headers):
+            if path.startswith("/partials.json"):
+                return status, json.dumps({"sidebar": self.FIXTURE if sidebar is None else sidebar}), {}
+            return 404, "", {}
+
+        return StubOpenLibrary(delay=0, respond=respond)
+
+    def test_partial_gives_sidebar_info(self):
+        with self._serve_partial() as upstream:
+            sidebar_info = facets.fetch_sidebar_info(upstream.base_url + self.SEARCH_PATH)
+
+        query = parse_qs(urlparse(upstream.paths[0]).query)
+        self.assertEqual(query["_component"], ["SearchFacets"])
+        self.assertEqual(json.loads(query["data"][0])["param"], {"q": "atomic habits", "mode": "everything"})
+        self.assertEqual(self.browsers.urls, [])
+
+        self.assertEqual(
+            {name: len(entries) for name, entries in sidebar_info.items()},
+            {"Author": 4, "Subjects": 5, "Language": 4, "First published": 5, "Publisher": 3},
+        )
+        self.assertEqual(
+            sidebar_info["Author"][0],
+            {
+                "label": "James Clear",
+                "count": 125,
+                "url": "https://openlibrary.org/search?q=atomic+habits&mode=everything&author_key=OL7422948A",
+            },
+        )
+        for entries in sidebar_info.values():
+            for entry in entries:
+                self.assertEqual(set(entry), {"label", "count", "url"})
+                self.assertIsInstance(entry["count"], int)
+                self.assertTrue(entry["url"].startswith("https://openlibrary.org/"))
+
+    def test_browser_fallback_reads_the_same_facets(self):
+        with self._serve_partial() as upstream:
+            expected = facets.fetch_sidebar_info(upstream.base_url + self.SEARCH_PATH)
+        for status, sidebar in ((404, None), (200, "")):
+            with self.subTest(status=status, sidebar=sidebar), self._serve_partial(status, sidebar) as upstream:
+                url = upstream.base_url + self.SEARCH_PATH
+                before = facets.facet_stats()["selenium_fallback"]
+                self.assertEqual(facets.fetch_sidebar_info(url), expected)
+                self.assertEqual(self.browsers.urls[-1], url)
+                self.assertEqual(facets.facet_stats()["selenium_fallback"], before + 1)
+
+
+class FakeChrome:
+    """Stand-in for a uc.Chrome session; `alive = False` makes it fail health checks."""
+
+    current_window_handle = "main"
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.window_handles = ["main"]
+        self.switch_to = mock.Mock()
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise WebDriverException("session gone")
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+class BrowserPoolTests(unittest.TestCase):
+    """Pool bookkeeping with a fake driver factory instead of Chrome."""
+
+    def _pool(self, **limits) -> BrowserPool:
+        class FakeChromePool(BrowserPool):
+            WARM_SIZE = 0
+            MAX_BROWSERS = 2
+            MAX_USES = 50
+            MAX_AGE = 3600
+            CHECKOUT_TIMEOUT = 5
+
+            def _launch(self):
+                with self._cond:
+                    self._metrics["launches"] += 1
+                return PooledBrowser(FakeChrome())
+
+        for name, value in limits.items():
+            setattr(FakeChromePool, name, value)
+        return FakeChromePool()
+
+    def _queue(self, pool: BrowserPool, names, order: list) -> list:
+        """Start one checkout thread per name, each queued behind the previous one."""
+        threads = []
+        for position, name in enumerate(names, start=1):
+            def use(name=name):
+                browser = pool.checkout()
+                order.append(name)
+                time.sleep(0.05)
+                pool.checkin(browser)
+
+            thread = threading.Thread(target=use)
+            thread.start()
+            threads.append(thread)
+            while pool.stats()["queued"] < position:
+                time.sleep(0.005)
+        return threads
+
+    def test_cap_blocks_extra_checkouts(self):
+        pool = self._pool(MAX_BROWSERS=2)
+        first = pool.checkout()
+        pool.checkout()
+        with self.assertRaises(BrowserPoolTimeout):
+            pool.checkout(timeout=0.1)
+
+        pool.checkin(first)
+        self.assertIs(pool.checkout(timeout=0.1), first)
+        stats = pool.stats()
+        self.assertEqual((stats["running"], stats["launches"], stats["timeouts"]), (2, 2, 1))
+
+    def test_waiters_are_served_in_order(self):
+        pool = self._pool(MAX_BROWSERS=1)
+        held = pool.checkout()
+        order = []
+        threads = self._queue(pool, range(4), order)
+        pool.checkin(held)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, [0, 1, 2, 3])
+        self.assertEqual(pool.stats()["launches"], 1)
+
+    def test_caller_keeps_its_place_when_its_browser_is_discarded(self):
+        pool = self._pool(MAX_BROWSERS=1)
+        held = pool.checkout()
+        order = []
+        threads = self._queue(pool, ["first", "second"], order)
+        held.driver.alive = False  # dies while idle: fails the checkout check
+        pool.checkin(held)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ["first", "second"])
+        self.assertTrue(held.driver.quit_called)
+        self.assertEqual((pool.stats()["unhealthy"], pool.stats()["launches"]), (1, 2))
+
+    def test_browsers_are_recycled_after_max_uses(self):
+        pool = self._pool(MAX_USES=2)
+        drivers = []
+        for _ in range(5):
+            with pool.browser() as driver:
+                drivers.append(driver)
+
+        self.assertIs(drivers[0], drivers[1])
+        self.assertIs(drivers[2], drivers[3])
+        self.assertEqual(len({id(driver) for driver in drivers}), 3)
+        self.assertTrue(drivers[0].quit_called and drivers[2].quit_called)
+        stats = pool.stats()
+        self.assertEqual((stats["recycled"], stats["launches"], stats["running"]), (2, 3, 1))
+
+
+class SearchParserParityTests(unittest.TestCase):
+    """Every parser backend must extract identical records from saved pages."""
+
+    CASES = [
+        (FIXTURES_DIR / "search_results_atomic_habits.html", "parse_search_page"),
+        (FIXTURES_DIR / "author_books_james_clear.html", "parse_author_books"),
+        (FIXTURES_DIR / "search_inside_atomic_habits.html", "parse_inside_results"),
+        # A page of another kind must give the same (empty) result everywhere
+        (BOOK_DETAIL_FIXTURES_DIR / "atomic_habits.html", "parse_search_page"),
+        (BOOK_DETAIL_FIXTURES_DIR / "atomic_habits.html", "parse_author_books"),
+        (BOOK_DETAIL_FIXTURES_DIR / "atomic_habits.html", "parse_inside_results"),
+    ]
+
+    def test_backends_match_reference(self):
+        reference = get_search_parser("bs4")
+        for fixture, method in self.CASES:
+            html = fixture.read_text(encoding="utf-8")
+            expected = getattr(reference, method)(html)
+            for name in PARSERS:
+                with self.subTest(fixture=fixture.name, method=method, backend=name):
+                    self.assertEqual(getattr(get_search_parser(name), method)(html), expected)
+
+    def test_search_page_fields(self):
+        html = (FIXTURES_DIR / "search_results_atomic_habits.html").read_text(encoding="utf-8")
+        parsed = get_search_parser("lxml").parse_search_page(html)
+
+        self.assertEqual(parsed["last_page"], 62)
+        self.assertEqual(parsed["hits"], 1234)
+        self.assertEqual(len(parsed["books"]), 20)
+        first = parsed["books"][0]
+        self.assertEqual(first["imgSrc"], "https://covers.openlibrary.org/b/id/14853108-M.jpg")
+        self.assertEqual(first["author"], "James Clear")
+        self.assertEqual((first["rating"], first["num_ratings"]), ("4.0", "1,038"))
+        self.assertEqual((first["first_published"], first["num_editions"]), ("2016", "41 editions"))
+
+    def test_empty_and_unknown_input(self):
+        for name in PARSERS:
+            with self.subTest(backend=name):
+                parser = get_search_parser(name)
+                self.assertEqual(parser.parse_author_books("<html></html>"), [])
+                self.assertEqual(parser.parse_search_page("<html></html>")["books"], [])
+        self.assertEqual(get_search_parser("lxml").parse_search_page(""), {"books": [], "last_page": 1, "hits": 0})
+        with self.assertRaises(ValueError):
+            get_search_parser("html5lib")
+
+
+class BookDetailExtractionTests(unittest.TestCase):
+    """The extraction spec must reproduce the details saved from edition pages."""
+
+    # (saved edition page, details extracted from it by the select()-per-field parser)
+    CASES = [
+        (BOOK_DETAIL_FIXTURES_DIR / "atomic_habits.html", BOOK_DETAIL_FIXTURES_DIR / "atomic_habits.expected.json"),
+        (
+            BOOK_DETAIL_FIXTURES_DIR / "the_hobbit_sparse.html",
+            BOOK_DETAIL_FIXTURES_DIR / "the_hobbit_sparse.expected.json",
+        ),
+    ]
+
+    def _extract(self, html: str) -> dict:
+        page = BookDetailPage("https://openlibrary.org/books/OL1M/x")
+        page.root = parse_html(html)
+        page._extract_book_details()
+        return page.book_details
+
+    def test_matches_saved_details(self):
+        for page, expected in self.CASES:
+            with self.subTest(page=page.name):
+                details = self._extract(page.read_text(encoding="utf-8"))
+                # The old parser returned authors in set order
+                details["authors"] = sorted(details["authors"])
+                self.assertEqual(details, json.loads(expected.read_text(encoding="utf-8")))
+
+    def test_dd_pairs_with_its_dt(self):
+        # zip(dt, dd) would shift every value after the dt without a dd
+        details = self._extract(
+            "<dl><dt>Format</dt><dt>Published in</dt><dd>London</dd><dt>ISBN 10</dt><dd>0345339681</dd></dl>"
+        )
+        self.assertEqual(details["published_in"], "London")
+        self.assertEqual(details["edition_identifiers"], {"isbn_10": "0345339681"})
+        self.assertEqual(self._extract("")["editions"], [])
+
+    def test_spec_semantics(self):
+        spec = ExtractionSpec({
+            "first": Field("div.a p, p.b"),
+            "deep": Field("section div.a span", many=True),
+            "rows": Field("li", many=True, fields={"link": Field("a", attr="href")}),
+        })
+        result = spec.extract(parse_html(
+            "<p class='b'>one</p><section><div class='a x'><p>two</p><i><span>s1</span></i></div></section>"
+            "<div class='a'><span>outside</span></div><ul><li><a href='/1'>1</a><a href='/2'></a></li><li></li></ul>"
+        ))
+        self.assertEqual(result["first"], "one")
+        self.assertEqual(result["deep"], ["s1"])
+        self.assertEqual(result["rows"], [{"link": "/1"}, {"link": None}])
+        with self.assertRaises(ValueError):
+            Field("div > p")
+
+
+class BookIndexTests(StubSearchTestCase):
+    """Cached pages are indexed as they are written; mode=local answers from them."""
+
+    def _cache_books(self):
+        self.store.scope("books", "habits").put_page(1, [
+            {"title": "Atomic Habits", "url": "https://openlibrary.org/works/OL1W/Atomic_Habits",
+             "author": "James Clear", "rating": "4.2", "num_ratings": "1,024"},
+            {"title": "Habits of the Heart", "url": "https://openlibrary.org/works/OL2W",
+             "author": "Robert Bellah", "rating": "3.1", "num_ratings": "12"},
+        ])
+        self.store.scope("author", "atomic team").put_page(1, {"authors": [{
+            "author_name": "Atomic Team",
+            "books": [{"title": "Small Wins", "book_url": "https://openlibrary.org/works/OL3W"}],
+        }]})
+
+    def test_cache_writes_are_indexed_and_ranked(self):
+        self._cache_books()
+
+        found = self.index.search("atomic")
+        self.assertEqual([book["title"] for book in found["books"]], ["Atomic Habits", "Small Wins"])
+        self.assertEqual(found["books"][1]["author"], "Atomic Team")
+        # Last token is a prefix; the better-rated of two equal matches first
+        self.assertEqual(self.index.search("habit")["books"][0]["title"], "Atomic Habits")
+        self.assertEqual(self.index.search("clear habits")["hits"], 1)
+        # The same work from another page is merged, not duplicated
+        self.store.scope("books", "atomic habits").put_page(1, [
+            {"title": "Atomic Habits", "url": "https://openlibrary.org/works/OL1W?edition=x", "author": ""},
+        ])
+        self.assertEqual(self.index.count(), 3)
+        self.assertEqual(self.index.search("james")["books"][0]["title"], "Atomic Habits")
+
+    def test_queries_are_never_fts_syntax(self):
+        self._cache_books()
+        for query in ('"', "atomic AND", "NEAR(", "*", "habits -heart", ""):
+            with self.subTest(query=query):
+                self.index.search(query)
+        self.assertEqual(fts_query('Atomic "Habits'), '"atomic" "habits"*')
+
+    def test_local_mode_falls_back_to_openlibrary_below_threshold(self):
+        coalescer = RequestCoalescer(self.lock_dir)
+        with StubOpenLibrary(delay=0) as upstream, mock.patch.object(
+            search_page, "search_coalescer", coalescer
+        ):
+            class StubLocalStrategy(search_page.SearchByLocalIndexStrategy):
+                MIN_LOCAL_RESULTS = 1
+                FALLBACK_STRATEGY = self._strategy_class(upstream.base_url)
+
+            first = StubLocalStrategy("Atomic Habits").search(page=1)
+            second = asyncio.run(StubLocalStrategy("atomic hab").asearch(page=1))
+
+        self.assertEqual(first["source"], "openlibrary")
+        self.assertEqual(second["source"], "local")
+        self.assertEqual(upstream.hits, 1)
+        self.assertEqual(second["pages"]["page_1"][0]["title"], "Atomic Habits")
+
+
+STUB_BOOK_HTML = """
+<html><head><link rel="canonical" href="https://openlibrary.org/books/OL1M/Atomic_Habits"></head>
+<body><h1 class="work-title">Atomic Habits</h1><a itemprop="author">James Clear</a>
+<a href="/works/OL17930368W/Atomic_Habits">An edition of Atomic Habits</a></body></html>
+"""
+
+STUB_CAROUSEL_HTML = """
+<div class="carousel-section"><div class="carousel-section-header"><h2>You might also like</h2></div>
+  <div class="carousel">
+    <div class="book"><a href="/works/OL2W/Deep_Work"><img class="bookcover" title="Deep Work"
+      src="/images/icons/avatar_book-sm.png" data-lazy="//covers.openlibrary.org/b/id/2-M.jpg"></a>
+      <a class="cta-btn" href="/borrow/ia/deepwork">Borrow</a></div>
+    <div class="book"><a href="/works/OL3W"><img title="Essentialism" src="//covers.openlibrary.org/b/id/3-M.jpg"></a></div>
+  </div></div>
+<div class="carousel-section"><h2>More by James Clear</h2>
+  <div class="book"><a href="/works/OL4W"><img title="Habits Journal" src="//covers.openlibrary.org/b/id/4-M.jpg"></a></div>
+</div>
+"""
+
+
+class BookDetailTestCase(unittest.TestCase):
+    """Book detail pages against a temporary cache and dynamic job registry."""
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        use_temp_book_index(self, tmp)
+        manager = CacheManager(
+            [FileCacheSource(name, 3600, tmp / name) for name in ("book_detail", "book_work")],
+            index_path=tmp / "index.db",
+        )
+        manager.start_janitor = lambda: None
+        self.cache_dir = tmp
+        self.jobs = DynamicContentJobs()
+        for name, value in (("cache_manager", manager), ("dynamic_jobs", self.jobs)):
+            patcher = mock.patch.object(book_details, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class BookDetailDynamicTests(BookDetailTestCase):
+    """Static fields are returned at once; the carousels arrive through the cache."""
+
+    def setUp(self):
+        super().setUp()
+        self.release = threading.Event()
+        self.scrapes = 0
+
+    def _fake_scrape(self, fail=False):
+        test = self
+
+        def scrape(book_url, work_id):
+            test.scrapes += 1
+            test.release.wait(5)
+            return None if fail else {"you_might_also_like": [{"title": "Deep Work"}], "more_by_author": []}
+
+        return mock.patch.object(book_details, "fetch_carousels", scrape)
+
+    def test_static_first_then_carousels(self):
+        with StubOpenLibrary(body=STUB_BOOK_HTML, delay=0) as upstream, self._fake_scrape():
+            url = upstream.base_url + "/books/OL1M/Atomic_Habits"
+            started = time.perf_counter()
+            first = BookDetailPage(url).get_static_details()
+            self.assertLess(time.perf_counter() - started, 2)
+            self.assertEqual((first["title"], first["dynamic_status"]), ("Atomic Habits", "pending"))
+            self.assertNotIn("you_might_also_like", first)
+
+            # Polls share the running scrape and read the static part from the cache
+            polls = [BookDetailPage(url).get_static_details() for _ in range(3)]
+            self.assertEqual({poll["dynamic_status"] for poll in polls}, {"pending"})
+
+            self.release.set()
+            done = BookDetailPage(url).wait_for_dynamic(5)
+            again = BookDetailPage(url).get_static_details()
+
+        self.assertEqual(done["dynamic_status"], "ready")
+        self.assertEqual(again["you_might_also_like"], [{"title": "Deep Work"}])
+        self.assertEqual((upstream.hits, self.scrapes), (1, 1))
+
+    def test_failed_scrape_is_reported_not_retried_per_poll(self):
+        self.release.set()
+        with StubOpenLibrary(body=STUB_BOOK_HTML, delay=0) as upstream, self._fake_scrape(fail=True):
+            url = upstream.base_url + "/books/OL1M/Atomic_Habits"
+            failed = BookDetailPage(url).get_details(timeout=5)
+            polled = BookDetailPage(url).get_static_details()
+
+        self.assertEqual(failed["dynamic_status"], "failed")
+        self.assertEqual((failed["you_might_also_like"], failed["more_by_author"]), ([], []))
+        self.assertEqual(polled["dynamic_status"], "failed")
+        self.assertEqual(self.scrapes, 1)
+        self.assertEqual(self.jobs.stats()["failed"], 1)
+
+
+    def test_evicted_carousels_of_a_finished_job_are_scraped_again(self):
+        self.release.set()
+        with StubOpenLibrary(body=STUB_BOOK_HTML, delay=0) as upstream, self._fake_scrape():
+            url = upstream.base_url + "/books/OL1M/Atomic_Habits"
+            self.assertEqual(BookDetailPage(url).get_details(timeout=5)["dynamic_status"], "ready")
+            # The janitor evicts the work record while the job is still remembered as "ready"
+            for path in (self.cache_dir / "book_work").glob("*.json"):
+                path.unlink()
+
+            evicted = BookDetailPage(url).get_static_details()
+            self.assertEqual(evicted["title"], "Atomic Habits")
+            self.assertIn(evicted["dynamic_status"], ("pending", "ready"))
+            done = BookDetailPage(url).wait_for_dynamic(5)
+
+        self.assertEqual(done["you_might_also_like"], [{"title": "Deep Work"}])
+        self.assertEqual(self.scrapes, 2)
+
+
+class CarouselTests(BookDetailTestCase):
+    """Carousels come from the RelatedWorkCarousel partial; the browser is a fallback."""
+
+    def _serve(self, partial_status=200):
+        def respond(path, headers):
+            if path.startswith("/partials.json"):
+                return partial_status, json.dumps({"0": STUB_CAROUSEL_HTML}), {}
+            return 200, STUB_BOOK_HTML, {}
+
+        return StubOpenLibrary(delay=0, respond=respond)
+
+    def test_carousels_over_http(self):
+        selenium = mock.patch.object(carousels, "fetch_carousels_selenium", side_effect=AssertionError("browser"))
+        with self._serve() as upstream, selenium:
+            details = BookDetailPage(upstream.base_url + "/books/OL1M/Atomic_Habits").get_details(timeout=5)
+
+        self.assertEqual(details["dynamic_status"], "ready")
+        self.assertEqual(details["work_id"], "OL17930368W")
+        self.assertIn("_component=RelatedWorkCarousel&workid=OL17930368W", upstream.paths[1])
+        self.assertEqual(details["you_might_also_like"][0], {
+            "image_src": "http://covers.openlibrary.org/b/id/2-M.jpg",
+            "title": "Deep Work",
+            "book_url": upstream.base_url + "/works/OL2W/Deep_Work",
+            "read_url": upstream.base_url + "/borrow/ia/deepwork",
+        })
+        self.assertEqual(details["you_might_also_like"][1]["read_url"], None)
+        self.assertEqual([book["title"] for book in details["more_by_author"]], ["Habits Journal"])
+
+    def test_selenium_fallback_when_partial_fails(self):
+        fallback = {"you_might_also_like": [{"title": "From Chrome"}], "more_by_author": []}
+        with self._serve(partial_status=404) as upstream, mock.patch.object(
+            carousels, "fetch_carousels_selenium", return_value=fallback
+        ) as selenium:
+            details = BookDetailPage(upstream.base_url + "/books/OL1M/Atomic_Habits").get_details(timeout=5)
+            with mock.patch.object(carousels, "SELENIUM_FALLBACK", False):
+                self.assertIsNone(carousels.fetch_carousels(upstream.base_url + "/books/OL1M", "OL17930368W"))
+
+        self.assertEqual(details["you_might_also_like"], [{"title": "From Chrome"}])
+        self.assertEqual(selenium.call_count, 1)
+
+
+class WorkEditionCacheTests(BookDetailTestCase):
+    """Editions of a cached work share its record; only their own fields are fetched."""
+
+    EDITION_JSON = {
+        "key": "/books/OL2M", "title": "Atomic Habits (Large Print)", "works": [{"key": "/works/OL17930368W"}],
+        "publishers": ["Thorndike"], "publish_date": "2019", "number_of_pages": 410,
+        "languages": [{"key": "/languages/eng"}], "covers": [9], "isbn_10": ["1432864781"],
+        "notes": {"type": "/type/text", "value": "Large print edition."},
+    }
+
+    def test_sibling_edition_costs_one_small_fetch(self):
+        def respond(path, headers):
+            if path.startswith("/partials.json"):
+                return 200, json.dumps({"0": STUB_CAROUSEL_HTML}), {}
+            if path == "/books/OL2M.json":
+                return 200, json.dumps(self.EDITION_JSON), {}
+            return 200, STUB_BOOK_HTML, {}
+
+        with StubOpenLibrary(delay=0, respond=respond) as upstream:
+            first = BookDetailPage(upstream.base_url + "/books/OL1M/Atomic_Habits").get_details(timeout=5)
+            fetched = list(upstream.paths)
+            sibling_url = upstream.base_url + "/books/OL2M/Atomic_Habits"
+            sibling = BookDetailPage(sibling_url, work_id="OL17930368W").get_static_details()
+            again = BookDetailPage(sibling_url).get_static_details()
+
+        self.assertEqual(upstream.paths[len(fetched):], ["/books/OL2M.json"])
+        self.assertEqual((sibling["title"], sibling["publisher"], sibling["pages"]), ("Atomic Habits (Large Print)", "Thorndike", "410"))
+        self.assertEqual((sibling["language"], sibling["edition_notes"]), ("English", "Large print edition."))
+        self.assertEqual(sibling["edition_identifiers"], {"isbn_10": "1432864781", "open_library": "OL2M"})
+        # Work-level fields, carousels included, come from the first edition's scrape
+        self.assertEqual(sibling["dynamic_status"], "ready")
+        self.assertEqual(sibling["you_might_also_like"], first["you_might_also_like"])
+        self.assertEqual((sibling["authors"], sibling["work_id"]), (["James Clear"], "OL17930368W"))
+        self.assertEqual(again, sibling)
+
+        edition_record = book_details.cache_manager.read_json("book_detail", "OL2M.json")
+        self.assertNotIn("you_might_also_like", edition_record)
+        self.assertEqual(
+            sorted(details["title"] for details in book_details.iter_cached_details()),
+            ["Atomic Habits", "Atomic Habits (Large Print)"],
+        )
+
+
+class EditionsPaginationTests(BookDetailTestCase):
+    """Detail responses carry a few editions; the rest are paged by cursor."""
+
+    ROWS = "".join(
+        f'<tr><td class="book"><div class="title"><a href="/books/OL{n}M">Edition {n}</a></div></td></tr>'
+        for n in range(1, 13)
+    )
+
+    def test_preview_and_cursor_pages(self):
+        html = STUB_BOOK_HTML.replace("</body>", f'<table id="editions">{self.ROWS}</table></body>')
+        with StubOpenLibrary(body=html, delay=0) as upstream, mock.patch.object(
+            book_details, "fetch_carousels", return_value=None
+        ):
+            page = BookDetailPage(upstream.base_url + "/books/OL1M/Atomic_Habits")
+            preview = with_editions_preview(page.get_static_details())
+            titles, cursor = [], preview["editions_next_cursor"]
+            while cursor:
+                result = BookDetailPage(page.url).get_editions(cursor=cursor, limit=4)
+                titles += [edition["title"] for edition in result["editions"]]
+                cursor = result["next_cursor"]
+
+        self.assertEqual((len(preview["editions"]), preview["editions_total"]), (5, 12))
+        self.assertEqual(titles, [f"Edition {n}" for n in range(6, 13)])
+        self.assertEqual(upstream.hits, 1)
+
+    def test_cursor_follows_the_same_edition(self):
+        editions = [{"url": f"/books/OL{n}M"} for n in range(1, 8)]
+        cursor = editions_page(editions, limit=3)["next_cursor"]
+        # An edition inserted before the cursor does not repeat one
+        shifted = [{"url": "/books/OL99M"}] + editions
+        self.assertEqual(editions_page(shifted, cursor, limit=2)["editions"], editions[3:5])
+        with self.assertRaises(ValueError):
+            editions_page(editions, "not-a-cursor")
+        with self.assertRaises(ValueError):
+            editions_page(editions, limit=0)
+
+
+def homepage_html(prefix: str) -> str:
+    """Homepage with a leading section and the three carousels of `prefix` books."""
+    sections = ['<div class="carousel-section"><h2>Welcome</h2></div>']
+    for name in ("Trending", "Classic", "Loved"):
+        sections.append(
+            '<div class="carousel-section">'
+            f'<img class="bookcover" src="//covers.openlibrary.org/b/id/1-M.jpg" title="{prefix} {name}">'
+            "</div>"
+        )
+    return "<html><body>" + "".join(sections) + "</body></html>"
+
+
+class HomepageCacheTests(unittest.TestCase):
+    """The homepage is scraped once per refresh and stale data is served while it runs."""
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        manager = CacheManager(
+            [FileCacheSource("homepage", 3600, tmp / "homepage")], index_path=tmp / "index.db"
+        )
+        manager.start_janitor = lambda: None
+        patcher = mock.patch.object(homepage_content, "cache_manager", manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = homepage_content.HomepageCache(ttl=3600)
+        self.cache.start_background_refresher = lambda: None
+        self.edition = "First"
+
+    def _serve(self, delay=0.0):
+        upstream = StubOpenLibrary(body=lambda path: homepage_html(self.edition), delay=delay)
+        return upstream, mock.patch.object(homepage_content, "HOME_URL", upstream.base_url + "/")
+
+    def test_one_parse_fills_every_carousel(self):
+        upstream, home_url = self._serve()
+        parse = mock.Mock(wraps=homepage_content.BeautifulSoup)
+        with upstream, home_url, mock.patch.object(homepage_content, "BeautifulSoup", parse):
+            data = self.cache.get()
+
+        self.assertEqual(upstream.hits, 1)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(data, {
+            "trending_books": [{"imgSrc": "//covers.openlibrary.org/b/id/1-M.jpg", "title": "First Trending"}],
+            "classic_books": [{"imgSrc": "//covers.openlibrary.org/b/id/1-M.jpg", "title": "First Classic"}],
+            "books_we_love": [{"imgSrc": "//covers.openlibrary.org/b/id/1-M.jpg", "title": "First Loved"}],
+        })
+
+    def test_concurrent_cold_start_scrapes_once(self):
+        upstream, home_url = self._serve(delay=0.2)
+        with upstream, home_url, ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: self.cache.get(), range(6)))
+
+        self.assertEqual(upstream.hits, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_stale_data_is_served_while_refreshing(self):
+        upstream, home_url = self._serve(delay=0.2)
+        with upstream, home_url:
+            self.cache.get()
+            self.cache._fetched_at -= 7200  # older than the TTL
+            self.edition = "Second"
+
+            stale = self.cache.get()
+            self.assertEqual(stale["trending_books"][0]["title"], "First Trending")
+            deadline = time.time() + 5
+            while self.cache._refreshing and time.time() < deadline:
+                time.sleep(0.02)
+
+        self.assertEqual(upstream.hits, 2)
+        self.assertFalse(self.cache.is_stale())
+        self.assertEqual(self.cache.get()["trending_books"][0]["title"], "Second Trending")
+        on_disk = homepage_content.cache_manager.read_json("homepage", homepage_content.CACHE_KEY)
+        self.assertEqual(on_disk["books_we_love"][0]["title"], "Second Loved")
+
+
+def stub_cover(width: int = 800, height: int = 1200) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (120, 40, 200)).save(out, "JPEG")
+    return out.getvalue()
+
+
+class CoverProxyTests(unittest.TestCase):
+    """Covers are fetched once from a local fake cover server, resized to WebP and cached."""
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.cache = CacheManager(
+            [FileCacheSource("covers", 3600, tmp / "covers", "*.webp")], index_path=tmp / "index.db"
+        )
+        self.cache.start_janitor = lambda: None
+        self.jpeg = stub_cover()
+
+    def _respond(self, path, headers):
+        if "/b/id/404-" in path:
+            return 404, "not found", {}
+        return 200, self.jpeg, {"Content-Type": "image/jpeg"}
+
+    def test_covers_are_resized_to_webp_and_fetched_once(self):
+        with StubOpenLibrary(delay=0, respond=self._respond) as stub:
+            proxy = CoverProxy(stub.base_url, self.cache)
+            small = proxy.cover("b", "id", "6979861", "s")
+            medium = proxy.cover("b", "id", "6979861", "m")
+            self.assertEqual(proxy.cover("b", "id", "6979861", "m"), medium)
+
+            self.assertEqual(stub.hits, 1)  # every size is made from one fetch
+            self.assertEqual(stub.paths, ["/b/id/6979861-L.jpg?default=false"])
+            for data, longest in ((small, 96), (medium, 240)):
+                image = Image.open(io.BytesIO(data))
+                self.assertEqual(image.format, "WEBP")
+                self.assertEqual(max(image.size), longest)
+                self.assertEqual(image.size[0] * 3, image.size[1] * 2)  # aspect ratio kept
+            self.assertLess(len(medium), len(self.jpeg))
+            self.assertEqual(proxy.stats()["hits"], 2)  # the "l" source of "m", the repeat
+
+    def test_concurrent_requests_share_one_fetch(self):
+        with StubOpenLibrary(delay=0.2, respond=self._respond) as stub:
+            proxy = CoverProxy(stub.base_url, self.cache)
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                sizes = ["s", "m", "l"] * 2
+                results = list(pool.map(lambda size: proxy.cover("b", "id", "42", size), sizes))
+
+            self.assertEqual(stub.hits, 1)
+            self.assertEqual(results[:3], results[3:])
+            self.assertEqual(len(proxy._locks), covers.LOCK_STRIPES)  # not one lock per cover
+
+    def test_missing_cover_and_invalid_keys(self):
+        with StubOpenLibrary(delay=0, respond=self._respond) as stub:
+            proxy = CoverProxy(stub.base_url, self.cache)
+            with self.assertRaises(CoverNotFound):
+                proxy.cover("b", "id", "404", "m")
+            for args in (("x", "id", "1", "m"), ("b", "id", "../etc", "m"), ("b", "id", "1", "xl")):
+                with self.subTest(args=args), self.assertRaises(ValueError):
+                    proxy.cover(*args)
+            self.assertEqual(stub.hits, 1)
+
+    def test_if_none_match_compares_whole_tags(self):
+        tag = covers.etag(self.jpeg)
+        for header in (tag, f'"other", {tag}', f"W/{tag}", "*"):
+            with self.subTest(header=header):
+                self.assertTrue(covers.etag_matches(header, tag))
+        for header in ("", tag[1:-1], tag[:-3] + '"', f'"x{tag[1:]}', '"a", "b"'):
+            with self.subTest(header=header):
+                self.assertFalse(covers.etag_matches(header, tag))
+
+    def test_response_covers_point_at_proxy(self):
+        data = {
+            "books": [
+                {"imgSrc": "https://covers.openlibrary.org/b/id/123-M.jpg", "title": "A"},
+                {"imgSrc": "/images/icons/avatar_book-sm.png"},
+            ],
+            "image_src": "//covers.openlibrary.org/b/olid/OL7353617M-L.jpg",
+            "url": "https://covers.openlibrary.org/b/id/123-M.jpg",
+        }
+        original = json.loads(json.dumps(data))
+        proxied = proxy_cover_urls(data, "http://testserver/api/covers/")
+
+        self.assertEqual(proxied["books"][0]["imgSrc"], "http://testserver/api/covers/b/id/123?size=m")
+        self.assertEqual(proxied["books"][1]["imgSrc"], "/images/icons/avatar_book-sm.png")
+        self.assertEqual(proxied["image_src"], "http://testserver/api/covers/b/olid/OL7353617M?size=l")
+        self.assertEqual(proxied["url"], data["url"])  # only cover fields are rewritten
+        self.assertEqual(data, original)  # cached data is not modified
+
+
+class ScrapeJobQueueTests(unittest.TestCase):
+    """Semantic Scholar jobs: one per query over processes, bounded, retried and timed out."""
+
+    def setUp(self):
+        self.db_path = Path(tempfile.mkdtemp()) / "jobs.db"
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.runs = []
+        self.running = self.peak_running = 0
+        self.guard = threading.Lock()
+
+    def _queue(self, run=None, **settings) -> ScrapeJobQueue:
+        queue = ScrapeJobQueue(run or self._scrape, self.db_path)
+        queue.POLL_INTERVAL = 0.05
+        queue.RETRY_BACKOFF = 0
+        for name, value in settings.items():
+            setattr(queue, name, value)
+        return queue
+
+    def _scrape(self, query):
+        with self.guard:
+            self.runs.append(query)
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        self.release.wait(5)
+        with self.guard:
+            self.running -= 1
+
+    def _wait_for(self, queue, query, status, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = queue.status(query)
+            if job and job["status"] == status:
+                return job
+            time.sleep(0.02)
+        self.fail(f"{query!r} not {status}: {queue.status(query)}")
+
+    def test_one_job_per_query_across_processes(self):
+        # Two queues on one table stand for two worker processes
+        first, second = self._queue(), self._queue()
+        self.assertIn(first.submit("Deep  Learning")["status"], ("queued", "running"))
+        self._wait_for(first, "deep learning", "running")
+        job = second.submit("deep learning")
+        self.assertEqual((job["status"], job["position"]), ("running", 0))
+
+        self.release.set()
+        self._wait_for(second, "deep learning", "done")
+        self.assertEqual(self.runs, ["Deep  Learning"])
+        self.assertEqual(first.stats()["completed"], 1)
+
+    def test_concurrency_is_bounded_and_queue_reports_position(self):
+        queue = self._queue(MAX_RUNNING=1, WORKERS=3, DEFAULT_DURATION=20)
+        for query in ("a", "b", "c"):
+            queue.submit(query)
+            time.sleep(0.01)  # distinct enqueue times
+        self._wait_for(queue, "a", "running")
+        time.sleep(0.2)  # idle workers would have claimed "b" by now
+
+        self.assertEqual(self.runs, ["a"])
+        self.assertEqual(queue.status("b")["position"], 0)
+        c = queue.status("c")
+        self.assertEqual((c["status"], c["position"], c["eta_seconds"]), ("queued", 1, 40))
+        self.assertEqual({k: queue.stats()[k] for k in ("queued", "running")}, {"queued": 2, "running": 1})
+
+        self.release.set()
+        self._wait_for(queue, "c", "done")
+        self.assertEqual(self.peak_running, 1)
+
+    def test_failures_are_retried_then_reported(self):
+        def broken(query):
+            self.runs.append(query)
+            raise RuntimeError("no paper rows")
+
+        queue = self._queue(broken)
+        queue.submit("x")
+        job = self._wait_for(queue, "x", "failed")
+        self.assertEqual((job["attempts"], job["error"]), (3, "RuntimeError: no paper rows"))
+        self.assertEqual(len(self.runs), 3)
+        # A failed job is reported, not restarted, until RETRY_FAILED_AFTER
+        self.assertEqual(queue.submit("x")["status"], "failed")
+        self.assertEqual(queue.stats()["retried"], 2)
+
+    def test_hung_attempt_times_out(self):
+        queue = self._queue(TIMEOUT=0.2, MAX_ATTEMPTS=1)
+        queue.submit("slow")
+        job = self._wait_for(queue, "slow", "failed")
+        self.assertEqual(job["error"], "timed out after 0.2 s")
+        self.assertEqual(queue.stats()["timeouts"], 1)
+
+    def test_abandoned_attempt_counts_against_the_cap(self):
+        queue = self._queue(TIMEOUT=0.2, MAX_ATTEMPTS=1, MAX_RUNNING=1)
+        queue.submit("hung")
+        self._wait_for(queue, "hung", "failed")
+        queue.submit("next")
+        time.sleep(0.3)  # a free slot would have been claimed by now
+
+        self.assertEqual(queue.status("next")["status"], "queued")
+        self.assertEqual(queue.stats()["abandoned"], 1)
+        self.release.set()  # the hung scrape returns its browser
+        self._wait_for(queue, "next", "done")
+        self.assertEqual(queue.stats()["abandoned"], 0)
+        self.assertEqual(self.runs, ["hung", "next"])
+
+    def test_job_of_a_dead_process_is_taken_back(self):
+        # Claimed by a process that died: its lease ran out
+        with self._queue()._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (key, query, status, attempts, enqueued_at, not_before, started_at, lease_until)"
+                " VALUES ('orphan', 'orphan', 'running', 1, 0, 0, 0, 0)"
+            )
+
+        self.release.set()
+        survivor = self._queue()
+        survivor._start_workers()
+        job = self._wait_for(survivor, "orphan", "done")
+        self.assertEqual(job["attempts"], 2)
+
+
+class CatalogIngestTests(unittest.TestCase):
+    """Works stream from JSONL or a JSON array one by one and resume at an offset."""
+
+    WORKS = [
+        {"key": f"/works/OL{i}W", "title": f"Bücher ✓ {i}", "author_name": ["Anne Author"],
+         "first_publish_year": 1990 + i, "subject": ["Fiction"]}
+        for i in range(30)
+    ]
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.dump = self.tmp / "books_metadata.json"
+        self.dump.write_text(json.dumps(self.WORKS, indent=4, ensure_ascii=False), encoding="utf-8")
+        self.jsonl = self.tmp / "works.jsonl"
+        self.jsonl.write_text(
+            "".join(json.dumps(work, ensure_ascii=False) + "\n" for work in self.WORKS), encoding="utf-8"
+        )
+
+    def test_both_formats_stream_and_resume(self):
+        # Tiny chunks: records and multi-byte characters span chunk boundaries
+        with mock.patch.object(catalog_ingest, "CHUNK_SIZE", 7):
+            for path in (self.dump, self.jsonl):
+                with self.subTest(path=path.name):
+                    read = list(iter_records(path))
+                    self.assertEqual([record for _, record in read], self.WORKS)
+                    resumed = [record for _, record in iter_records(path, read[11][0])]
+                    self.assertEqual(resumed, self.WORKS[12:])
+
+    def test_catalog_row(self):
+        row = catalog_row(self.WORKS[3])
+        self.assertEqual(
+            (row["openlibrary_key"], row["authors"], row["publication_date"].year, row["genre"]),
+            ("OL3W", "Anne Author", 1993, "Fiction"),
+        )
+        work_json = {"key": "/works/OL9W", "title": "  A   Work ", "authors": [{"author": {"key": "/authors/OL1A"}}]}
+        self.assertEqual((catalog_row(work_json)["title"], catalog_row(work_json)["authors"]), ("A Work", "Unknown"))
+        self.assertIsNone(catalog_row({"key": "/works/OL9W"}))
+
+    def test_checkpoint_is_per_input(self):
+        checkpoint = IngestCheckpoint(self.tmp / "cp.json", self.jsonl)
+        state = checkpoint.load()
+        self.assertEqual(state["offset"], 0)
+        checkpoint.save(dict(state, offset=120, records=2))
+        self.assertEqual(checkpoint.load()["records"], 2)
+        self.assertEqual(IngestCheckpoint(self.tmp / "cp.json", self.dump).load()["offset"], 0)
+
+
+class HarvesterTests(unittest.TestCase):
+    """The harvester retries, resumes from its frontier and re-fetches conditionally."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.throttled = set()
+
+    def openlibrary(self, path, headers):
+        if path.startswith("/search.json"):
+            docs = [{"key": f"/works/OL{i}W", "author_name": [f"Author {i}"]} for i in (1, 2, 3)]
+            return 200, json.dumps({"docs": docs}), {}
+        work_id = path.split("/")[2].split(".")[0]
+        if work_id == "OL3W":
+            return 404, "{}", {}
+        if work_id == "OL2W" and work_id not in self.throttled:
+            self.throttled.add(work_id)  # first request only
+            return 429, "{}", {"Retry-After": "0"}
+        etag = f'"{work_id}-v1"'
+        if headers.get("If-None-Match") == etag:
+            return 304, "", {"ETag": etag}
+        return 200, json.dumps({"key": f"/works/{work_id}", "title": f"Title {work_id}"}), {"ETag": etag}
+
+    def _harvest(self, base_url: str, refresh: bool = False) -> dict:
+        class StubHarvester(CatalogHarvester):
+            SEARCH_URL = base_url + "/search.json?q={query}&fields=key,{fields}&limit={limit}&page={page}"
+            WORK_URL = base_url + "/works/{work_id}.json"
+
+        frontier = HarvestFrontier(self.tmp / "frontier.db")
+        if refresh:
+            frontier.requeue()
+        harvester = StubHarvester(frontier, self.tmp / "works.jsonl", target=10, rate=100, concurrency=2)
+        try:
+            return asyncio.run(harvester.run())
+        finally:
+            frontier.close()
+
+    def test_harvest_resume_and_conditional_refresh(self):
+        with StubOpenLibrary(respond=self.openlibrary, delay=0) as upstream:
+            first = self._harvest(upstream.base_url)
+            # Nothing pending and discovery finished: a restart sends no request
+            resumed = self._harvest(upstream.base_url)
+            refreshed = self._harvest(upstream.base_url, refresh=True)
+
+        self.assertEqual((first["fetched"], first["gone"], first["retries"]), (2, 1, 1))
+        self.assertEqual(first["frontier"], {"done": 2, "gone": 1})
+        self.assertEqual(resumed["requests"], 0)
+        self.assertEqual((refreshed["fetched"], refreshed["not_modified"]), (0, 2))
+        self.assertIn('"OL1W-v1"', [h.get("If-None-Match") for h in upstream.request_headers])
+
+        lines = (self.tmp / "works.jsonl").read_text(encoding="utf-8").splitlines()
+        records = sorted((json.loads(line) for line in lines), key=lambda r: r["key"])
+        self.assertEqual([r["key"] for r in records], ["/works/OL1W", "/works/OL2W"])
+        self.assertEqual(records[0]["author_name"], ["Author 1"])  # from the search doc
+
+    def test_token_bucket_limits_the_rate(self):
+        async def take(n):
+            bucket = TokenBucket(rate=40, capacity=1)
+            started = time.monotonic()
+            await asyncio.gather(*(bucket.acquire() for _ in range(n)))
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(take(11)), 10 / 40 * 0.9)
+
+
+class CacheManagerTests(unittest.TestCase):
+    """TTLs hide and delete expired entries; the budget evicts LRU/LFU first."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.store = SearchCacheStore(self.tmp / "search_cache.db", max_age=3600)
+        patcher = mock.patch.object(search_cache, "_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = use_temp_book_index(self, self.tmp)
+        self.manager = CacheManager(
+            [
+                FileCacheSource("details", 3600, self.tmp / "details"),
+                SearchCacheSource("search", 3600),
+                BookIndexSource("book_index", 3600),
+            ],
+            index_path=self.tmp / "cache_index.db",
+        )
+        self.manager.start_janitor = lambda: None
+
+    def _age(self, key: str, seconds: float):
+        path = self.manager.path("details", key)
+        stamp = time.time() - seconds
+        os.utime(path, (stamp, stamp))
+
+    def test_ttl(self):
+        self.manager.write_json("details", "fresh.json", {"n": 1})
+        self.manager.write_json("details", "old.json", {"n": 2})
+        self._age("old.json", 7200)
+        self.store.put_page("books", "old", "", 1, ["x"])
+        self.store._connect().execute("UPDATE search_pages SET updated_at = ?", (time.time() - 7200,))
+        self.store.put_page("books", "fresh", "", 1, ["y"])
+
+        self.assertEqual(self.manager.read_json("details", "fresh.json"), {"n": 1})
+        self.assertIsNone(self.manager.read_json("details", "old.json"))
+        self.assertEqual(self.manager.read_json("details", "old.json", allow_stale=True), {"n": 2})
+        self.assertIsNone(self.store.get_page("books", "old", "", 1))
+
+        result = self.manager.prune()
+        self.assertEqual(result["expired"]["entries"], 2)
+        self.assertFalse(self.manager.path("details", "old.json").exists())
+        self.assertEqual([key for key, *_ in self.store.entries()], ["books:fresh:"])
+
+    def test_budget_evicts_least_recently_used(self):
+        for name in ("a", "b", "c"):
+            self.manager.write_json("details", f"{name}.json", {"pad": "x" * 1000})
+            self._age(f"{name}.json", 60)
+        self.store.put_page("books", "d", "", 1, ["x" * 1000])
+        self.manager._touches.clear()
+        self.manager.touch("details", "a.json")
+        self.manager.touch("search", "books:d:")
+        size = self.manager.path("details", "a.json").stat().st_size
+
+        self.manager.max_bytes = size * 2  # evicts down to 1.8 files' worth
+        dry = self.manager.prune(dry_run=True)
+        self.assertEqual(len(dry["evicted"]["keys"]), 2)
+        self.assertTrue(self.manager.path("details", "b.json").exists())
+
+        result = self.manager.prune()
+        self.assertEqual(result["evicted"]["entries"], 2)
+        self.assertLessEqual(result["total_bytes"], self.manager.max_bytes)
+        remaining = {e.key for source in self.manager.sources.values() for e in source.entries()}
+        self.assertEqual(remaining, {"a.json", "books:d:"})
+
+    def test_lfu_keeps_most_read(self):
+        for name in ("a", "b"):
+            self.manager.write_json("details", f"{name}.json", {"pad": "x" * 1000})
+        for _ in range(5):
+            self.manager.touch("details", "a.json")
+        self.manager.touch("details", "b.json")  # read last, but only once
+        self.manager.policy = "lfu"
+        self.manager.max_bytes = int(self.manager.path("details", "a.json").stat().st_size * 1.5)
+
+        self.manager.prune()
+        self.assertTrue(self.manager.path("details", "a.json").exists())
+        self.assertFalse(self.manager.path("details", "b.json").exists())
+
+
+    def test_book_index_counts_against_the_budget(self):
+        self.index.add_books([
+            {"title": "Atomic Habits", "url": "/works/OL1W", "author": "James Clear"},
+            {"title": "Deep Work", "url": "/works/OL2W", "author": "Cal Newport"},
+        ])
+        report = self.manager.report()["sources"]["book_index"]
+        self.assertEqual(report["entries"], 2)
+        self.assertGreater(report["bytes"], 0)
+
+        self.manager.touch("book_index", "works/OL2W")
+        self.manager.max_bytes = report["bytes"] - 1
+        result = self.manager.prune()
+        self.assertEqual(result["evicted"]["entries"], 1)
+        self.assertEqual(self.index.search("deep work")["hits"], 1)
+        self.assertEqual(self.index.search("atomic habits")["hits"], 0)
+
+    def test_janitor_skips_while_another_process_prunes(self):
+        other_process = FileLock(str(self.tmp / "cache_index.lock"))
+        with other_process:
+            self.manager._janitor_run()
+        self.manager._janitor_run()
+
+        stats = self.manager.stats()
+        self.assertEqual((stats["janitor_skipped"], stats["janitor_runs"]), (1, 1))
+
+
+class QueryNormalizerTests(unittest.TestCase):
+    """Equivalent queries share one key; any query gives a safe file name."""
+
+    def test_equivalent_queries_share_a_key(self):
+        variants = ["Atomic  Habits", "atomic habits ", "Atomic-Habits", "ＡＴＯＭＩＣ　habits", "atomic habits!"]
+        self.assertEqual({canonical_query(q) for q in variants}, {"atomic habits"})
+        self.assertEqual(len({query_filename(q) for q in variants}), 1)
+        # Meaningful symbols survive
+        self.assertNotEqual(canonical_query("C++"), canonical_query("C#"))
+
+    def test_filenames_are_safe_and_distinct(self):
+        long_a, long_b = "x" * 500 + " a", "x" * 500 + " b"
+        for query in ("AC/DC", "../../etc/passwd", "", long_a, "日本語の本"):
+            with self.subTest(query=query):
+                name = query_filename(query)
+                self.assertRegex(name, r"^[a-z0-9_]+-[0-9a-f]{16}\.json$")
+                self.assertLess(len(name), 100)
+        self.assertNotEqual(query_filename(long_a), query_filename(long_b))
+
+    def test_search_scopes_share_rows(self):
+        tmp = Path(tempfile.mkdtemp())
+        use_temp_book_index(self, tmp)
+        store = SearchCacheStore(tmp / "search_cache.db")
+        store.scope("books", "Atomic-Habits", "Relevance").put_page(1, ["book"])
+        self.assertEqual(store.scope("books", "atomic  habits", "relevance").get_page(1), ["book"])
+
+    def test_shadow_hit_rates(self):
+        stats = QueryKeyStats()
+        for query in ["Atomic Habits", "atomic habits", "Atomic-Habits", "atomic  habits", "dune"]:
+            stats.record("books", query)
+        report = stats.stats()["books"]
+        self.assertEqual((report["lookups"], report["legacy_hits"], report["canonical_hits"]), (5, 1, 3))
+
+
+class CatalogSearchTests(TransactionTestCase):
+    """
+    Search over our own holdings. TransactionTestCase: MySQL's FULLTEXT
+    index only sees committed rows.
+    """
+
+    def setUp(self):
+        # Imported here: the rest of this module runs without Django models
+        from api import catalog_search
+        from api.models.models_items import EBookModel, LibraryItem, PrintedBookModel
+
+        self.catalog = catalog_search
+        self.LibraryItem = LibraryItem
+        books = [
+            ("Atomic Habits", "James Clear", "PrintedBook", "Available"),
+            ("Atlas Shrugged", "Ayn Rand", "PrintedBook", "CheckedOut"),
+            ("Atonement", "Ian McEwan", "EBook", "Available"),
+            ("Deep Work", "Cal Newport", "EBook", "Available"),
+            ("Digital Minimalism", "Cal Newport", "PrintedBook", "Available"),
+            ("The Atlas of Habits", "Ann Other", "PrintedBook", "Reserved"),
+        ]
+        for number, (title, authors, item_type, status) in enumerate(books):
+            item = LibraryItem.objects.create(
+                title=title, authors=authors, genre="Nonfiction", publication_date=date(2020, 1, 1),
+                item_type=item_type, availability_status=status,
+            )
+            if item_type == "PrintedBook":
+                PrintedBookModel.objects.create(
+                    library_item=item, location="A1", copy_number=1, barcode=f"BC{number}",
+                )
+            else:
+                EBookModel.objects.create(
+                    library_item=item, file_format="EPUB", download_link=f"https://example.org/{number}.epub",
+                )
+
+    def _titles(self, page: dict) -> list:
+        return [result["title"] for result in page["results"]]
+
+    def test_prefix_match_is_case_insensitive_and_alphabetical(self):
+        page = self.catalog.search_catalog("at")
+        self.assertEqual(self._titles(page), ["Atlas Shrugged", "Atomic Habits", "Atonement"])
+        self.assertEqual(page["queries"], 1)
+        self.assertEqual(self._titles(self.catalog.search_catalog("CAL", field="authors")),
+                         ["Deep Work", "Digital Minimalism"])
+        self.assertEqual(page["results"][1]["details"]["location"], "A1")
+        self.assertEqual(page["results"][2]["details"]["file_format"], "EPUB")
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(self.catalog.prefix_upper_bound("atom"), "aton")
+        self.assertEqual(self.catalog.prefix_upper_bound("a\ud7ff"), "a\ue000")  # skips the surrogates
+        self.assertEqual(self.catalog.prefix_upper_bound("a\U0010ffff"), "b")
+        self.assertIsNone(self.catalog.prefix_upper_bound(""))
+
+    def test_fulltext_needs_every_word(self):
+        page = self.catalog.search_catalog("habits atlas", match="fulltext")
+        self.assertEqual(self._titles(page), ["The Atlas of Habits"])
+        page = self.catalog.search_catalog("newport", match="fulltext")
+        self.assertEqual(self._titles(page), ["Deep Work", "Digital Minimalism"])
+        self.assertEqual(self.catalog.search_catalog("+-*", match="fulltext")["results"], [])
+
+    def test_item_type_and_availability_filters(self):
+        ebooks = self.catalog.search_catalog(item_type="EBook")
+        self.assertEqual(self._titles(ebooks), ["Atonement", "Deep Work"])
+        self.assertEqual(ebooks["queries"], 1)
+        available = self.catalog.search_catalog("at", availability_status="Available")
+        self.assertEqual(self._titles(available), ["Atomic Habits", "Atonement"])
+        both = self.catalog.search_catalog(item_type="PrintedBook", availability_status="Available")
+        self.assertEqual(self._titles(both), ["Atomic Habits", "Digital Minimalism"])
+        with self.assertRaises(ValueError):
+            self.catalog.search_catalog(item_type="Scroll")
+
+    def test_keyset_cursor_walks_every_page(self):
+        for kwargs, expected in (
+            ({"q": "at"}, ["Atlas Shrugged", "Atomic Habits", "Atonement"]),
+            ({}, ["Atomic Habits", "Atlas Shrugged", "Atonement", "Deep Work", "Digital Minimalism",
+                  "The Atlas of Habits"]),
+        ):
+            with self.subTest(**kwargs):
+                titles, cursor = [], None
+                while True:
+                    page = self.catalog.search_catalog(limit=2, cursor=cursor, **kwargs)
+                    self.assertLessEqual(len(page["results"]), 2)
+                    titles += self._titles(page)
+                    cursor = page["next_cursor"]
+                    if cursor is None:
+                        break
+                self.assertEqual(titles, expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ("not base64!", self.catalog.encode_cursor({"key": "at"}),
+                       self.catalog.encode_cursor({"id": "seven"}), "e30"):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                self.catalog.search_catalog("at", cursor=cursor)
+
+    def test_n_plus_one_exceeds_the_query_budget(self):
+        # Without the join every specialized model is a query of its own
+        manager = self.LibraryItem.objects
+        with mock.patch.object(manager, "select_related", lambda *names: manager.all()):
+            with self.assertRaises(self.catalog.QueryBudgetExceeded):
+                self.catalog.search_catalog("at")
+
+    def test_migration_adds_the_search_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, self.LibraryItem._meta.db_table)
+        for name in ("libraryitem_title_lower_idx", "libraryitem_authors_lower_idx",
+                     "libraryitem_type_status_idx", "libraryitem_status_idx", "libraryitem_genre_idx"):
+            with self.subTest(index=name):
+                self.assertIn(name, constraints)
+        if connection.vendor == "mysql":
+            self.assertIn("libraryitem_title_authors_ft", constraints)
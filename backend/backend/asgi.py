@@ -2,6 +2,10 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is how the backend is served in production, so that the async search
+views share one event loop per worker:
+
+    uvicorn backend.asgi:application --host 0.0.0.0 --port 8000 --workers 4
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -11,6 +15,13 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from services.browser_pool import browser_pool
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Launch the warm browsers while the server starts rather than on the first
+# Selenium scrape. Only serving processes import this module, so management
+# commands and tests never start a browser.
+browser_pool.warm_up()
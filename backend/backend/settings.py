@@ -66,6 +66,8 @@ CSRF_TRUSTED_ORIGINS = [
 CSRF_COOKIE_NAME = "csrftoken"
 CSRF_HEADER_NAME = "HTTP_X_CSRFTOKEN"
 CORS_ALLOW_CREDENTIALS = True
+# Read by the frontend to pace its polling of queued jobs
+CORS_EXPOSE_HEADERS = ["Retry-After"]
 
 ROOT_URLCONF = 'backend.urls'
 
@@ -11,6 +11,13 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from services.browser_pool import browser_pool
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Launch the warm browsers while the server starts rather than on the first
+# Selenium scrape. Only serving processes import this module, so management
+# commands and tests never start a browser.
+browser_pool.warm_up()
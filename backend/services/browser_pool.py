@@ -0,0 +1,325 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import undetected_chromedriver as uc
+from selenium.common.exceptions import WebDriverException
+
+CUSTOM_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/117.0.0.0 Safari/537.36"
+)
+
+
+class BrowserPoolTimeout(Exception):
+    """No browser became free within the checkout timeout."""
+
+
+class PooledBrowser:
+    """One warm Chrome process and its usage bookkeeping."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+        self.healthy = True
+        self.main_tab = driver.current_window_handle
+
+    def is_alive(self) -> bool:
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def reset(self):
+        """Close extra tabs, drop cookies and park the main tab on about:blank."""
+        for handle in self.driver.window_handles:
+            if handle != self.main_tab:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.main_tab)
+        self.driver.delete_all_cookies()
+        self.driver.get("about:blank")
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        uc.Chrome.__del__ = lambda self: None
+
+
+class BrowserPool:
+    """
+    Warm pool of undetected Chrome browsers shared by all Selenium scrapers.
+
+    - WARM_SIZE browsers are launched when the server starts (see
+      backend/wsgi.py) and kept idle.
+    - MAX_BROWSERS is the global cap on running Chromes. When every browser is
+      checked out, callers queue (FIFO) until one is checked in, or give up
+      after CHECKOUT_TIMEOUT with BrowserPoolTimeout. A caller whose browser
+      fails its checkout check keeps its place at the head of the line.
+    - A browser is health-checked on checkout, reset on checkin and recycled
+      (quit + relaunched) after MAX_USES checkouts or MAX_AGE seconds.
+
+    A Selenium session runs one command at a time, so a checkout always hands
+    out a whole browser. There is no separate, configurable tab count: tabs
+    of one browser cannot be driven concurrently, so they would add no
+    capacity. Scrapers that need several pages open them as tabs of their
+    browser and `reset()` closes them again on checkin.
+
+    Usage:
+        with browser_pool.browser() as driver:
+            driver.get(url)
+    """
+
+    WARM_SIZE = int(os.getenv("BROWSER_POOL_WARM_SIZE", "1"))
+    MAX_BROWSERS = int(os.getenv("BROWSER_POOL_MAX_BROWSERS", "3"))
+    MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES", "50"))
+    MAX_AGE = int(os.getenv("BROWSER_POOL_MAX_AGE", str(30 * 60)))  # seconds
+    CHECKOUT_TIMEOUT = int(os.getenv("BROWSER_POOL_CHECKOUT_TIMEOUT", "120"))  # seconds
+    HEADLESS = os.getenv("BROWSER_POOL_HEADLESS", "1") != "0"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._idle = deque()  # PooledBrowser objects ready for checkout
+        self._running = 0  # launched (idle + checked out + launching)
+        self._waiters = deque()  # FIFO tickets of queued callers
+        self._warmed = False
+        self._started_at = time.monotonic()
+        self._metrics = {
+            "checkouts": 0,
+            "launches": 0,
+            "launch_failures": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "busy_seconds_total": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Launching
+    # ------------------------------------------------------------------
+
+    def _launch(self) -> PooledBrowser:
+        options = uc.ChromeOptions()
+        if self.HEADLESS:
+            options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920x1080")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+
+        driver = uc.Chrome(options=options)
+        driver.execute_cdp_cmd(
+            "Network.setUserAgentOverride", {"userAgent": CUSTOM_USER_AGENT}
+        )
+        with self._cond:
+            self._metrics["launches"] += 1
+        print("[BrowserPool] Launched a new browser")
+        return PooledBrowser(driver)
+
+    def warm_up(self):
+        """Launch browsers in the background until WARM_SIZE are running."""
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, min(self.WARM_SIZE, self.MAX_BROWSERS) - self._running)
+            self._running += missing
+
+        def launch_one():
+            try:
+                browser = self._launch()
+            except Exception as e:
+                print(f"[BrowserPool] Warm-up launch failed: {e}")
+                with self._cond:
+                    self._running -= 1
+                    self._metrics["launch_failures"] += 1
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify_all()
+
+        for _ in range(missing):
+            threading.Thread(target=launch_one, daemon=True).start()
+
+    def _expired(self, browser: PooledBrowser) -> bool:
+        return (
+            browser.uses >= self.MAX_USES
+            or time.monotonic() - browser.created_at >= self.MAX_AGE
+        )
+
+    def _discard(self, browser: PooledBrowser, reason: str):
+        print(f"[BrowserPool] Discarding browser ({reason}) after {browser.uses} use(s)")
+        browser.quit()
+        with self._cond:
+            self._running -= 1
+            self._metrics[reason] += 1
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Checkout / checkin
+    # ------------------------------------------------------------------
+
+    def checkout(self, timeout: float = None) -> PooledBrowser:
+        """
+        Take a healthy browser out of the pool, launching one if under the cap.
+        Blocks in FIFO order while all MAX_BROWSERS are busy.
+        """
+        self.warm_up()
+        timeout = self.CHECKOUT_TIMEOUT if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+
+        try:
+            while True:
+                launch = False
+                with self._cond:
+                    while True:
+                        first_in_line = self._waiters[0] is ticket
+                        if first_in_line and self._idle:
+                            browser = self._idle.popleft()
+                            break
+                        if first_in_line and self._running < self.MAX_BROWSERS:
+                            self._running += 1
+                            browser, launch = None, True
+                            break
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._metrics["timeouts"] += 1
+                            raise BrowserPoolTimeout(
+                                f"No browser free after {timeout:g}s "
+                                f"({self.MAX_BROWSERS} busy)"
+                            )
+                        self._cond.wait(remaining)
+
+                if launch:
+                    # The slot is ours; let the next caller in line go meanwhile
+                    self._leave_queue(ticket)
+                    try:
+                        browser = self._launch()
+                    except Exception:
+                        with self._cond:
+                            self._running -= 1
+                            self._metrics["launch_failures"] += 1
+                            self._cond.notify_all()
+                        raise
+                    break
+
+                # The ticket stays at the head of the line while the browser is
+                # checked, so a discarded one does not cost the caller its place
+                if self._expired(browser):
+                    self._discard(browser, "recycled")
+                elif not browser.is_alive():
+                    self._discard(browser, "unhealthy")
+                else:
+                    break
+        finally:
+            self._leave_queue(ticket)
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._metrics["checkouts"] += 1
+            self._metrics["wait_seconds_total"] += waited
+            self._metrics["wait_seconds_max"] = max(
+                self._metrics["wait_seconds_max"], waited
+            )
+        browser.uses += 1
+        browser.checked_out_at = time.monotonic()
+        return browser
+
+    def _leave_queue(self, ticket):
+        with self._cond:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+            self._cond.notify_all()
+
+    def checkin(self, browser: PooledBrowser):
+        """Reset the browser and return it to the pool (or drop it if broken)."""
+        with self._cond:
+            self._metrics["busy_seconds_total"] += time.monotonic() - browser.checked_out_at
+
+        if browser.healthy:
+            try:
+                browser.reset()
+            except Exception as e:
+                print(f"[BrowserPool] Reset failed: {e}")
+                browser.healthy = False
+
+        if not browser.healthy:
+            self._discard(browser, "unhealthy")
+        elif self._expired(browser):
+            self._discard(browser, "recycled")
+        else:
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify_all()
+
+    @contextmanager
+    def browser(self, timeout: float = None):
+        """Check out a driver for the duration of the `with` block."""
+        pooled = self.checkout(timeout)
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            # The session itself may be dead; don't hand it to the next caller
+            pooled.healthy = pooled.is_alive()
+            raise
+        finally:
+            self.checkin(pooled)
+
+    # ------------------------------------------------------------------
+    # Lifecycle / metrics
+    # ------------------------------------------------------------------
+
+    def shutdown(self):
+        """Quit every idle browser. Checked-out browsers are quit on checkin."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._running -= len(idle)
+            self._warmed = False
+        for browser in idle:
+            browser.quit()
+
+    def stats(self) -> dict:
+        with self._cond:
+            metrics = dict(self._metrics)
+            idle = len(self._idle)
+            metrics.update(
+                running=self._running,
+                idle=idle,
+                in_use=self._running - idle,
+                queued=len(self._waiters),
+                max_browsers=self.MAX_BROWSERS,
+            )
+        checkouts = metrics["checkouts"]
+        metrics["wait_seconds_avg"] = (
+            round(metrics["wait_seconds_total"] / checkouts, 3) if checkouts else 0.0
+        )
+        uptime = time.monotonic() - self._started_at
+        metrics["utilization"] = (
+            round(metrics["busy_seconds_total"] / (uptime * self.MAX_BROWSERS), 3)
+            if uptime
+            else 0.0
+        )
+        for key in ("wait_seconds_total", "wait_seconds_max", "busy_seconds_total"):
+            metrics[key] = round(metrics[key], 3)
+        return metrics
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.shutdown)
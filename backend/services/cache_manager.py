@@ -0,0 +1,478 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, NamedTuple
+
+from filelock import FileLock, Timeout
+
+DATA_CACHE_DIR = Path(__file__).resolve().parent.parent / "data_cache"
+INDEX_PATH = DATA_CACHE_DIR / "cache_index.db"
+
+MINUTE, HOUR, DAY = 60, 60 * 60, 24 * 60 * 60
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class CacheEntry(NamedTuple):
+    source: str
+    key: str
+    size: int
+    modified: float
+
+
+class CacheSource(ABC):
+    """
+    One kind of cached data under data_cache, with its own TTL.
+
+    ttl is read from DATA_CACHE_TTL_<NAME> (seconds) when set. Sources with
+    serve_stale keep expired entries around (their reader refreshes them in
+    the background), so only the byte budget can remove those.
+    """
+
+    def __init__(self, name: str, ttl: int, serve_stale: bool = False):
+        self.name = name
+        self.ttl = _env_int(f"DATA_CACHE_TTL_{name.upper()}", ttl)
+        self.serve_stale = serve_stale
+
+    @abstractmethod
+    def entries(self) -> List[CacheEntry]:
+        """Every cached entry of this source."""
+
+    @abstractmethod
+    def delete(self, keys: List[str]):
+        """Remove the entries with these keys."""
+
+    def delete_expired(self, cutoff: float) -> List[CacheEntry]:
+        expired = [entry for entry in self.entries() if entry.modified < cutoff]
+        self.delete([entry.key for entry in expired])
+        return expired
+
+
+class FileCacheSource(CacheSource):
+    """Files (JSON unless `pattern` says otherwise) in one directory; the key is the file name, the age its mtime."""
+
+    def __init__(self, name: str, ttl: int, directory: Path, pattern: str = "*.json", **kwargs):
+        super().__init__(name, ttl, **kwargs)
+        self.directory = directory
+        self.pattern = pattern
+
+    def path(self, key: str) -> Path:
+        return self.directory / key
+
+    def entries(self) -> List[CacheEntry]:
+        entries = []
+        for path in self.directory.glob(self.pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # removed since the listing
+            entries.append(CacheEntry(self.name, path.name, stat.st_size, stat.st_mtime))
+        return entries
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            self.path(key).unlink(missing_ok=True)
+
+
+class SearchCacheSource(CacheSource):
+    """
+    Rows of the SQLite search cache, one entry per search (all its pages and
+    its meta row). Freed pages are reused by SQLite, so the file stops
+    growing rather than shrinking.
+    """
+
+    def _store(self):
+        # Imported here: search_cache reads its TTL from this module
+        from services.openlibrary.search_cache import get_search_cache
+
+        return get_search_cache()
+
+    def entries(self) -> List[CacheEntry]:
+        return [CacheEntry(self.name, *row) for row in self._store().entries()]
+
+    def delete(self, keys: List[str]):
+        self._store().delete_searches(keys)
+
+    def delete_expired(self, cutoff: float) -> List[CacheEntry]:
+        # Expired pages of a search that is still in use go too, row by row
+        return [CacheEntry(self.name, *row) for row in self._store().delete_expired(cutoff)]
+
+
+class BookIndexSource(CacheSource):
+    """
+    Rows of the local book index (book_index.db), one entry per book. Sizes
+    are those of the stored record, so the full-text index on top of them
+    is not counted. An evicted book is indexed again the next time a search
+    or a book detail page returns it.
+    """
+
+    def _index(self):
+        # Imported here: book_index imports this module
+        from services.openlibrary.book_index import get_book_index
+
+        return get_book_index()
+
+    def entries(self) -> List[CacheEntry]:
+        return [CacheEntry(self.name, *row) for row in self._index().entries()]
+
+    def delete(self, keys: List[str]):
+        self._index().delete_books(keys)
+
+
+class CacheManager:
+    """
+    Size and age limits for everything under data_cache.
+
+    Every reader and writer of cached data goes through here (or, for the
+    SQLite search cache, reports its reads here), which gives:
+      - a TTL per source: expired entries are not served and get deleted
+      - a byte budget (DATA_CACHE_MAX_BYTES) over all sources together; when
+        it is exceeded, entries are evicted least recently used first
+        (DATA_CACHE_EVICTION=lru) or least frequently used first (lfu) until
+        the total is back under LOW_WATER of the budget
+      - a background janitor thread doing both every JANITOR_INTERVAL seconds,
+        or right away once writes push the total over the budget. Every
+        worker process starts one; a file lock (cache_index.lock) makes a
+        janitor skip its run while another process is pruning
+
+    Reads are only counted in memory and written to a small SQLite index
+    (cache_index.db) by the janitor, so a cache hit costs no disk write.
+    """
+
+    LOW_WATER = 0.9
+    MAX_PENDING_TOUCHES = 10000  # flushed early past this many distinct keys
+
+    def __init__(self, sources: List[CacheSource], index_path: Path = INDEX_PATH):
+        self.sources = {source.name: source for source in sources}
+        self.index_path = Path(index_path)
+        self.max_bytes = _env_int("DATA_CACHE_MAX_BYTES", 2 * 1024 ** 3)
+        self.policy = os.environ.get("DATA_CACHE_EVICTION", "lru").lower()
+        self.janitor_interval = _env_int("DATA_CACHE_JANITOR_INTERVAL", 10 * MINUTE)
+
+        self._lock = threading.Lock()
+        self._touches = {}  # (source, key) -> [last_access, hits] not yet in the index
+        self._approx_bytes = None  # total as of the last prune plus writes since
+        self._wake = threading.Event()
+        self._janitor = None
+        # Shared by every process using this index; held for a whole prune
+        self.prune_lock = FileLock(str(self.index_path.with_suffix(".lock")))
+        self._metrics = {
+            "janitor_runs": 0, "janitor_skipped": 0, "expired": 0, "evicted": 0, "bytes_freed": 0,
+        }
+
+    # --- Readers and writers -------------------------------------------------
+
+    def ttl(self, source: str) -> int:
+        return self.sources[source].ttl
+
+    def path(self, source: str, key: str) -> Path:
+        return self.sources[source].path(key)
+
+    def read_json(self, source: str, key: str, allow_stale: bool = False):
+        """
+        Cached JSON of a file source, or None when it is missing, unreadable
+        or older than the source's TTL (unless allow_stale).
+        """
+        raw = self.read_bytes(source, key, allow_stale)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            print(f"[CacheManager] Unreadable {source} entry {key}: {e}")
+            return None
+
+    def read_bytes(self, source: str, key: str, allow_stale: bool = False):
+        """Content of a file source entry; None like read_json."""
+        self.start_janitor()
+        path = self.path(source, key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self.ttl(source) and not allow_stale:
+                return None
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"[CacheManager] Unreadable {source} entry {key}: {e}")
+            return None
+        self.touch(source, key)
+        return data
+
+    def write_json(self, source: str, key: str, data, **dump_kwargs):
+        """Atomically write a file source entry (dump_kwargs go to json.dump)."""
+        self.write_bytes(source, key, json.dumps(data, **dump_kwargs).encode("utf-8"))
+
+    def write_bytes(self, source: str, key: str, data: bytes):
+        """Atomically write a file source entry."""
+        self.start_janitor()
+        path = self.path(source, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, so two threads writing the same key never share a temp file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.touch(source, key)
+        self.record_write(path.stat().st_size)
+
+    def touch(self, source: str, key: str):
+        """Count a read of `key` for LRU/LFU eviction."""
+        with self._lock:
+            touch = self._touches.setdefault((source, key), [0.0, 0])
+            touch[0] = time.time()
+            touch[1] += 1
+            overflow = len(self._touches) >= self.MAX_PENDING_TOUCHES
+        if overflow:
+            self._flush_touches()
+
+    def record_write(self, nbytes: int):
+        """Account for newly written bytes; wakes the janitor once over budget."""
+        with self._lock:
+            if self._approx_bytes is None:
+                return  # no full scan yet; the janitor's first run counts everything
+            self._approx_bytes += nbytes
+            over_budget = self._approx_bytes > self.max_bytes
+        if over_budget:
+            self._wake.set()
+
+    # --- Janitor ---------------------------------------------------------------
+
+    def start_janitor(self):
+        """Start the background janitor once per process (DATA_CACHE_JANITOR=0 disables it)."""
+        if self._janitor is not None or os.environ.get("DATA_CACHE_JANITOR", "1") == "0":
+            return
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(
+                target=self._janitor_loop, name="cache-janitor", daemon=True
+            )
+        self._janitor.start()
+
+    def _janitor_loop(self):
+        while True:
+            self._janitor_run()
+            self._wake.wait(self.janitor_interval)
+            self._wake.clear()
+
+    def _janitor_run(self):
+        try:
+            with self.prune_lock.acquire(timeout=0):
+                result = self.prune()
+            if result["expired"]["entries"] or result["evicted"]["entries"]:
+                print(f"[CacheManager] Janitor pruned: {json.dumps(result)}")
+        except Timeout:
+            # Another worker process is pruning the same cache right now
+            with self._lock:
+                self._metrics["janitor_skipped"] += 1
+        except Exception as e:
+            print(f"[CacheManager] Janitor run failed: {e}")
+
+    def prune(self, dry_run: bool = False, expired_only: bool = False) -> dict:
+        """
+        Delete expired entries, then evict until the total is under the budget.
+        With dry_run nothing is deleted; the result lists what would be.
+        """
+        now = time.time()
+        self._flush_touches()
+        removed = {"expired": [], "evicted": []}
+
+        for source in self.sources.values():
+            if source.serve_stale:
+                continue
+            cutoff = now - source.ttl
+            if dry_run:
+                removed["expired"] += [e for e in source.entries() if e.modified < cutoff]
+            else:
+                removed["expired"] += source.delete_expired(cutoff)
+
+        # After a real delete the listing no longer has them; a dry run skips them here
+        expired_keys = {(e.source, e.key) for e in removed["expired"]} if dry_run else set()
+        entries = [
+            entry
+            for source in self.sources.values()
+            for entry in source.entries()
+            if (entry.source, entry.key) not in expired_keys
+        ]
+        total = sum(entry.size for entry in entries)
+
+        if not expired_only and total > self.max_bytes:
+            target = self.max_bytes * self.LOW_WATER
+            for entry in self._eviction_order(entries):
+                if total <= target:
+                    break
+                removed["evicted"].append(entry)
+                total -= entry.size
+            if not dry_run:
+                for source in self.sources.values():
+                    keys = [e.key for e in removed["evicted"] if e.source == source.name]
+                    if keys:
+                        source.delete(keys)
+
+        if not dry_run:
+            self._forget(removed["expired"] + removed["evicted"])
+            with self._lock:
+                self._approx_bytes = total
+                self._metrics["janitor_runs"] += 1
+                self._metrics["expired"] += len(removed["expired"])
+                self._metrics["evicted"] += len(removed["evicted"])
+                self._metrics["bytes_freed"] += sum(
+                    e.size for e in removed["expired"] + removed["evicted"]
+                )
+
+        return {
+            kind: {
+                "entries": len(items),
+                "bytes": sum(e.size for e in items),
+                "keys": [f"{e.source}:{e.key}" for e in items] if dry_run else [],
+            }
+            for kind, items in removed.items()
+        } | {"total_bytes": total, "max_bytes": self.max_bytes, "dry_run": dry_run}
+
+    def _eviction_order(self, entries: List[CacheEntry]) -> List[CacheEntry]:
+        access = self._access_index()
+
+        def last_access(entry):
+            return access.get((entry.source, entry.key), (entry.modified, 0))[0]
+
+        if self.policy == "lfu":
+            return sorted(
+                entries,
+                key=lambda e: (access.get((e.source, e.key), (0, 0))[1], last_access(e)),
+            )
+        return sorted(entries, key=last_access)
+
+    # --- Access index ------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_access (
+                source TEXT NOT NULL,
+                key TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL,
+                PRIMARY KEY (source, key)
+            ) WITHOUT ROWID
+            """
+        )
+        return conn
+
+    def _flush_touches(self):
+        with self._lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO cache_access VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, key) DO UPDATE SET
+                    last_access = MAX(last_access, excluded.last_access),
+                    hits = hits + excluded.hits
+                """,
+                [(source, key, last, hits) for (source, key), (last, hits) in touches.items()],
+            )
+        finally:
+            conn.close()
+
+    def _access_index(self) -> dict:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT source, key, last_access, hits FROM cache_access")
+            return {(source, key): (last, hits) for source, key, last, hits in rows}
+        finally:
+            conn.close()
+
+    def _forget(self, entries: List[CacheEntry]):
+        if not entries:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "DELETE FROM cache_access WHERE source=? AND key=?",
+                [(e.source, e.key) for e in entries],
+            )
+        finally:
+            conn.close()
+
+    # --- Reporting ---------------------------------------------------------------
+
+    def report(self) -> dict:
+        """Entries, bytes and expired entries per source, plus the budget."""
+        now = time.time()
+        sources = {}
+        for source in self.sources.values():
+            entries = source.entries()
+            sources[source.name] = {
+                "entries": len(entries),
+                "bytes": sum(e.size for e in entries),
+                "expired": sum(1 for e in entries if e.modified < now - source.ttl),
+                "oldest_age_s": round(now - min((e.modified for e in entries), default=now)),
+                "ttl_s": source.ttl,
+            }
+        return {
+            "sources": sources,
+            "total_bytes": sum(s["bytes"] for s in sources.values()),
+            "max_bytes": self.max_bytes,
+            "policy": self.policy,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._metrics, approx_bytes=self._approx_bytes, pending_touches=len(self._touches))
+
+
+cache_manager = CacheManager(
+    [
+        # Stale homepage data is served while a refresh runs, so it is never expired
+        FileCacheSource(
+            "homepage", 15 * MINUTE, DATA_CACHE_DIR / "openlibrary", "homepage.json",
+            serve_stale=True,
+        ),
+        # Book details: one record per edition (OL...M) and one per work (OL...W)
+        FileCacheSource("book_detail", 7 * DAY, DATA_CACHE_DIR / "openlibrary" / "book_detail"),
+        FileCacheSource("book_work", 7 * DAY, DATA_CACHE_DIR / "openlibrary" / "book_work"),
+        SearchCacheSource("search", 1 * DAY),
+        # Books of the local-first search, refreshed whenever a scrape sees them again
+        BookIndexSource("book_index", 30 * DAY),
+        FileCacheSource("semantic_scholar", 7 * DAY, DATA_CACHE_DIR / "semantic_scholar"),
+        # WebP thumbnails of the cover proxy
+        FileCacheSource("covers", 30 * DAY, DATA_CACHE_DIR / "covers", "*.webp"),
+    ]
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on or prune everything under data_cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Entries, bytes and expired entries per source.")
+    prune = commands.add_parser("prune", help="Delete expired entries and evict down to the budget.")
+    prune.add_argument("--dry-run", action="store_true", help="Only list what would be deleted.")
+    prune.add_argument("--expired-only", action="store_true", help="Skip budget eviction.")
+    prune.add_argument("--max-bytes", type=int, help="Budget for this run (default DATA_CACHE_MAX_BYTES).")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        print(json.dumps(cache_manager.report(), indent=2))
+    else:
+        if args.max_bytes is not None:
+            cache_manager.max_bytes = args.max_bytes
+        with cache_manager.prune_lock:  # waits for a running janitor
+            result = cache_manager.prune(dry_run=args.dry_run, expired_only=args.expired_only)
+        print(json.dumps(result, indent=2))
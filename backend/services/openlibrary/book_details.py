@@ -1,179 +1,455 @@
+import base64
 import json
-from pathlib import Path
 import threading
 import time
-import requests
-from bs4 import BeautifulSoup
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
+from concurrent.futures import ThreadPoolExecutor
 import re
+from urllib.parse import urlsplit
+
+from services.cache_manager import cache_manager
+from services.openlibrary.book_index import index_book_detail
+from services.openlibrary.carousels import fetch_carousels
+from services.openlibrary.extraction import ExtractionSpec, Field, clean_text, parse_html
+from services.openlibrary.http_client import get_http_client
+
+# Fields loaded after the static page (the page itself fetches them with JS)
+DYNAMIC_FIELDS = ("you_might_also_like", "more_by_author")
+
+# Shared by every edition of a work, so cached once per work (OL...W). The
+# rest of a book's details is edition-level and cached per edition (OL...M).
+WORK_FIELDS = (
+    "work_id", "authors", "rating_out_of_5", "description", "subjects", "editions",
+    "work_description", "work_identifiers", "dynamic_status", "dynamic_started_at",
+) + DYNAMIC_FIELDS
+
+# Language names of the edition JSON's /languages/<code> keys, as the page shows them
+LANGUAGE_NAMES = {
+    "eng": "English", "spa": "Spanish", "fre": "French", "ger": "German", "ita": "Italian",
+    "por": "Portuguese", "rus": "Russian", "jpn": "Japanese", "chi": "Chinese", "dut": "Dutch",
+    "ara": "Arabic", "hin": "Hindi", "kor": "Korean", "pol": "Polish", "swe": "Swedish",
+    "tur": "Turkish", "heb": "Hebrew", "gre": "Greek", "lat": "Latin", "ukr": "Ukrainian",
+}
+
+# Editions inline in a book-detail response; the rest are paged by cursor
+EDITIONS_PREVIEW = 5
+EDITIONS_PAGE_SIZE = 20
+MAX_EDITIONS_PAGE_SIZE = 100
+
+_metrics_lock = threading.Lock()
+# Where /book-detail data came from: both records cached, an edition JSON
+# fetch for a cached work, or a full page scrape
+_metrics = {"cached": 0, "edition_json": 0, "page_scrape": 0}
+
+
+def _published(index: int):
+    """Part `index` of an edition row's "year, publisher" line."""
+
+    def read(el):
+        parts = clean_text(el).split(",")
+        return parts[index].strip() if len(parts) > index else None
+
+    return read
+
+
+def _link(el) -> dict:
+    return {"name": clean_text(el), "url": " ".join((el.get("href") or "").split())}
+
+
+# Everything read from the static page, in one walk over its tree
+BOOK_DETAIL_SPEC = ExtractionSpec({
+    "image_src": Field("img.cover, img.BookCover__image", attr="src"),
+    "title": Field("h1.edition-title, h1.work-title, h1"),
+    "authors": Field("a[itemprop='author'], a.authorName", many=True),
+    "rating_out_of_5": Field("[itemprop='ratingValue']"),
+    "description": Field(
+        "div#description, div.description, div[itemprop='description'],"
+        " div.book-description.read-more .read-more__content"
+    ),
+    "publish_date": Field("span[itemprop='datePublished']"),
+    "publisher": Field("a[itemprop='publisher']"),
+    "language": Field("span[itemprop='inLanguage'] a"),
+    "pages": Field("span[itemprop='numberOfPages']"),
+    "subjects": Field(
+        "div.section.link-box a", many=True,
+        value=lambda el: {"name": clean_text(el), "url": el.get("href")},
+    ),
+    "book_url": Field("link[rel~='canonical']", attr="href"),
+    "work_link": Field("a[href^='/works/OL']", attr="href"),
+    "editions": Field("table#editions tr td.book", many=True, fields={
+        "image_src": Field("div.cover img", attr="src"),
+        "title": Field("div.title a"),
+        "url": Field("div.title a", attr="href"),
+        "year": Field("div.published", value=_published(0)),
+        "publisher": Field("div.published", value=_published(1)),
+        "language": Field("div.format"),
+    }),
+    "edition_notes": Field("div.edition-notes", fields={"paragraphs": Field("p", many=True)}),
+    "section_headers": Field("div.section h3", many=True),
+    "section_links": Field("div.section a", many=True, value=_link),
+    "first_sentence": Field("p.largest[title='First']"),
+    "work_description": Field("div.work-description p"),
+    # dt and dd in page order, paired up afterwards
+    "metadata": Field("dt, dd", many=True, value=lambda el: (el.tag, clean_text(el))),
+    "table_of_contents": Field("div.toc.read-more__content", fields={
+        "entries": Field("div.toc__entry", many=True, fields={"title": Field("div.toc__title")}),
+    }),
+})
+
+
+def has_dynamic_content(details) -> bool:
+    return bool(details) and all(field in details for field in DYNAMIC_FIELDS)
+
+
+def split_details(details: dict):
+    """(work-level record, edition-level record) of a book's details."""
+    work = {key: value for key, value in details.items() if key in WORK_FIELDS}
+    edition = {key: value for key, value in details.items() if key not in WORK_FIELDS or key == "work_id"}
+    return dict(work, record="work"), dict(edition, record="edition")
+
+
+def merge_details(work: dict, edition: dict) -> dict:
+    """A book's details from its work and edition records (edition values win unless empty)."""
+    details = {key: value for key, value in work.items() if key != "record"}
+    for key, value in edition.items():
+        if key != "record" and (value is not None or key not in details):
+            details[key] = value
+    return details
+
+
+def _language_name(key) -> str:
+    code = str(key or "").rstrip("/").rsplit("/", 1)[-1]
+    return LANGUAGE_NAMES.get(code, code)
+
+
+def _text_value(value) -> str:
+    # Edition JSON text fields are either strings or {"type": "/type/text", "value": ...}
+    if isinstance(value, dict):
+        value = value.get("value")
+    return " ".join(str(value or "").split())
+
+
+def edition_from_json(data: dict, book_url: str) -> dict:
+    """
+    An edition-level record from OpenLibrary's edition JSON (/books/OL...M.json),
+    in the shape the page scrape gives. Serves sibling editions of a cached
+    work with one small request instead of a page scrape.
+    """
+    works = [w.get("key", "") for w in data.get("works") or [] if isinstance(w, dict)]
+    work_match = re.search(r"(OL\d+W)", works[0]) if works else None
+    identifiers = data.get("identifiers") or {}
+    edition_identifiers = {}
+    for name, values in (
+        ("isbn_10", data.get("isbn_10")),
+        ("open_library", [data.get("key", "").rsplit("/", 1)[-1]]),
+        ("oclc", data.get("oclc_numbers")),
+        ("goodreads", identifiers.get("goodreads")),
+    ):
+        if values and values[0]:
+            edition_identifiers[name] = values[0]
+    covers = [cover for cover in data.get("covers") or [] if isinstance(cover, int) and cover > 0]
+    languages = data.get("languages") or []
+    publishers = data.get("publishers") or []
+    description = _text_value(data.get("description"))
+
+    record = {
+        "image_src": f"//covers.openlibrary.org/b/id/{covers[0]}-M.jpg" if covers else None,
+        "title": data.get("title"),
+        "publish_date": data.get("publish_date"),
+        "publisher": publishers[0] if publishers else None,
+        "language": _language_name(languages[0].get("key")) if languages else None,
+        "pages": str(data["number_of_pages"]) if data.get("number_of_pages") else None,
+        "book_url": book_url,
+        "work_id": work_match.group(1) if work_match else None,
+        "edition_notes": _text_value(data.get("notes")),
+        "published_in": ", ".join(data.get("publish_places") or []),
+        "other_titles": list(data.get("other_titles") or []),
+        "translation_of": data.get("translation_of") or "",
+        "translated_from": ", ".join(_language_name(lang.get("key")) for lang in data.get("translated_from") or []),
+        "edition_identifiers": edition_identifiers,
+        "source_records": [{"record": record} for record in data.get("source_records") or []],
+        "first_sentence": _text_value(data.get("first_sentence")),
+        "table_of_contents": [
+            entry.get("title") for entry in data.get("table_of_contents") or []
+            if isinstance(entry, dict) and entry.get("title")
+        ],
+        "record": "edition",
+    }
+    if description:
+        # The edition's own description, else the work's
+        record["description"] = description
+    return record
+
+
+def encode_editions_cursor(editions: list, end: int) -> str:
+    """Cursor of the editions after editions[end - 1]: its URL, and `end` should the URL be gone."""
+    position = {"after": editions[end - 1].get("url"), "offset": end}
+    raw = json.dumps(position, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_editions_cursor(cursor: str, editions: list) -> int:
+    """Index of the first edition after `cursor`. Raises ValueError for an invalid cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw.decode("utf-8"))
+        offset = int(position["offset"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor.")
+    # Re-scraped tables can shift: continue after the same edition when it is still there
+    after = position.get("after")
+    if after:
+        for index, edition in enumerate(editions):
+            if edition.get("url") == after:
+                return index + 1
+    return max(0, offset)
+
+
+def editions_page(editions: list, cursor: str = None, limit: int = EDITIONS_PAGE_SIZE) -> dict:
+    """One page of an editions list: {"editions", "total", "next_cursor"}."""
+    if not 1 <= limit <= MAX_EDITIONS_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_EDITIONS_PAGE_SIZE}.")
+    start = decode_editions_cursor(cursor, editions) if cursor else 0
+    end = min(start + limit, len(editions))
+    return {
+        "editions": editions[start:end],
+        "total": len(editions),
+        "next_cursor": encode_editions_cursor(editions, end) if end < len(editions) else None,
+    }
+
+
+def with_editions_preview(details: dict) -> dict:
+    """
+    `details` with only the first EDITIONS_PREVIEW editions inline, plus
+    "editions_total" and "editions_next_cursor" for the editions endpoint.
+    """
+    preview = editions_page(details.get("editions") or [], limit=EDITIONS_PREVIEW)
+    return dict(
+        details,
+        editions=preview["editions"],
+        editions_total=preview["total"],
+        editions_next_cursor=preview["next_cursor"],
+    )
+
+
+def iter_cached_details():
+    """Details of every cached edition, merged with its cached work."""
+    for path in cache_manager.path(BookDetailPage.CACHE_SOURCE, "").glob("*.json"):
+        try:
+            edition = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"[BookDetail] Skipping {path.name}: {e}")
+            continue
+        if edition.get("record") != "edition":
+            continue
+        work_key = f"{edition.get('work_id') or path.stem}.json"
+        work = cache_manager.read_json(BookDetailPage.WORK_CACHE_SOURCE, work_key) or {}
+        yield merge_details(work, edition)
+
+
+def _count(key: str):
+    with _metrics_lock:
+        _metrics[key] += 1
+
+
+def book_detail_stats() -> dict:
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+class DynamicContentJobs:
+    """
+    Background fetches of the book-detail carousels.
+
+    At most one fetch per work runs in this process, and at most WORKERS at
+    a time (a Selenium fallback holds a pooled browser for several seconds). Finished jobs
+    are remembered for RETRY_FAILED_AFTER seconds, so that polling clients
+    of a failed scrape get "failed" instead of starting a new browser on
+    every poll.
+    """
+
+    WORKERS = 2
+    RETRY_FAILED_AFTER = 300
+    # A scrape started by another worker process (per the cache) is left to it this long
+    CLAIM_SECONDS = 120
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.WORKERS, thread_name_prefix="book-dynamic"
+        )
+        self._lock = threading.Lock()
+        self._jobs = {}  # work_key -> {"status", "done": Event, "finished_at"}
+        self._metrics = {"started": 0, "ready": 0, "failed": 0}
+
+    def start(self, page: "BookDetailPage") -> dict:
+        """The job of `page`'s work, started unless one is running or finished recently."""
+        with self._lock:
+            now = time.time()
+            for key, old in list(self._jobs.items()):
+                if old["finished_at"] and now - old["finished_at"] >= self.RETRY_FAILED_AFTER:
+                    del self._jobs[key]
+            job = self._jobs.get(page.work_key)
+            if job:
+                return job
+            job = {"status": "pending", "done": threading.Event(), "finished_at": None}
+            self._jobs[page.work_key] = job
+            self._metrics["started"] += 1
+        self._executor.submit(self._run, page, job)
+        return job
+
+    def _run(self, page: "BookDetailPage", job: dict):
+        try:
+            ok = page._fetch_dynamic_content()
+        except Exception as e:
+            print(f"[ERROR] Dynamic content job failed: {e}")
+            ok = False
+        with self._lock:
+            job["status"] = "ready" if ok else "failed"
+            job["finished_at"] = time.time()
+            self._metrics[job["status"]] += 1
+        job["done"].set()
+
+    def get(self, work_key: str):
+        with self._lock:
+            return self._jobs.get(work_key)
+
+    def discard(self, work_key: str, job: dict):
+        """Forget `job` of `work_key`, e.g. because its carousels left the cache."""
+        with self._lock:
+            if self._jobs.get(work_key) is job:
+                del self._jobs[work_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["in_flight"] = sum(1 for job in self._jobs.values() if job["status"] == "pending")
+        return metrics
+
+
+dynamic_jobs = DynamicContentJobs()
 
 
 class BookDetailPage:
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "book_detail"
-    )
+    # Cached under data_cache/openlibrary/book_detail (editions) and book_work
+    # (works); TTL and eviction by the cache manager
+    CACHE_SOURCE = "book_detail"
+    WORK_CACHE_SOURCE = "book_work"
 
-    def __init__(self, url):
+    def __init__(self, url, work_id=None):
         self.url = url
-        self.soup = None
+        # OLxxxW of the edition's work; else read from the page
+        self.work_id = work_id if work_id and re.fullmatch(r"OL\d+W", work_id) else None
+        self.root = None
         self.book_details = {}
-        self._dynamic_thread = None
+        self._fetched = False
 
-        self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
         match = re.search(r'/(OL\d+M)', self.url)
+        self.edition_id = match.group(1) if match else None
         if match:
-            filename = f"{match.group(1)}.json"
+            self.cache_key = f"{match.group(1)}.json"
         else:
-            filename = self.url.rstrip("/").split("/")[-1].replace("?", "_") + ".json"
+            self.cache_key = self.url.rstrip("/").split("/")[-1].replace("?", "_") + ".json"
+
+    @property
+    def work_key(self) -> str:
+        """Cache key of the work record (the edition's own key if the work is unknown)."""
+        work_id = self.work_id or self.book_details.get("work_id")
+        return f"{work_id}.json" if work_id else self.cache_key
+
+    def _read_record(self, source: str, key: str, kind: str):
+        data = cache_manager.read_json(source, key)
+        # Records cached before the work/edition split are re-fetched
+        return data if data and data.get("record") == kind else None
 
-        self.cache_file = self.CACHE_DIR / filename
+    def _write_record(self, source: str, key: str, record: dict):
+        cache_manager.write_json(source, key, record, indent=4, ensure_ascii=False)
 
     def _clean(self, text):
         return " ".join(text.strip().split()) if text else ""
 
     def _load_or_fetch_html(self):
-        if self.cache_file.exists():
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                cached_data = json.load(f)
-                # Check for complete cache (static + dynamic)
-                if "you_might_also_like" in cached_data and "more_by_author" in cached_data:
-                    print(f"[CACHE HIT] Returning full cached data for: {self.url}")
-                    self.book_details = cached_data
-                    return
+        edition = self._read_record(self.CACHE_SOURCE, self.cache_key, "edition")
+        if self.work_id is None and edition:
+            self.work_id = edition.get("work_id")
+        work = self._read_record(self.WORK_CACHE_SOURCE, self.work_key, "work")
+
+        if work and edition:
+            print(f"[CACHE HIT] Returning cached work and edition for: {self.url}")
+            _count("cached")
+            self.book_details = merge_details(work, edition)
+            return
+
+        if work and self.edition_id:
+            # Another edition of this work was scraped: only this edition's own fields are missing
+            edition = self._fetch_edition_json()
+            if edition and edition["work_id"] == work["work_id"]:
+                print(f"[CACHE HIT] Work cached, fetched edition JSON for: {self.url}")
+                _count("edition_json")
+                self._write_record(self.CACHE_SOURCE, self.cache_key, edition)
+                self.book_details = merge_details(work, edition)
+                index_book_detail(self.book_details)
+                return
 
         print(f"[CACHE MISS] Scraping required for: {self.url}")
-        response = requests.get(self.url)
+        response = get_http_client().get(self.url)
         if response.status_code == 200:
-            self.soup = BeautifulSoup(response.text, "html.parser")
+            _count("page_scrape")
+            self.root = parse_html(response.text)
             self._extract_book_details()
-
-            # Start dynamic scraping in background
-            self._dynamic_thread = threading.Thread(target=self._fetch_dynamic_content)
-            self._dynamic_thread.start()
+            if self.work_id is None:
+                self.work_id = self.book_details.get("work_id")
+            fresh_work, edition = split_details(self.book_details)
+
+            if work is None:
+                fresh_work["dynamic_status"] = "pending"
+                fresh_work["dynamic_started_at"] = time.time()
+                self._fetched = True
+                work = fresh_work
+            else:
+                # Keep the carousels (and their status) of the cached work
+                work.update((key, value) for key, value in fresh_work.items() if key not in DYNAMIC_FIELDS)
+
+            # Static part is served (and searchable) while the carousels are scraped
+            self._write_record(self.WORK_CACHE_SOURCE, self.work_key, work)
+            self._write_record(self.CACHE_SOURCE, self.cache_key, edition)
+            self.book_details = merge_details(work, edition)
+            index_book_detail(self.book_details)
         else:
             raise Exception(f"Failed to fetch the page. Status code: {response.status_code}")
 
-    def _extract_book_details(self):
-        soup = self.soup
-
-        # General Info
-        self.book_details["image_src"] = (
-            soup.select_one("img.cover, img.BookCover__image")["src"]
-            if soup.select_one("img.cover, img.BookCover__image")
-            else None
-        )
-
-        self.book_details["title"] = (
-            self._clean(soup.select_one("h1.edition-title, h1.work-title, h1").text)
-            if soup.select_one("h1.edition-title, h1.work-title, h1")
-            else None
-        )
-
-        self.book_details["authors"] = list(
-            set(
-                self._clean(a.text)
-                for a in soup.select("a[itemprop='author'], a.authorName")
-            )
-        )
-
-        self.book_details["rating_out_of_5"] = (
-            self._clean(soup.select_one("[itemprop='ratingValue']").text)
-            if soup.select_one("[itemprop='ratingValue']")
-            else None
-        )
-
-        self.book_details["description"] = (
-            self._clean(
-                soup.select_one(
-                    "div#description, div.description, div[itemprop='description'], div.book-description.read-more .read-more__content"
-                ).text
-            )
-            if soup.select_one(
-                "div#description, div.description, div[itemprop='description'], div.book-description.read-more .read-more__content"
-            )
-            else None
-        )
-
-        self.book_details["publish_date"] = (
-            self._clean(soup.select_one("span[itemprop='datePublished']").text)
-            if soup.select_one("span[itemprop='datePublished']")
-            else None
-        )
-
-        self.book_details["publisher"] = (
-            self._clean(soup.select_one("a[itemprop='publisher']").text)
-            if soup.select_one("a[itemprop='publisher']")
-            else None
-        )
-
-        self.book_details["language"] = (
-            self._clean(soup.select_one("span[itemprop='inLanguage'] a").text)
-            if soup.select_one("span[itemprop='inLanguage'] a")
-            else None
-        )
-
-        self.book_details["pages"] = (
-            self._clean(soup.select_one("span[itemprop='numberOfPages']").text)
-            if soup.select_one("span[itemprop='numberOfPages']")
-            else None
-        )
-
-        # Subjects
-        self.book_details["subjects"] = [
-            {"name": self._clean(tag.text), "url": tag["href"]}
-            for tag in soup.select("div.section.link-box a")
-        ]
+    def _fetch_edition_json(self):
+        """This edition's record from /books/OL...M.json, or None if that fails."""
+        parts = urlsplit(self.url)
+        try:
+            response = get_http_client().get(f"{parts.scheme}://{parts.netloc}/books/{self.edition_id}.json")
+            if response.status_code != 200:
+                return None
+            return edition_from_json(response.json(), self.url)
+        except Exception as e:
+            print(f"[BookDetail] Edition JSON failed ({e}), scraping the page")
+            return None
 
-        # Book URL
-        canonical_link = soup.find("link", rel="canonical")
-        self.book_details["book_url"] = (
-            canonical_link["href"] if canonical_link else None
+    def _extract_book_details(self):
+        raw = BOOK_DETAIL_SPEC.extract(self.root)
+
+        work_match = re.match(r"/works/(OL\d+W)", raw["work_link"] or "")
+        self.book_details.update(
+            image_src=raw["image_src"],
+            title=raw["title"],
+            # Unique, in page order
+            authors=list(dict.fromkeys(raw["authors"])),
+            rating_out_of_5=raw["rating_out_of_5"],
+            description=raw["description"],
+            publish_date=raw["publish_date"],
+            publisher=raw["publisher"],
+            language=raw["language"],
+            pages=raw["pages"],
+            subjects=raw["subjects"],
+            book_url=raw["book_url"],
+            # Work (the carousels are loaded per work)
+            work_id=self.work_id or (work_match.group(1) if work_match else None),
+            editions=raw["editions"],
         )
 
-        # Editions
-        editions = []
-        edition_rows = soup.select("table#editions tr td.book")
-        for row in edition_rows:
-            ed = {
-                "image_src": (
-                    row.select_one("div.cover img")["src"]
-                    if row.select_one("div.cover img")
-                    else None
-                ),
-                "title": (
-                    self._clean(row.select_one("div.title a").text)
-                    if row.select_one("div.title a")
-                    else None
-                ),
-                "url": (
-                    row.select_one("div.title a")["href"]
-                    if row.select_one("div.title a")
-                    else None
-                ),
-                "year": (
-                    self._clean(row.select_one("div.published").text.split(",")[0])
-                    if row.select_one("div.published")
-                    else None
-                ),
-                "publisher": (
-                    self._clean(row.select_one("div.published").text.split(",")[1])
-                    if row.select_one("div.published")
-                    and "," in row.select_one("div.published").text
-                    else None
-                ),
-                "language": (
-                    self._clean(row.select_one("div.format").text)
-                    if row.select_one("div.format")
-                    else None
-                ),
-            }
-            editions.append(ed)
-        self.book_details["editions"] = editions
-
         # Detailed Metadata
         fields = {
             "edition_notes": "",
@@ -188,30 +464,27 @@ class BookDetailPage:
             "work_description": "",
         }
 
-        notes_tag = soup.select_one("div.edition-notes")
-        if notes_tag:
-            fields["edition_notes"] = " ".join(
-                [self._clean(p.text) for p in notes_tag.find_all("p")]
-            )
-
-        src_header = soup.select_one("div.section h3:-soup-contains('Source records')")
-        if src_header:
-            for link in soup.select("div.section a"):
-                fields["source_records"].append(
-                    {"name": self._clean(link.text), "url": self._clean(link["href"])}
-                )
-
-        first_sentence_tag = soup.select_one("p.largest[title='First']")
-        if first_sentence_tag:
-            fields["first_sentence"] = self._clean(first_sentence_tag.text)
-
-        work_description_tag = soup.select_one("div.work-description p")
-        if work_description_tag:
-            fields["work_description"] = self._clean(work_description_tag.text)
-
-        for dt, dd in zip(soup.find_all("dt"), soup.find_all("dd")):
-            field = self._clean(dt.text.lower())
-            value = self._clean(dd.text)
+        if raw["edition_notes"]:
+            fields["edition_notes"] = " ".join(raw["edition_notes"]["paragraphs"])
+
+        if any("Source records" in header for header in raw["section_headers"]):
+            fields["source_records"].extend(raw["section_links"])
+
+        if raw["first_sentence"] is not None:
+            fields["first_sentence"] = raw["first_sentence"]
+
+        if raw["work_description"] is not None:
+            fields["work_description"] = raw["work_description"]
+
+        # Each <dd> belongs to the <dt> before it
+        label = None
+        for tag, value in raw["metadata"]:
+            if tag == "dt":
+                label = value.lower()
+                continue
+            if label is None:
+                continue
+            field, label = label, None
             if "published in" in field:
                 fields["published_in"] = value
             elif "other titles" in field:
@@ -240,105 +513,114 @@ class BookDetailPage:
         self.book_details.update(fields)
 
         # Table of Contents
-        toc = []
-        toc_container = soup.select_one("div.toc.read-more__content")
-        if toc_container:
-            for entry in toc_container.select("div.toc__entry"):
-                title_elem = entry.select_one("div.toc__title")
-                if title_elem:
-                    toc.append(self._clean(title_elem.text))
-        self.book_details["table_of_contents"] = toc
+        toc = raw["table_of_contents"]
+        self.book_details["table_of_contents"] = [
+            entry["title"] for entry in (toc["entries"] if toc else []) if entry["title"] is not None
+        ]
 
     def _fetch_dynamic_content(self):
-        print("[INFO] Launching Selenium for dynamic content scraping...")
-        driver = None
         try:
-            options = uc.ChromeOptions()
-            # options.add_argument("--headless=new")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920x1080")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-extensions")
-
-            driver = uc.Chrome(options=options)
-
-            custom_user_agent = (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/117.0.0.0 Safari/537.36"
-            )
-            driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": custom_user_agent})
-
-            driver.get(self.url)
-            time.sleep(8)
-
-            carousels = driver.find_elements(By.CLASS_NAME, "carousel-section")
-
-            you_might_also_like = []
-            more_by_author = []
-
-            for section in carousels:
-                try:
-                    header_element = section.find_element(By.TAG_NAME, "h2")
-                    header_text = header_element.text.strip().lower()
-
-                    cards = section.find_elements(By.CSS_SELECTOR, "div.book")
-                    section_data = []
-                    for card in cards:
-                        try:
-                            img = card.find_element(By.TAG_NAME, "img").get_attribute("src")
-                            title = card.find_element(By.TAG_NAME, "img").get_attribute("title")
-                            book_url = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-                            read_button = card.find_elements(By.CSS_SELECTOR, ".cta-btn")
-                            read_url = read_button[0].get_attribute("href") if read_button else None
-
-                            section_data.append({
-                                "image_src": img,
-                                "title": title,
-                                "book_url": book_url,
-                                "read_url": read_url
-                            })
-                        except Exception as e:
-                            print(f"[WARN] Error extracting one card: {e}")
-                            continue
-
-                    if "you might also like" in header_text:
-                        you_might_also_like = section_data
-                    elif "more by" in header_text or "more by this author" in header_text:
-                        more_by_author = section_data
-
-                except Exception as e:
-                    print(f"[WARN] Error processing a section: {e}")
-                    continue
-
-            self.book_details["you_might_also_like"] = you_might_also_like
-            self.book_details["more_by_author"] = more_by_author
-
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self.book_details, f, indent=4, ensure_ascii=False)
+            carousels = fetch_carousels(self.url, self.book_details.get("work_id"))
+            if carousels is None:
+                return False
+            self.book_details.update(carousels)
+            self.book_details["dynamic_status"] = "ready"
+
+            # Carousels belong to the work: every edition of it gets them
+            work = self._read_record(self.WORK_CACHE_SOURCE, self.work_key, "work")
+            if work is None:
+                work = split_details(self.book_details)[0]
+            work.update(carousels, dynamic_status="ready")
+            self._write_record(self.WORK_CACHE_SOURCE, self.work_key, work)
 
             print("[INFO] Dynamic content successfully scraped and cached.")
+            return True
 
         except Exception as e:
-            print(f"[ERROR] Selenium scraping failed: {e}")
-            if "you_might_also_like" not in self.book_details:
-                self.book_details["you_might_also_like"] = []
-            if "more_by_author" not in self.book_details:
-                self.book_details["more_by_author"] = []
-        finally:
-            if driver:
-                driver.quit()
-                uc.Chrome.__del__ = lambda self: None
-
-
-    def get_details(self):
+            print(f"[ERROR] Dynamic content scraping failed: {e}")
+            return False
+
+    def get_static_details(self):
+        """
+        The book's details without waiting for the browser: static fields at
+        once, plus "dynamic_status":
+          - "ready": you_might_also_like and more_by_author are included
+          - "pending": they are being scraped in the background (poll again)
+          - "failed": the last scrape failed; both are empty lists
+        """
         self._load_or_fetch_html()
-        if self._dynamic_thread:
-            self._dynamic_thread.join()
+        if has_dynamic_content(self.book_details):
+            return self.book_details
+
+        started_at = self.book_details.get("dynamic_started_at") or 0
+        job = dynamic_jobs.get(self.work_key)
+        if (
+            job is None
+            and not self._fetched
+            and time.time() - started_at < DynamicContentJobs.CLAIM_SECONDS
+        ):
+            # Another worker process fetched the page and is scraping
+            self.book_details["dynamic_status"] = "pending"
+            return self.book_details
+
+        job = self._start_dynamic_job()
+        if job["status"] == "ready":
+            # Finished between the cache read and now: the carousels are cached...
+            fresh = BookDetailPage(self.url, self.work_id)
+            fresh._load_or_fetch_html()
+            if has_dynamic_content(fresh.book_details):
+                return fresh.book_details
+            # ...unless the work record was evicted or expired since: scrape again
+            dynamic_jobs.discard(self.work_key, job)
+            self.book_details = fresh.book_details
+            job = self._start_dynamic_job()
+
+        # A new job that is already "ready" is read from the cache on the next poll
+        self.book_details["dynamic_status"] = "pending" if job["status"] == "ready" else job["status"]
+        if job["status"] == "failed":
+            for field in DYNAMIC_FIELDS:
+                self.book_details.setdefault(field, [])
         return self.book_details
 
+    def _start_dynamic_job(self) -> dict:
+        # The job scrapes into its own copy; this one is being returned
+        scraper = BookDetailPage(self.url, self.work_id or self.book_details.get("work_id"))
+        scraper.book_details = dict(self.book_details)
+        return dynamic_jobs.start(scraper)
+
+    def wait_for_dynamic(self, timeout: float):
+        """
+        get_static_details(), once the carousels are ready or failed or
+        `timeout` seconds have passed. A job of another worker process is
+        noticed through the cache.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            details = BookDetailPage(self.url, self.work_id).get_static_details()
+            remaining = deadline - time.monotonic()
+            if details["dynamic_status"] != "pending" or remaining <= 0:
+                return details
+            job = dynamic_jobs.get(self.work_key)
+            if job:
+                job["done"].wait(min(remaining, 1.0))
+            else:
+                time.sleep(min(remaining, 1.0))
+
+    def get_editions(self, cursor: str = None, limit: int = EDITIONS_PAGE_SIZE) -> dict:
+        """
+        One page of the work's editions (see editions_page). Reads the cached
+        work like get_static_details, without starting the carousel job.
+        """
+        self._load_or_fetch_html()
+        return editions_page(self.book_details.get("editions") or [], cursor, limit)
+
+    def get_details(self, timeout: float = 60):
+        """Every field, waiting up to `timeout` seconds for the carousels."""
+        details = self.wait_for_dynamic(timeout)
+        for field in DYNAMIC_FIELDS:
+            details.setdefault(field, [])
+        return details
+
 
 # if __name__ == "__main__":
 #     url = "https://openlibrary.org/books/OL27918581M/Atomic_Habits"
@@ -0,0 +1,370 @@
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from services.cache_manager import DATA_CACHE_DIR, cache_manager
+from services.query_normalizer import canonical_query
+
+BASE_URL = "https://openlibrary.org"
+DB_PATH = DATA_CACHE_DIR / "openlibrary" / "book_index.db"
+CACHE_SOURCE = "book_index"
+
+# Search cache strategies whose pages hold books (see _books_in)
+INDEXED_STRATEGIES = ("books", "advance", "author", "subject_works")
+
+_WORK_OR_EDITION = re.compile(r"/(works|books)/(OL\d+[WM])")
+_WORK_ID = re.compile(r"^OL\d+W$")
+_NUMBER = re.compile(r"[\d.,]+")
+
+
+def _book_key(url: str) -> str:
+    """
+    Index key of a book URL: "works/OL…W" (or "books/OL…M" for an edition
+    without a known work), so the same work found by a title search, an
+    author page and a subject page is one row.
+    """
+    match = _WORK_OR_EDITION.search(url or "")
+    if match:
+        return f"{match.group(1)}/{match.group(2)}"
+    return (url or "").split("?", 1)[0].split("#", 1)[0].rstrip("/")
+
+
+def _to_float(value):
+    match = _NUMBER.search(str(value or ""))
+    try:
+        return float(match.group(0).replace(",", "")) if match else None
+    except ValueError:
+        return None
+
+
+def _to_int(value):
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _as_book(item: dict) -> dict:
+    """A book from any scraper, in the shape of a book search result."""
+    return {
+        "imgSrc": item.get("imgSrc") or item.get("image_src") or "",
+        "title": item.get("title") or "",
+        "url": item.get("url") or item.get("book_url") or "",
+        "author": item.get("author") or "",
+        "rating": item.get("rating"),
+        "num_ratings": item.get("num_ratings"),
+        "first_published": item.get("first_published") or "",
+        "num_editions": item.get("num_editions") or item.get("editions") or "",
+    }
+
+
+def _books_in(payload) -> list:
+    """
+    Books of one cached search page, whatever the strategy:
+    a list of books (books, advance), {"works": [...]} (subject_works) or
+    {"authors": [{"books": [...]}]} (author search and bibliography pages).
+    """
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return []
+    if isinstance(payload.get("works"), list):
+        return payload["works"]
+    books = []
+    for author in payload.get("authors") or []:
+        for book in author.get("books") or []:
+            # Author pages list the books without repeating the author
+            books.append({**book, "author": book.get("author") or author.get("author_name", "")})
+    return books
+
+
+def detail_as_book(details: dict) -> dict:
+    """A BookDetailPage result in the shape of a book search result."""
+    edition = _WORK_OR_EDITION.search(details.get("book_url") or "")
+    works = [w for w in details.get("work_identifiers") or [] if _WORK_ID.match(str(w))]
+    url = details.get("book_url") or ""
+    if works and edition and edition.group(2).endswith("M"):
+        slug = url.rstrip("/").rsplit("/", 1)[-1]
+        url = f"{BASE_URL}/works/{works[0]}/{slug}?edition=key%3A/books/{edition.group(2)}"
+
+    image = details.get("image_src") or ""
+    if image.startswith("//"):
+        image = "https:" + image
+    return {
+        "imgSrc": image,
+        "title": details.get("title") or "",
+        "url": url,
+        "author": ", ".join(details.get("authors") or []),
+        "rating": details.get("rating_out_of_5") or None,
+        "first_published": details.get("publish_date") or "",
+    }
+
+
+def fts_query(query: str) -> str:
+    """
+    FTS5 MATCH expression for a user query: every canonical token must
+    match, quoted so punctuation is never FTS syntax, and the last one as a
+    prefix so "atomic hab" already finds "Atomic Habits".
+    """
+    tokens = [token.replace('"', '""') for token in canonical_query(query).split()]
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class BookIndex:
+    """
+    Local full-text index of every book the scrapers have seen.
+
+    Each cached search page and book detail is ingested as it is written,
+    one row per work (later data merged into earlier), in an SQLite table
+    with an FTS5 index on title and author. A query is answered in
+    milliseconds without OpenLibrary. Results are ranked by BM25 with title
+    matches weighted above author matches, plus a bonus for the rating.
+
+    Unlike the caches, the index is never expired; rebuild() recreates it
+    from whatever is cached.
+    """
+
+    PAGE_SIZE = 20
+    TITLE_WEIGHT = 10.0
+    AUTHOR_WEIGHT = 5.0
+    # bm25() is lower-is-better; each rating star subtracts up to this much,
+    # scaled by num_ratings / (num_ratings + RATING_PRIOR) so that a 5.0 from
+    # three readers does not outrank a 4.2 from thousands
+    RATING_WEIGHT = 0.5
+    RATING_PRIOR = 50
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                author TEXT NOT NULL,
+                rating REAL,
+                num_ratings INTEGER,
+                record TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author, content='books', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS books_ai AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+            END;
+            CREATE TRIGGER IF NOT EXISTS books_ad AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author)
+                VALUES ('delete', old.id, old.title, old.author);
+            END;
+            CREATE TRIGGER IF NOT EXISTS books_au AFTER UPDATE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author)
+                VALUES ('delete', old.id, old.title, old.author);
+                INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+            END;
+            """
+        )
+
+    def add_books(self, items: list) -> int:
+        """
+        Upsert books (any scraper's shape) in one transaction. Fields a new
+        record leaves empty keep their indexed value. Returns how many
+        were written.
+        """
+        books = [_as_book(item) for item in items if isinstance(item, dict)]
+        books = [book for book in books if book["title"] and book["url"]]
+        if not books:
+            return 0
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for book in books:
+                key = _book_key(book["url"])
+                row = conn.execute("SELECT record FROM books WHERE key=?", (key,)).fetchone()
+                record = json.loads(row[0]) if row else dict(book)
+                record.update({name: value for name, value in book.items() if value})
+                conn.execute(
+                    """
+                    INSERT INTO books (key, title, author, rating, num_ratings, record, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        title=excluded.title, author=excluded.author,
+                        rating=excluded.rating, num_ratings=excluded.num_ratings,
+                        record=excluded.record, updated_at=excluded.updated_at
+                    """,
+                    (
+                        key,
+                        record.get("title", ""),
+                        record.get("author") or "",
+                        _to_float(record.get("rating")),
+                        _to_int(record.get("num_ratings")),
+                        json.dumps(record, ensure_ascii=False),
+                        time.time(),
+                    ),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(books)
+
+    def add_search_page(self, strategy: str, payload) -> int:
+        """Index the books of one search cache page (other strategies are ignored)."""
+        if strategy not in INDEXED_STRATEGIES:
+            return 0
+        return self.add_books(_books_in(payload))
+
+    def add_book_detail(self, details: dict) -> int:
+        return self.add_books([detail_as_book(details)])
+
+    def search(self, query: str, page: int = 1, sort_by: str = "relevance") -> dict:
+        """
+        One page of local results: {"books", "hits", "last_page"}.
+        sort_by "top rated" orders by rating; anything else by relevance.
+        """
+        match = fts_query(query)
+        if not match:
+            return {"books": [], "hits": 0, "last_page": 1}
+
+        conn = self._connect()
+        hits = conn.execute(
+            "SELECT COUNT(*) FROM books_fts WHERE books_fts MATCH ?", (match,)
+        ).fetchone()[0]
+
+        relevance = f"bm25(books_fts, {self.TITLE_WEIGHT}, {self.AUTHOR_WEIGHT})"
+        votes = "COALESCE(books.num_ratings, 0)"
+        score = (
+            f"{relevance} - {self.RATING_WEIGHT} * COALESCE(books.rating, 0)"
+            f" * {votes} / ({votes} + {self.RATING_PRIOR}.0)"
+        )
+        if sort_by.lower() == "top rated":
+            order = f"COALESCE(books.rating, 0) DESC, COALESCE(books.num_ratings, 0) DESC, {score}"
+        else:
+            order = score
+        rows = conn.execute(
+            f"""
+            SELECT books.key, books.record FROM books_fts JOIN books ON books.id = books_fts.rowid
+            WHERE books_fts MATCH ? ORDER BY {order} LIMIT ? OFFSET ?
+            """,
+            (match, self.PAGE_SIZE, (page - 1) * self.PAGE_SIZE),
+        ).fetchall()
+
+        for key, _ in rows:
+            cache_manager.touch(CACHE_SOURCE, key)  # for the budget's LRU/LFU eviction
+        return {
+            "books": [json.loads(record) for _, record in rows],
+            "hits": hits,
+            "last_page": max(1, -(-hits // self.PAGE_SIZE)),
+        }
+
+    def entries(self) -> list:
+        """(key, bytes, last update) of every indexed book, for the cache budget."""
+        return self._connect().execute(
+            "SELECT key, LENGTH(record) + LENGTH(title) + LENGTH(author), updated_at FROM books"
+        ).fetchall()
+
+    def delete_books(self, keys: list):
+        """Drop books from the index (the FTS rows go with them through the trigger)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM books WHERE key = ?", [(key,) for key in keys])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    def rebuild(self) -> dict:
+        """
+        Re-ingest everything in the search cache and the book detail cache.
+        Safe to re-run: rows are upserted.
+        """
+        # Imported here: search_cache and book_details index what they write through this module
+        from services.openlibrary.book_details import iter_cached_details
+        from services.openlibrary.search_cache import get_search_cache
+
+        counts = {"search_pages": 0, "book_details": 0}
+        for strategy, payload in get_search_cache().iter_pages(INDEXED_STRATEGIES):
+            self.add_search_page(strategy, payload)
+            counts["search_pages"] += 1
+
+        for details in iter_cached_details():
+            self.add_book_detail(details)
+            counts["book_details"] += 1
+
+        counts["books"] = self.count()
+        return counts
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_book_index() -> BookIndex:
+    """Return the process-wide book index, creating it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = BookIndex()
+    return _index
+
+
+def index_search_page(strategy: str, payload):
+    """Called for every search cache write; indexing never breaks caching."""
+    try:
+        get_book_index().add_search_page(strategy, payload)
+    except Exception as e:
+        print(f"[BookIndex] Failed to index {strategy} page: {e}")
+
+
+def index_book_detail(details: dict):
+    """Called for every book detail cache write; indexing never breaks caching."""
+    try:
+        get_book_index().add_book_detail(details)
+    except Exception as e:
+        print(f"[BookIndex] Failed to index book detail: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local full-text index of scraped books.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Index everything in the search and book detail caches.")
+    search = commands.add_parser("search", help="Query the index.")
+    search.add_argument("query")
+    search.add_argument("--page", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(json.dumps(get_book_index().rebuild(), indent=2))
+    else:
+        started = time.perf_counter()
+        result = get_book_index().search(args.query, page=args.page)
+        result["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
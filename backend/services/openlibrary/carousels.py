@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+
+from services.browser_pool import browser_pool
+from services.openlibrary.http_client import get_http_client
+
+BASE_URL = "https://openlibrary.org"
+
+# Set to 0 on nodes without Chrome: an unusable partial then fails the fetch
+SELENIUM_FALLBACK = os.getenv("CAROUSEL_SELENIUM_FALLBACK", "1") != "0"
+
+_metrics_lock = threading.Lock()
+_metrics = {"http": 0, "selenium_fallback": 0, "empty": 0}
+
+
+def empty_carousels() -> dict:
+    return {"you_might_also_like": [], "more_by_author": []}
+
+
+def _carousel_key(header_text: str):
+    header_text = header_text.strip().lower()
+    if "you might also like" in header_text:
+        return "you_might_also_like"
+    if "more by" in header_text:
+        return "more_by_author"
+    return None
+
+
+def parse_carousels(html: str, base_url: str = BASE_URL):
+    """
+    Parse book-detail carousel markup (<div class="carousel-section"> blocks)
+    into {"you_might_also_like": [...], "more_by_author": [...]}, each card as
+    {"image_src", "title", "book_url", "read_url"} with absolute URLs, like
+    the browser reports them. Returns None when there is no carousel markup.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    sections = soup.select("div.carousel-section")
+    if not sections:
+        return None
+
+    carousels = empty_carousels()
+    for section in sections:
+        header = section.find("h2")
+        key = _carousel_key(header.get_text(" ", strip=True)) if header else None
+        if not key:
+            continue
+        cards = []
+        for card in section.select("div.book"):
+            img = card.find("img")
+            link = card.find("a", href=True)
+            if not img or not link:
+                continue
+            # Carousel covers are lazy-loaded: the real URL is in data-lazy
+            src = img.get("data-lazy") or img.get("src")
+            read_button = card.select_one(".cta-btn[href]")
+            cards.append({
+                "image_src": urljoin(base_url, src) if src else None,
+                "title": img.get("title"),
+                "book_url": urljoin(base_url, link["href"]),
+                "read_url": urljoin(base_url, read_button["href"]) if read_button else None,
+            })
+        carousels[key] = cards
+    return carousels
+
+
+def carousel_partial_url(book_url: str, work_id: str) -> str:
+    """
+    URL of the RelatedWorkCarousel partial of a work. Book pages load their
+    carousels from this JSON endpoint with JS after the first paint, which
+    is why the browser had to wait for them.
+    """
+    parts = urlsplit(book_url)
+    return f"{parts.scheme}://{parts.netloc}/partials.json?" + urlencode(
+        {"_component": "RelatedWorkCarousel", "workid": work_id}
+    )
+
+
+def fetch_carousels_http(book_url: str, work_id: str):
+    """
+    Carousels over the pooled HTTP client: no browser, one small JSON request.
+    None when the partial has no carousel markup.
+    """
+    response = get_http_client().get(carousel_partial_url(book_url, work_id))
+    response.raise_for_status()
+    payload = response.json()
+    # {"0": "<html>", ...}: the rendered carousels, in page order
+    html = "".join(part for part in payload.values() if isinstance(part, str))
+    parts = urlsplit(book_url)
+    return parse_carousels(html, f"{parts.scheme}://{parts.netloc}")
+
+
+def fetch_carousels_selenium(book_url: str) -> dict:
+    """Render the book page in a pooled browser and read the carousels from the DOM."""
+    carousels = empty_carousels()
+    with browser_pool.browser() as driver:
+        driver.get(book_url)
+        time.sleep(8)
+
+        for section in driver.find_elements(By.CLASS_NAME, "carousel-section"):
+            try:
+                key = _carousel_key(section.find_element(By.TAG_NAME, "h2").text)
+                if not key:
+                    continue
+                section_data = []
+                for card in section.find_elements(By.CSS_SELECTOR, "div.book"):
+                    try:
+                        img = card.find_element(By.TAG_NAME, "img")
+                        read_button = card.find_elements(By.CSS_SELECTOR, ".cta-btn")
+                        section_data.append({
+                            "image_src": img.get_attribute("src"),
+                            "title": img.get_attribute("title"),
+                            "book_url": card.find_element(By.TAG_NAME, "a").get_attribute("href"),
+                            "read_url": read_button[0].get_attribute("href") if read_button else None,
+                        })
+                    except Exception as e:
+                        print(f"[WARN] Error extracting one card: {e}")
+                carousels[key] = section_data
+            except Exception as e:
+                print(f"[WARN] Error processing a section: {e}")
+    return carousels
+
+
+def fetch_carousels(book_url: str, work_id: str = None):
+    """
+    "You might also like" and "More by author" of a book page. Plain HTTP
+    first; the browser is only launched when the partial fails or has no
+    carousels. Without SELENIUM_FALLBACK that is None instead, so that a
+    transient failure is not cached as a book without carousels.
+    """
+    carousels = None
+    if work_id:
+        try:
+            carousels = fetch_carousels_http(book_url, work_id)
+        except Exception as e:
+            print(f"[Carousels] HTTP partial failed ({e})")
+
+    if carousels is not None:
+        _count("http")
+        return carousels
+
+    if not SELENIUM_FALLBACK:
+        _count("empty")
+        return None
+
+    print(f"[Carousels] Fetching with pooled browser: {book_url}")
+    _count("selenium_fallback")
+    carousels = fetch_carousels_selenium(book_url)
+    if not any(carousels.values()):
+        _count("empty")
+    return carousels
+
+
+def _count(key: str):
+    with _metrics_lock:
+        _metrics[key] += 1
+
+
+def carousel_stats() -> dict:
+    with _metrics_lock:
+        return dict(_metrics)
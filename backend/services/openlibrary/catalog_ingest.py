@@ -0,0 +1,176 @@
+import codecs
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+BASE_URL = "https://openlibrary.org"
+CHUNK_SIZE = 64 * 1024
+# A JSON array record that does not parse within this many characters is malformed
+MAX_RECORD_CHARS = 16 * 1024 * 1024
+
+_WORK_KEY = re.compile(r"(OL\d+W)")
+_YEAR = re.compile(r"\b(\d{4})\b")
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+
+# ---------------------------------------------------------------------------
+# Streaming readers: one record at a time, whatever the size of the input
+# ---------------------------------------------------------------------------
+
+def iter_records(path, offset: int = 0):
+    """
+    Yield (byte offset after the record, record) for every record of a JSONL
+    file (e.g. from the harvester) or of a JSON array file (e.g. the indented
+    dumps fetch_openlibrary_books.py used to write). Only one record and one
+    read chunk are in memory at a time. Pass a yielded offset back as
+    `offset` to resume right after that record.
+    """
+    with open(path, "rb") as f:
+        if _first_byte(f) == b"[":
+            yield from _iter_array(f, offset)
+        else:
+            yield from _iter_lines(f, offset)
+
+
+def _first_byte(f) -> bytes:
+    while True:
+        byte = f.read(1)
+        if not byte or not byte.isspace():
+            f.seek(0)
+            return byte
+
+
+def _iter_lines(f, offset: int):
+    f.seek(offset)
+    for line in iter(f.readline, b""):
+        if line.strip():
+            yield f.tell(), json.loads(line)
+
+
+def _iter_array(f, offset: int):
+    if offset:
+        f.seek(offset)
+        position = offset
+    else:
+        position = f.read(CHUNK_SIZE).index(b"[") + 1
+        f.seek(position)
+
+    decoder = json.JSONDecoder()
+    # Incremental, so a multi-byte character split across two chunks is not an error
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, start, eof = "", 0, False
+    while True:
+        while start < len(buffer) and buffer[start] in _ARRAY_SEPARATORS:
+            start += 1
+            position += 1  # separators are one byte each
+        if buffer.startswith("]", start):
+            return
+        try:
+            if start == len(buffer):
+                raise ValueError("need more input")
+            record, end = decoder.raw_decode(buffer, start)
+        except ValueError:
+            if eof:
+                if buffer[start:]:
+                    raise ValueError(f"Truncated JSON array at byte {position}")
+                return
+            if len(buffer) - start > MAX_RECORD_CHARS:
+                raise ValueError(f"Malformed JSON array record at byte {position}")
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer, start = buffer[start:] + utf8.decode(chunk, final=eof), 0
+            continue
+        position += len(buffer[start:end].encode("utf-8"))
+        start = end
+        yield position, record
+
+
+# ---------------------------------------------------------------------------
+# OpenLibrary work -> LibraryItem fields
+# ---------------------------------------------------------------------------
+
+def _year(value):
+    if isinstance(value, int):
+        return value
+    match = _YEAR.search(str(value or ""))
+    return int(match.group(1)) if match else None
+
+
+def _author_names(record: dict) -> list:
+    # Search docs have author_name; work JSON has authors, with names when enriched
+    if record.get("author_name"):
+        return [str(name) for name in record["author_name"]]
+    names = []
+    for author in record.get("authors") or []:
+        if isinstance(author, dict):
+            name = author.get("name") or (author.get("author") or {}).get("name")
+            if name:
+                names.append(name)
+        elif isinstance(author, str):
+            names.append(author)
+    return names
+
+
+def catalog_row(record: dict):
+    """
+    LibraryItem fields for one OpenLibrary work (work JSON or search doc),
+    or None when it has no work key or title. A work without a publication
+    year gets today's date, as in LibraryItemFactory.create_item.
+    """
+    if not isinstance(record, dict):
+        return None
+    match = _WORK_KEY.search(str(record.get("key") or ""))
+    title = " ".join(str(record.get("title") or "").split())
+    if not match or not title:
+        return None
+
+    key = match.group(1)
+    year = _year(record.get("first_publish_year") or record.get("first_publish_date"))
+    subjects = record.get("subjects") or record.get("subject") or []
+    return {
+        "openlibrary_key": key,
+        "title": title[:255],
+        "authors": (", ".join(_author_names(record)) or "Unknown")[:255],
+        "publication_date": date(year, 1, 1) if year and 1 <= year <= date.today().year else date.today(),
+        "genre": str(subjects[0] if subjects else "General")[:100],
+        "digital_source": f"{BASE_URL}/works/{key}",
+    }
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+class IngestCheckpoint:
+    """
+    Progress of one input file: the byte offset after the last committed
+    batch and the running counters. Written atomically after every batch,
+    so a crashed load resumes after the last committed batch (re-running a
+    batch is harmless, rows are deduplicated on the OpenLibrary key).
+    """
+
+    def __init__(self, path, input_path):
+        self.path = Path(path)
+        self.input_path = str(Path(input_path).resolve())
+
+    def load(self) -> dict:
+        """Saved progress for this input, or a fresh start."""
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            state = {}
+        if state.get("input") != self.input_path or state.get("offset", 0) > os.path.getsize(self.input_path):
+            state = {}
+        return {"input": self.input_path, "offset": 0, "records": 0, "inserted": 0,
+                "duplicates": 0, "skipped": 0, **state}
+
+    def save(self, state: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from filelock import FileLock, Timeout
+
+LOCK_DIR = (
+    Path(__file__).resolve().parent.parent.parent
+    / "data_cache"
+    / "openlibrary"
+    / "locks"
+)
+
+
+class RequestCoalescer:
+    """
+    Collapses concurrent identical searches into a single upstream fetch.
+
+    Keys are built from (strategy, query, sort, page). For one key:
+      - Inside a process, the first caller becomes the leader and runs the
+        fetch; every concurrent caller waits on the leader's Future and gets
+        the same result (or the same exception).
+      - Across gunicorn workers, leaders serialize on a per-key file lock.
+        The fetch function must check the shared cache first, so a worker
+        that got the lock after another worker filled the cache returns the
+        cached result instead of scraping again.
+    If the file lock cannot be taken within LOCK_TIMEOUT the fetch runs anyway,
+    so a stuck worker can only cost a duplicate fetch, never a hung request.
+    """
+
+    LOCK_TIMEOUT = 60  # seconds
+
+    def __init__(self, lock_dir: Path = LOCK_DIR):
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._guard = threading.Lock()
+        self._inflight = {}  # key -> Future of the leader
+        self.metrics = {"leaders": 0, "followers": 0, "lock_timeouts": 0}
+
+    def run(self, key: str, fetch: Callable[[], object]):
+        with self._guard:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.metrics["leaders"] += 1
+            else:
+                self.metrics["followers"] += 1
+
+        if not leader:
+            print(f"[Coalesce] Waiting for in-flight fetch: {key}")
+            return future.result()
+
+        try:
+            with self.lock(key):
+                result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._guard:
+                self._inflight.pop(key, None)
+
+    async def arun(self, key: str, fetch: Callable[[], Awaitable[object]]):
+        """
+        Async version of run(). Shares the in-flight table with run(), so sync
+        and async callers of the same key are coalesced together.
+        """
+        with self._guard:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.metrics["leaders"] += 1
+            else:
+                self.metrics["followers"] += 1
+
+        if not leader:
+            print(f"[Coalesce] Waiting for in-flight fetch: {key}")
+            return await asyncio.wrap_future(future)
+
+        try:
+            async with self.alock(key):
+                result = await fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._guard:
+                self._inflight.pop(key, None)
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Exclusive section for `key` across threads and worker processes.
+        Used directly by background jobs (e.g. page prefetch) that should not
+        race a request for the same page.
+        """
+        # A fresh FileLock per call: each holds its own file descriptor, so the
+        # OS lock also excludes other threads of this process.
+        file_lock = FileLock(str(self._lock_path(key)))
+        try:
+            file_lock.acquire(timeout=self.LOCK_TIMEOUT)
+        except Timeout:
+            print(f"[Coalesce] Lock timeout, fetching without it: {key}")
+            self.metrics["lock_timeouts"] += 1
+            yield
+            return
+        try:
+            yield
+        finally:
+            file_lock.release()
+
+    @asynccontextmanager
+    async def alock(self, key: str):
+        """Async version of lock(); waiting for the file lock holds no event loop time."""
+        # Not thread-local: acquired on a worker thread, released on the loop thread
+        file_lock = FileLock(str(self._lock_path(key)), thread_local=False)
+        try:
+            await asyncio.to_thread(file_lock.acquire, timeout=self.LOCK_TIMEOUT)
+        except Timeout:
+            print(f"[Coalesce] Lock timeout, fetching without it: {key}")
+            self.metrics["lock_timeouts"] += 1
+            yield
+            return
+        try:
+            yield
+        finally:
+            file_lock.release()
+
+    def _lock_path(self, key: str) -> Path:
+        # Striped over 4096 files so the lock directory stays bounded
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.lock_dir / f"{digest[:3]}.lock"
+
+    def stats(self) -> dict:
+        with self._guard:
+            return {**self.metrics, "in_flight": len(self._inflight)}
+
+
+search_coalescer = RequestCoalescer()
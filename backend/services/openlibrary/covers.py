@@ -0,0 +1,207 @@
+"""
+Cover proxy.
+
+Scraped records link covers on covers.openlibrary.org, as full JPEGs the
+browser has to fetch from a third-party origin and scale down itself.
+CoverProxy serves them from our origin instead: fetched on first request,
+resized to one of a few standard thumbnail sizes, re-encoded as WebP and
+kept in the "covers" cache source, so every later request is a file read.
+
+The scraper endpoints rewrite their responses to point at the proxy
+(proxy_cover_urls) when they answer, not when they scrape: cached records
+keep the upstream URLs, which stay valid if the proxy is turned off.
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+import zlib
+
+from PIL import Image, UnidentifiedImageError
+
+from services.cache_manager import cache_manager
+from services.openlibrary.http_client import get_http_client
+
+ORIGIN = os.getenv("COVER_ORIGIN", "https://covers.openlibrary.org")
+# Set to 0 to hand out the upstream URLs unchanged
+ENABLED = os.getenv("COVER_PROXY", "1") != "0"
+
+CACHE_SOURCE = "covers"
+# Longest side in pixels; never upscaled
+SIZES = {"s": 96, "m": 240, "l": 480}
+DEFAULT_SIZE = "m"
+WEBP_QUALITY = 80
+
+KINDS = ("a", "b")  # author photos, book covers
+KEY_TYPES = ("id", "olid", "isbn")
+_VALUE = re.compile(r"[A-Za-z0-9]{1,20}")
+COVER_URL = re.compile(
+    r"(?:https?:)?//covers\.openlibrary\.org/(?P<kind>[ab])/(?P<key_type>id|olid|isbn)/"
+    r"(?P<value>[A-Za-z0-9]+)-(?P<size>[SML])\.jpg(?:\?.*)?"
+)
+COVER_FIELDS = ("imgSrc", "image_src")
+LOCK_STRIPES = 64
+
+
+class CoverNotFound(Exception):
+    """Upstream has no cover for the key."""
+
+
+class CoverProxy:
+    def __init__(self, origin: str = ORIGIN, cache=cache_manager):
+        self.origin = origin.rstrip("/")
+        self.cache = cache
+        # Striped by cover, so memory stays bounded; reentrant because a
+        # size is rendered from the "l" rendition of the same cover
+        self._locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._metrics_lock = threading.Lock()
+        self._metrics = {"hits": 0, "resized": 0, "fetched": 0, "not_found": 0, "errors": 0}
+
+    @staticmethod
+    def validate(kind: str, key_type: str, value: str, size: str):
+        """Raise ValueError unless the arguments name a cover of ours."""
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if key_type not in KEY_TYPES:
+            raise ValueError(f"key type must be one of {', '.join(KEY_TYPES)}")
+        if not _VALUE.fullmatch(value or ""):
+            raise ValueError("invalid cover key")
+        if size not in SIZES:
+            raise ValueError(f"size must be one of {', '.join(SIZES)}")
+
+    @staticmethod
+    def cache_key(kind: str, key_type: str, value: str, size: str) -> str:
+        return f"{kind}-{key_type}-{value}-{size}.webp"
+
+    def upstream_url(self, kind: str, key_type: str, value: str) -> str:
+        # default=false: a 404 instead of a blank placeholder image
+        return f"{self.origin}/{kind}/{key_type}/{value}-L.jpg?default=false"
+
+    def cover(self, kind: str, key_type: str, value: str, size: str = DEFAULT_SIZE) -> bytes:
+        """
+        WebP thumbnail of a cover. Raises ValueError for invalid arguments,
+        CoverNotFound when upstream has no such cover and requests /
+        PIL errors when it cannot be fetched or decoded.
+        """
+        self.validate(kind, key_type, value, size)
+        key = self.cache_key(kind, key_type, value, size)
+        data = self.cache.read_bytes(CACHE_SOURCE, key)
+        if data is not None:
+            self._count("hits")
+            return data
+
+        with self._lock(kind, key_type, value):
+            # Another thread may have rendered it while we waited
+            data = self.cache.read_bytes(CACHE_SOURCE, key)
+            if data is not None:
+                self._count("hits")
+                return data
+            data = self._render(self._source(kind, key_type, value, size), SIZES[size])
+            self.cache.write_bytes(CACHE_SOURCE, key, data)
+            self._count("resized")
+            return data
+
+    def _source(self, kind: str, key_type: str, value: str, size: str) -> Image.Image:
+        """
+        Image to resize: the upstream JPEG for "l", our cached "l" rendition
+        for the smaller sizes, so upstream is fetched once per cover.
+        """
+        if size == "l":
+            data = self._fetch(kind, key_type, value)
+        else:
+            data = self.cover(kind, key_type, value, "l")
+        try:
+            return Image.open(io.BytesIO(data))
+        except UnidentifiedImageError:
+            self._count("errors")
+            raise
+
+    def _fetch(self, kind: str, key_type: str, value: str) -> bytes:
+        try:
+            response = get_http_client().get(self.upstream_url(kind, key_type, value))
+            if response.status_code == 404:
+                self._count("not_found")
+                raise CoverNotFound(f"{kind}/{key_type}/{value}")
+            response.raise_for_status()
+        except CoverNotFound:
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        self._count("fetched")
+        return response.content
+
+    @staticmethod
+    def _render(image: Image.Image, longest_side: int) -> bytes:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((longest_side, longest_side), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+        return out.getvalue()
+
+    def _lock(self, kind: str, key_type: str, value: str) -> threading.RLock:
+        """Lock of a cover's renders; a thread only ever holds one stripe."""
+        return self._locks[zlib.crc32(f"{kind}/{key_type}/{value}".encode()) % LOCK_STRIPES]
+
+    def _count(self, key: str):
+        with self._metrics_lock:
+            self._metrics[key] += 1
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            return {"enabled": ENABLED, **self._metrics}
+
+
+cover_proxy = CoverProxy()
+
+
+def etag(data: bytes) -> str:
+    return '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `tag`: "*", or one of its
+    comma-separated entity tags, compared weakly (W/ prefixes ignored).
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate and candidate == tag:
+            return True
+    return False
+
+
+def proxy_cover_url(url, base: str):
+    """
+    URL of `url` on the proxy mounted at `base` (ending in "/"), or `url`
+    itself when it is not a covers.openlibrary.org cover. Upstream S/M/L
+    map to our s/m/l.
+    """
+    if not isinstance(url, str):
+        return url
+    match = COVER_URL.fullmatch(url)
+    if not match:
+        return url
+    return f"{base}{match['kind']}/{match['key_type']}/{match['value']}?size={match['size'].lower()}"
+
+
+def proxy_cover_urls(data, base: str):
+    """
+    Copy of a JSON-like response with the cover URLs of every imgSrc /
+    image_src key pointing at the proxy. Cached data passed in is never
+    modified.
+    """
+    if isinstance(data, dict):
+        return {
+            key: proxy_cover_url(value, base) if key in COVER_FIELDS else proxy_cover_urls(value, base)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [proxy_cover_urls(item, base) for item in data]
+    return data
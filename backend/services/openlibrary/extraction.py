@@ -0,0 +1,240 @@
+"""
+Declarative HTML extraction.
+
+A spec maps result names to Fields: a CSS selector and what to read from the
+matching element (its cleaned text, an attribute, a function of it, or a
+nested spec evaluated inside it). The spec is compiled once, at import time,
+into per-tag dispatch tables; extraction is then one walk over an lxml tree
+in document order, with no selector query per field and no ancestor
+lookups (descendant combinators are resolved from the open elements).
+
+Supported selectors: tag, #id, .class, [attr], [attr='v'], [attr^='v'] and
+[attr~='v'], chained with descendant combinators and grouped with commas.
+Single-valued fields take the first match in document order, like
+select_one(); many=True fields take every match, like select().
+"""
+
+import re
+
+from lxml import etree
+
+_COMPOUND = re.compile(r"(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)")
+_PART = re.compile(
+    r"#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)"
+    r"|\[(?P<attr>[\w-]+)(?:(?P<op>[~^]?=)'(?P<value>[^']*)')?\]"
+)
+_TEXT_NODES = etree.XPath(".//text()", smart_strings=False)  # like get_text(): no comments
+
+
+def text(el) -> str:
+    return "".join(_TEXT_NODES(el))
+
+
+def clean_text(el) -> str:
+    """Text of `el` with whitespace runs collapsed."""
+    return " ".join(text(el).split())
+
+
+def parse_html(html: str):
+    """Root element of `html` (None for an empty page)."""
+    if not html.strip():
+        return None
+    try:
+        return etree.HTML(html)
+    except ValueError:
+        # str input with an XML encoding declaration must go in as bytes
+        return etree.HTML(html.encode("utf-8"))
+
+
+class _Compound:
+    """One compound selector, e.g. div#editions.book[itemprop='x']."""
+
+    def __init__(self, source: str):
+        match = _COMPOUND.fullmatch(source)
+        if not match or not source:
+            raise ValueError(f"Unsupported selector: {source!r}")
+        self.tag = None if match["tag"] in (None, "*") else match["tag"].lower()
+        self.id = None
+        self.classes = set()
+        self.attrs = []  # (name, op, value)
+        for part in _PART.finditer(match["rest"]):
+            if part["id"]:
+                self.id = part["id"]
+            elif part["cls"]:
+                self.classes.add(part["cls"])
+            else:
+                self.attrs.append((part["attr"], part["op"], part["value"]))
+
+    def matches(self, el) -> bool:
+        if self.tag and el.tag != self.tag:
+            return False
+        if self.id and el.get("id") != self.id:
+            return False
+        if self.classes and not self.classes.issubset(el.get("class", "").split()):
+            return False
+        for name, op, value in self.attrs:
+            actual = el.get(name)
+            if actual is None:
+                return False
+            if op == "=" and actual != value:
+                return False
+            if op == "^=" and not actual.startswith(value):
+                return False
+            if op == "~=" and value not in actual.split():
+                return False
+        return True
+
+
+class Selector:
+    """
+    A descendant chain of compound selectors. The ancestor part of the
+    chain is not looked up per element: the walk keeps count of the open
+    elements matching each chain prefix (see _PrefixTracker).
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        parts = source.split()
+        if not parts:
+            raise ValueError("Empty selector")
+        self.chain = [_Compound(part) for part in parts]
+        self.tag = self.chain[-1].tag
+        # e.g. "table#editions tr" for "table#editions tr td.book"
+        self.prefixes = [" ".join(parts[: k + 1]) for k in range(len(parts) - 1)]
+        self.ancestors = self.prefixes[-1] if self.prefixes else None
+
+    def matches(self, el, open_prefixes: dict) -> bool:
+        if not self.chain[-1].matches(el):
+            return False
+        return self.ancestors is None or open_prefixes.get(self.ancestors, 0) > 0
+
+
+class _PrefixTracker:
+    """Which chain prefixes (e.g. "table#editions tr") an element opens."""
+
+    def __init__(self, selectors: list):
+        self._by_tag = {}  # tag -> [(prefix, last compound, parent prefix)]
+        self._any_tag = []
+        seen = set()
+        for selector in selectors:
+            for k, prefix in enumerate(selector.prefixes):
+                if prefix in seen:
+                    continue
+                seen.add(prefix)
+                compound = selector.chain[k]
+                entry = (prefix, compound, selector.prefixes[k - 1] if k else None)
+                (self._any_tag if compound.tag is None else self._by_tag.setdefault(compound.tag, [])).append(entry)
+
+    def opened_by(self, el, open_prefixes: dict) -> list:
+        opened = []
+        for prefix, compound, parent in self._by_tag.get(el.tag, ()):
+            if compound.matches(el) and (parent is None or open_prefixes.get(parent, 0) > 0):
+                opened.append(prefix)
+        for prefix, compound, parent in self._any_tag:
+            if compound.matches(el) and (parent is None or open_prefixes.get(parent, 0) > 0):
+                opened.append(prefix)
+        return opened
+
+
+class Field:
+    """
+    One named value of a spec.
+
+    - default: the element's cleaned text
+    - attr="src": that attribute (None if missing)
+    - value=fn: fn(element)
+    - fields={...}: a nested spec evaluated on the element's descendants;
+      the value is the dict of its results
+    """
+
+    def __init__(self, selector: str, attr: str = None, value=None, many: bool = False, fields: dict = None):
+        self.selectors = [Selector(part.strip()) for part in selector.split(",")]
+        self.attr = attr
+        self.value = value
+        self.many = many
+        self.spec = ExtractionSpec(fields) if fields else None
+
+    def matches(self, el, open_prefixes: dict) -> bool:
+        return any(selector.matches(el, open_prefixes) for selector in self.selectors)
+
+    def read(self, el):
+        if self.value:
+            return self.value(el)
+        if self.attr:
+            return el.get(self.attr)
+        return clean_text(el)
+
+
+class ExtractionSpec:
+    """A compiled {name: Field} spec; extract(root) evaluates it in one walk."""
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self._by_tag = {}  # tag -> [(name, field)], in spec order
+        self._any_tag = []
+        for name, field in fields.items():
+            for tag in {selector.tag for selector in field.selectors}:
+                (self._any_tag if tag is None else self._by_tag.setdefault(tag, [])).append((name, field))
+        # Fields with a tagless selector apply to every tag
+        for tag, candidates in self._by_tag.items():
+            candidates.extend(pair for pair in self._any_tag if pair not in candidates)
+        self._prefixes = _PrefixTracker(self._selectors())
+
+    def _selectors(self) -> list:
+        """Selectors of this spec and every nested one."""
+        selectors = []
+        for field in self.fields.values():
+            selectors.extend(field.selectors)
+            if field.spec:
+                selectors.extend(field.spec._selectors())
+        return selectors
+
+    def empty_result(self) -> dict:
+        return {name: [] if field.many else None for name, field in self.fields.items()}
+
+    def _candidates(self, tag: str) -> list:
+        return self._by_tag.get(tag, self._any_tag)
+
+    def extract(self, root) -> dict:
+        result = self.empty_result()
+        if root is None:
+            return result
+        # Active specs: (spec, its results, element whose subtree it covers, names set)
+        scopes = [(self, result, root, set())]
+        open_prefixes = {}  # chain prefix -> open elements matching it
+        opened_stack = []  # prefixes opened by each open element
+        for event, el in etree.iterwalk(root, events=("start", "end")):
+            if not isinstance(el.tag, str):
+                continue  # comment or processing instruction
+            if event == "end":
+                for prefix in opened_stack.pop():
+                    open_prefixes[prefix] -= 1
+                while len(scopes) > 1 and scopes[-1][2] is el:
+                    scopes.pop()
+                continue
+
+            opened = []
+            for spec, values, scope_root, filled in scopes:
+                if el is scope_root:
+                    continue
+                for name, field in spec._candidates(el.tag):
+                    if name in filled or not field.matches(el, open_prefixes):
+                        continue
+                    if field.spec:
+                        value = field.spec.empty_result()
+                        opened.append((field.spec, value, el, set()))
+                    else:
+                        value = field.read(el)
+                    if field.many:
+                        values[name].append(value)
+                    else:
+                        values[name] = value
+                        filled.add(name)
+            scopes.extend(opened)
+
+            # Only descendants see this element as an ancestor
+            prefixes = self._prefixes.opened_by(el, open_prefixes)
+            for prefix in prefixes:
+                open_prefixes[prefix] = open_prefixes.get(prefix, 0) + 1
+            opened_stack.append(prefixes)
+        return result
@@ -0,0 +1,126 @@
+import json
+import threading
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from services.browser_pool import browser_pool
+from services.openlibrary.http_client import get_http_client
+
+BASE_URL = "https://openlibrary.org"
+
+_metrics_lock = threading.Lock()
+_metrics = {"http": 0, "selenium_fallback": 0, "empty": 0}
+
+
+def parse_facets(html: str, base_url: str = BASE_URL) -> dict:
+    """
+    Parse OpenLibrary facet markup into the `sidebar_info` shape:
+        {facet_name: [{"label": str, "count": int | str, "url": str}, ...]}
+    """
+    soup = BeautifulSoup(html, "lxml")
+    sidebar_info = {}
+    facet_groups = soup.find_all(
+        "div", class_=lambda x: x and x.startswith("facet")
+    )
+
+    for group in facet_groups:
+        header = group.find("h4", class_="facetHead")
+        if not header:
+            continue
+        facet_name = header.get_text(strip=True)
+        entries = []
+        for entry in group.find_all("div", class_="facetEntry"):
+            a_tag = entry.find("a", href=True)
+            label_tag = entry.find("span", class_="small")
+            count_tag = entry.find("span", class_="smaller")
+
+            if a_tag and label_tag and count_tag:
+                label = label_tag.get_text(strip=True)
+                count_text = count_tag.get_text(strip=True)
+                try:
+                    count = int(count_text)
+                except ValueError:
+                    count = count_text
+
+                relative_url = a_tag["href"]
+                full_url = urljoin(base_url, relative_url)
+
+                entries.append({"label": label, "count": count, "url": full_url})
+        sidebar_info[facet_name] = entries
+    return sidebar_info
+
+
+def facets_partial_url(search_url: str) -> str:
+    """
+    URL of the SearchFacets partial for a search page URL. The search page
+    loads its sidebar from this JSON endpoint with JS after the first paint,
+    which is why the browser had to wait for it.
+    """
+    parts = urlsplit(search_url)
+    param = {key: values[0] for key, values in parse_qs(parts.query).items()}
+    data = {"param": param, "path": parts.path, "query": f"?{parts.query}"}
+    return f"{parts.scheme}://{parts.netloc}/partials.json?" + urlencode(
+        {"_component": "SearchFacets", "data": json.dumps(data, separators=(",", ":"))}
+    )
+
+
+def fetch_facets_http(search_url: str) -> dict:
+    """Facets over the pooled HTTP client: no browser, one small JSON request."""
+    response = get_http_client().get(facets_partial_url(search_url))
+    response.raise_for_status()
+    return parse_facets(response.json().get("sidebar", ""))
+
+
+def fetch_facets_selenium(search_url: str) -> dict:
+    """Render the search page in a pooled browser and read the sidebar from the DOM."""
+    with browser_pool.browser() as driver:
+        driver.get(search_url)
+        try:
+            # Wait up to 10 seconds for at least one facet to appear.
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, "div.facet h4.facetHead")
+                )
+            )
+        except Exception as e:
+            print("[Sidebar] Timeout or error waiting for facet head:", e)
+
+        html = driver.page_source
+    return parse_facets(html)
+
+
+def fetch_sidebar_info(search_url: str) -> dict:
+    """
+    Sidebar facets for a search page URL. Plain HTTP first; the browser is
+    only launched when the partial fails or comes back without facets.
+    """
+    try:
+        sidebar_info = fetch_facets_http(search_url)
+    except Exception as e:
+        print(f"[Sidebar] HTTP facets failed ({e}), falling back to Selenium")
+        sidebar_info = {}
+
+    if sidebar_info:
+        _count("http")
+        return sidebar_info
+
+    print(f"[Sidebar] Fetching with pooled browser: {search_url}")
+    _count("selenium_fallback")
+    sidebar_info = fetch_facets_selenium(search_url)
+    if not sidebar_info:
+        _count("empty")
+    return sidebar_info
+
+
+def _count(key: str):
+    with _metrics_lock:
+        _metrics[key] += 1
+
+
+def facet_stats() -> dict:
+    with _metrics_lock:
+        return dict(_metrics)
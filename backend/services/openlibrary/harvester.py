@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import quote_plus
+
+import httpx
+
+from services.cache_manager import DATA_CACHE_DIR
+from services.openlibrary.http_client import AsyncOpenLibraryHTTPClient
+
+BASE_URL = "https://openlibrary.org"
+HARVEST_DIR = DATA_CACHE_DIR / "harvest"
+
+# Search doc fields kept with each work; work JSON has author keys but no names
+DOC_FIELDS = ("author_name", "first_publish_year", "subject", "edition_count")
+
+
+class TokenBucket:
+    """
+    Requests per second limit for asyncio: `rate` tokens are added per
+    second up to `capacity`, and every request takes one. Bursts are capped
+    at `capacity`; the long-run rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HarvestFrontier:
+    """
+    Persistent state of a harvest, in SQLite: every discovered work with its
+    status (pending, done, gone or failed), the search doc it was found by
+    and the ETag/Last-Modified of its last fetch, plus the next search page
+    to discover from. A harvest started again with the same frontier picks
+    up where the last one stopped.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS works (
+                work_id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                doc TEXT NOT NULL DEFAULT '{}',
+                etag TEXT,
+                last_modified TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS works_status ON works (status, seq);
+            CREATE TABLE IF NOT EXISTS harvest_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM harvest_meta WHERE key=?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO harvest_meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def add_works(self, docs: list) -> int:
+        """Queue newly discovered works (search docs); known works are left alone."""
+        seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM works").fetchone()[0]
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        for offset, doc in enumerate(docs, start=1):
+            self.conn.execute(
+                "INSERT OR IGNORE INTO works (work_id, seq, doc) VALUES (?, ?, ?)",
+                (
+                    doc["key"].rsplit("/", 1)[-1],
+                    seq + offset,
+                    json.dumps({field: doc[field] for field in DOC_FIELDS if field in doc}),
+                ),
+            )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def pending(self, limit: int) -> list:
+        """(work_id, doc, etag, last_modified) of the next pending works, in discovery order."""
+        rows = self.conn.execute(
+            "SELECT work_id, doc, etag, last_modified FROM works"
+            " WHERE status='pending' ORDER BY seq LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [(work_id, json.loads(doc), etag, modified) for work_id, doc, etag, modified in rows]
+
+    def mark(self, work_id: str, status: str, etag: str = None, last_modified: str = None):
+        self.conn.execute(
+            "UPDATE works SET status=?, etag=COALESCE(?, etag),"
+            " last_modified=COALESCE(?, last_modified), attempts=attempts+1, fetched_at=?"
+            " WHERE work_id=?",
+            (status, etag, last_modified, time.time(), work_id),
+        )
+
+    def requeue(self, statuses=("done", "failed")) -> int:
+        """Queue fetched works again; those with validators are re-fetched conditionally."""
+        marks = ",".join("?" * len(statuses))
+        return self.conn.execute(
+            f"UPDATE works SET status='pending', attempts=0 WHERE status IN ({marks})", statuses
+        ).rowcount
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM works GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+
+class HarvestHTTPClient(AsyncOpenLibraryHTTPClient):
+    """The async OpenLibrary client without its own retries: every attempt goes through the rate limit."""
+
+    RETRY_TOTAL = 0
+
+
+class CatalogHarvester:
+    """
+    Rate-limited, resumable harvest of OpenLibrary works into a JSONL file.
+
+    1. Discovery: search.json pages for `query` add work IDs to the frontier
+       until `target` works are known (the next page is persisted).
+    2. Fetch: `concurrency` workers fetch /works/{id}.json for the pending
+       works, every request (retries included) taking a token from a
+       `rate` per second TokenBucket. Works fetched before are requested
+       with If-None-Match/If-Modified-Since, so unchanged ones cost a 304
+       and no output.
+
+    Each fetched work is appended to the JSONL output as one line (work
+    JSON plus the author names etc. of its search doc) before it is marked
+    done; a crash in between at worst repeats that line, which the catalog
+    ingestion deduplicates. 429/5xx responses and network errors are
+    retried with exponential backoff (Retry-After is honoured), then the
+    work is marked failed.
+    """
+
+    SEARCH_URL = BASE_URL + "/search.json?q={query}&fields=key,{fields}&limit={limit}&page={page}"
+    WORK_URL = BASE_URL + "/works/{work_id}.json"
+    SEARCH_LIMIT = 100
+    MAX_RETRIES = 4
+    RETRY_BACKOFF = 1.0
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    REPORT_EVERY = 10.0  # seconds between progress lines
+
+    def __init__(self, frontier: HarvestFrontier, output_path, query: str = "book",
+                 target: int = 10000, rate: float = 5.0, concurrency: int = 8):
+        self.frontier = frontier
+        self.output_path = Path(output_path)
+        self.query = query
+        self.target = target
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.metrics = {"requests": 0, "fetched": 0, "not_modified": 0, "gone": 0,
+                        "failed": 0, "retries": 0, "discovered": 0}
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        http = HarvestHTTPClient()
+        reporter = asyncio.create_task(self._report(started))
+        try:
+            await self._discover(http)
+            await self._fetch_pending(http)
+        finally:
+            reporter.cancel()
+            await http.aclose()
+        return self.report(started)
+
+    def report(self, started: float) -> dict:
+        elapsed = time.perf_counter() - started
+        return dict(
+            self.metrics,
+            frontier=self.frontier.counts(),
+            seconds=round(elapsed, 2),
+            requests_per_second=round(self.metrics["requests"] / elapsed, 2) if elapsed else None,
+            works_per_second=round(self.metrics["fetched"] / elapsed, 2) if elapsed else None,
+        )
+
+    async def _report(self, started: float):
+        while True:
+            await asyncio.sleep(self.REPORT_EVERY)
+            report = self.report(started)
+            print(
+                f"[Harvest] {report['fetched']} fetched, {report['not_modified']} unchanged,"
+                f" {report['gone']} gone, {report['failed']} failed,"
+                f" {report['frontier'].get('pending', 0)} pending"
+                f" ({report['requests_per_second']} req/s)"
+            )
+
+    async def _get(self, http: HarvestHTTPClient, url: str, headers: dict = None):
+        """GET through the rate limit, retrying 429/5xx and network errors. None when it keeps failing."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            self.metrics["requests"] += 1
+            delay = self.RETRY_BACKOFF * (2 ** attempt)
+            try:
+                response = await http.get(url, headers=headers or {})
+            except httpx.TransportError as e:
+                print(f"[Harvest] {url}: {e!r}")
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+            if attempt < self.MAX_RETRIES:
+                self.metrics["retries"] += 1
+                await asyncio.sleep(delay)
+        return None
+
+    async def _discover(self, http: HarvestHTTPClient):
+        page = self.frontier.get_meta("next_page", 1)
+        while sum(self.frontier.counts().values()) < self.target and page:
+            url = self.SEARCH_URL.format(
+                query=quote_plus(self.query), fields=",".join(DOC_FIELDS), limit=self.SEARCH_LIMIT, page=page
+            )
+            response = await self._get(http, url)
+            if response is None or response.status_code != 200:
+                print(f"[Harvest] Discovery stopped at page {page}")
+                return
+            docs = [doc for doc in response.json().get("docs", []) if doc.get("key")]
+            room = self.target - sum(self.frontier.counts().values())
+            self.metrics["discovered"] += self.frontier.add_works(docs[:room])
+            # 0 marks the end of the results, so a resumed harvest skips discovery
+            page = page + 1 if len(docs) == self.SEARCH_LIMIT else 0
+            self.frontier.set_meta("next_page", page)
+
+    async def _fetch_pending(self, http: HarvestHTTPClient):
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                try:
+                    await self._fetch_work(http, out, *item)
+                except Exception as e:
+                    # e.g. a 200 that is not JSON; the worker must survive it
+                    print(f"[Harvest] {item[0]}: {e!r}")
+                    self.metrics["failed"] += 1
+                    self.frontier.mark(item[0], "failed")
+                finally:
+                    queue.task_done()
+
+        with open(self.output_path, "a", encoding="utf-8") as out:
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                # Claimed in batches; each batch is finished before the next is read
+                while batch := self.frontier.pending(self.concurrency * 4):
+                    for item in batch:
+                        await queue.put(item)
+                    await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+
+    async def _fetch_work(self, http, out, work_id: str, doc: dict, etag: str, last_modified: str):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response = await self._get(http, self.WORK_URL.format(work_id=work_id), headers)
+        if response is None:
+            self.metrics["failed"] += 1
+            self.frontier.mark(work_id, "failed")
+        elif response.status_code == 304:
+            self.metrics["not_modified"] += 1
+            self.frontier.mark(work_id, "done")
+        elif response.status_code == 200:
+            record = {**doc, **response.json()}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            self.metrics["fetched"] += 1
+            self.frontier.mark(
+                work_id, "done", response.headers.get("ETag"), response.headers.get("Last-Modified")
+            )
+        elif response.status_code in (404, 410):
+            self.metrics["gone"] += 1
+            self.frontier.mark(work_id, "gone")
+        else:
+            print(f"[Harvest] {work_id}: HTTP {response.status_code}")
+            self.metrics["failed"] += 1
+            self.frontier.mark(work_id, "failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest OpenLibrary works into a JSONL file.")
+    parser.add_argument("output", type=Path, help="JSONL file to append works to.")
+    parser.add_argument("--query", default="book", help="search.json query used to discover works.")
+    parser.add_argument("--target", type=int, default=10000, help="Number of works to discover.")
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight.")
+    parser.add_argument("--frontier", type=Path, help="Frontier database (default: data_cache/harvest/<output>.db).")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch fetched works (conditionally).")
+    args = parser.parse_args()
+
+    frontier = HarvestFrontier(args.frontier or HARVEST_DIR / f"{args.output.stem}.db")
+    if args.refresh:
+        print(f"[Harvest] Re-queued {frontier.requeue()} works")
+    harvester = CatalogHarvester(
+        frontier, args.output, query=args.query, target=args.target,
+        rate=args.rate, concurrency=args.concurrency,
+    )
+    print(json.dumps(asyncio.run(harvester.run()), indent=2))
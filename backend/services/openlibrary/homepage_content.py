@@ -1,27 +1,38 @@
-import os
 import json
-import requests
-import concurrent.futures
+import threading
+import time
 from bs4 import BeautifulSoup
-from pathlib import Path
 
-HOME_URL = "https://openlibrary.org/"
-CACHE_FOLDER = Path(__file__).resolve().parent.parent.parent / "data_cache" / "openlibrary"
-CACHE_FILE = CACHE_FOLDER / "homepage.json"
+from services.cache_manager import cache_manager
+from services.openlibrary.http_client import get_http_client
 
-HEADERS = {
-    "User-Agent": "NexusLibraryScraper/1.0"
+HOME_URL = "https://openlibrary.org/"
+CACHE_SOURCE = "homepage"
+CACHE_KEY = "homepage.json"  # data_cache/openlibrary/homepage.json
+
+# Homepage carousels change a few times a day; after this many seconds the
+# cached copy is served as stale while a background refresh runs.
+CACHE_TTL_SECONDS = cache_manager.ttl(CACHE_SOURCE)
+
+# <div class="carousel-section"> index of each homepage carousel
+CAROUSEL_SECTIONS = {
+    "trending_books": 1,
+    "classic_books": 2,
+    "books_we_love": 3,
 }
 
-def parse_carousel_section(soup, section_index):
+
+def parse_carousel_section(soup, section_index, carousel_sections=None):
     """
     Given a BeautifulSoup of the entire homepage and an index for the
     <div class="carousel-section">, this extracts all <img> elements,
     returning a list of { "imgSrc": ..., "title": ... }.
+    Pass the already selected `carousel_sections` to avoid re-selecting them.
     """
 
     # Grab the specific carousel-section by index
-    carousel_sections = soup.select("div.carousel-section")
+    if carousel_sections is None:
+        carousel_sections = soup.select("div.carousel-section")
 
     # Safety check in case of unexpected page layout
     if section_index >= len(carousel_sections):
@@ -42,73 +53,158 @@ def parse_carousel_section(soup, section_index):
             })
     return results
 
-def get_trending_books():
-    """Scrape the 2nd carousel (index = 1) for 'Trending Books'."""
-    print("[Scraper] Fetching Trending Books ...")
-    resp = requests.get(HOME_URL, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    return parse_carousel_section(soup, section_index=1)
-
-def get_classic_books():
-    """Scrape the 3rd carousel (index = 2) for 'Classic Books'."""
-    print("[Scraper] Fetching Classic Books ...")
-    resp = requests.get(HOME_URL, headers=HEADERS, timeout=10)
+def scrape_homepage() -> dict:
+    """
+    Download the homepage once, parse it once and fill every carousel from
+    that single tree.
+    """
+    print("[Scraper] Fetching OpenLibrary homepage ...")
+    resp = get_http_client().get(HOME_URL, timeout=10)
     resp.raise_for_status()
 
     soup = BeautifulSoup(resp.text, "html.parser")
-    return parse_carousel_section(soup, section_index=2)
+    carousel_sections = soup.select("div.carousel-section")
 
-def get_books_we_love():
-    """Scrape the 4th carousel (index = 3) for 'Books We Love'."""
-    print("[Scraper] Fetching Books We Love ...")
-    resp = requests.get(HOME_URL, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
+    return {
+        key: parse_carousel_section(soup, index, carousel_sections)
+        for key, index in CAROUSEL_SECTIONS.items()
+    }
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    return parse_carousel_section(soup, section_index=3)
 
-def get_homepage_data(force_refresh: bool = False) -> dict:
+class HomepageCache:
     """
-    1. If homepage.json exists and force_refresh=False, load data from it.
-    2. Otherwise, fetch all 3 sections in parallel:
-         - Trending
-         - Classics
-         - Books We Love
-       Merge them into a single dict, save as JSON, then return.
+    In-memory homepage data backed by homepage.json, with stale-while-revalidate.
+
+    - Fresh data (younger than the TTL) is returned straight from memory.
+    - Stale data is still returned immediately, and a single background
+      refresh is started to replace it.
+    - A daemon refresher re-scrapes the homepage every TTL so requests
+      normally never see stale data at all.
+    Only the very first call on an empty cache (no memory, no file) scrapes
+    synchronously; concurrent first calls wait for that one scrape instead
+    of starting their own.
     """
-    CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
-
-    # If JSON cache is present and not forcing refresh, load from disk
-    if not force_refresh and CACHE_FILE.exists():
-        print("[Cache] Loading homepage data from JSON cache...")
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    print("[Scraper] No valid cache or forced refresh. Scraping in parallel...")
-    data = {
-        "trending_books": [],
-        "classic_books": [],
-        "books_we_love": []
-    }
 
-    # MULTI-THREAD SCRAPING
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        future_trend = executor.submit(get_trending_books)
-        future_classic = executor.submit(get_classic_books)
-        future_love = executor.submit(get_books_we_love)
+    def __init__(self, ttl: int = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._data = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        # Held by the request filling an empty cache; followers queue on it
+        self._cold_start = threading.Lock()
+        self._refreshing = False
+        self._refresher = None
+
+    def get(self, force_refresh: bool = False) -> dict:
+        if force_refresh:
+            return self.refresh()
+
+        if self._data is None:
+            with self._cold_start:
+                # Filled by the first caller while we waited, if any
+                if self._data is None:
+                    self._load_from_disk()
+                if self._data is None:
+                    print("[Scraper] No valid cache. Scraping homepage...")
+                    return self.refresh()
+
+        self.start_background_refresher()
+        if self.is_stale():
+            print("[Cache] Homepage data is stale. Serving it and refreshing in background...")
+            self.refresh_in_background()
+        return self._data
+
+    def is_stale(self) -> bool:
+        return time.time() - self._fetched_at > self.ttl
+
+    def refresh(self) -> dict:
+        """Scrape synchronously, then swap the new data into memory and disk."""
+        data = scrape_homepage()
+        with self._lock:
+            self._data = data
+            self._fetched_at = time.time()
+        self._save_to_disk(data)
+        return data
+
+    def refresh_in_background(self):
+        """Start one refresh thread unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._safe_refresh, daemon=True).start()
+
+    def start_background_refresher(self):
+        """Start the periodic refresher thread once per process."""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            wait = self._fetched_at + self.ttl - time.time()
+            # At least a minute between ticks so a failing upstream is not hammered
+            time.sleep(max(wait, 60))
+            if self.is_stale():
+                self.refresh_in_background()
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+            print("[Scraper] Homepage data refreshed in background.")
+        except Exception as e:
+            # Keep serving the stale copy; the next request or tick retries.
+            print(f"[Error] Background homepage refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load_from_disk(self):
+        # Stale is fine: it is served while the background refresh runs
+        data = cache_manager.read_json(CACHE_SOURCE, CACHE_KEY, allow_stale=True)
+        if data is None:
+            return
+        print("[Cache] Loaded homepage data from JSON cache.")
+        try:
+            fetched_at = cache_manager.path(CACHE_SOURCE, CACHE_KEY).stat().st_mtime
+        except FileNotFoundError:
+            fetched_at = 0.0  # evicted since the read; treat as stale
+        with self._lock:
+            self._data = data
+            self._fetched_at = fetched_at
+
+    def _save_to_disk(self, data: dict):
+        print("[Scraper] Saving fresh data to homepage.json...")
+        cache_manager.write_json(CACHE_SOURCE, CACHE_KEY, data, indent=2)
+
+
+homepage_cache = HomepageCache()
 
-        data["trending_books"] = future_trend.result()
-        data["classic_books"] = future_classic.result()
-        data["books_we_love"] = future_love.result()
 
-    # Save results to JSON
-    print("[Scraper] Saving fresh data to homepage.json...")
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def get_trending_books():
+    """'Trending Books' carousel (2nd carousel-section)."""
+    return get_homepage_data()["trending_books"]
 
-    return data
+def get_classic_books():
+    """'Classic Books' carousel (3rd carousel-section)."""
+    return get_homepage_data()["classic_books"]
+
+def get_books_we_love():
+    """'Books We Love' carousel (4th carousel-section)."""
+    return get_homepage_data()["books_we_love"]
+
+def get_homepage_data(force_refresh: bool = False) -> dict:
+    """
+    Returns Trending, Classics and Books We Love from memory.
+    1. Fresh in-memory data (or homepage.json on first use) is returned as is.
+    2. Stale data is returned immediately and refreshed in the background.
+    3. force_refresh=True (or no cache at all) scrapes the homepage once,
+       synchronously, and updates memory and homepage.json.
+    """
+    return homepage_cache.get(force_refresh=force_refresh)
 
 if __name__ == "__main__":
     # Quick test if run directly
@@ -0,0 +1,250 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class OpenLibraryHTTPClient:
+    """
+    Process-wide pooled HTTP client for every OpenLibrary scraper.
+
+    A single requests.Session is shared by all search strategies, the homepage
+    scraper and the book detail scraper, so connections to openlibrary.org are
+    kept alive and reused instead of paying a fresh TCP+TLS handshake per fetch.
+
+    Responsibilities:
+      - Keep-alive connection pool sized for our thread pools
+      - Default (connect, read) timeouts on every request
+      - Retry with exponential backoff on 429/5xx (honours Retry-After)
+      - One consistent User-Agent
+      - Counters for new versus reused connections
+    """
+
+    USER_AGENT = "NexusLibraryScraper/1.0"
+    TIMEOUT = (5, 15)  # (connect, read) seconds
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 32
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self):
+        retry = Retry(
+            total=self.RETRY_TOTAL,
+            backoff_factor=self.RETRY_BACKOFF,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            # Hand the last response back so callers keep checking status_code
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=retry,
+            pool_block=False,
+        )
+
+        # Counters of host pools the adapter already dropped (it keeps
+        # POOL_CONNECTIONS), so that stats() never goes backwards
+        self._retired = {"requests": 0, "new_connections": 0}
+        self._retired_lock = threading.Lock()
+        self.adapter.poolmanager.pools.dispose_func = self._retire_pool
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": self.USER_AGENT})
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Same signature as requests.get, but goes through the shared pool and
+        falls back to the default timeout when none is given.
+        """
+        kwargs.setdefault("timeout", self.TIMEOUT)
+        return self.session.get(url, **kwargs)
+
+    def _retire_pool(self, pool):
+        with self._retired_lock:
+            self._retired["requests"] += pool.num_requests
+            self._retired["new_connections"] += pool.num_connections
+        pool.close()
+
+    def stats(self) -> dict:
+        """
+        Connection counters since start: the live host pools of the adapter
+        plus the ones it dropped. Every request that did not need a new
+        connection reused a kept-alive one.
+        """
+        with self._retired_lock:
+            requests_sent, new_connections = self._retired["requests"], self._retired["new_connections"]
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            new_connections += pool.num_connections
+
+        return {
+            "requests": requests_sent,
+            "new_connections": new_connections,
+            "reused_connections": max(requests_sent - new_connections, 0),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> OpenLibraryHTTPClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenLibraryHTTPClient()
+    return _client
+
+
+class AsyncOpenLibraryHTTPClient:
+    """
+    asyncio counterpart of OpenLibraryHTTPClient for the async endpoints.
+
+    Built on httpx.AsyncClient. While a fetch waits on the network it holds
+    no thread, so one process can keep a hundred upstream requests in
+    flight. Same User-Agent, timeouts and retry policy as the sync client.
+    """
+
+    USER_AGENT = OpenLibraryHTTPClient.USER_AGENT
+    TIMEOUT = httpx.Timeout(
+        OpenLibraryHTTPClient.TIMEOUT[1], connect=OpenLibraryHTTPClient.TIMEOUT[0]
+    )
+    # httpcore rescans the whole pool on every request/release, so a bigger
+    # pool costs CPU per request; 100 in flight is plenty for one host
+    MAX_CONNECTIONS = 100
+    MAX_KEEPALIVE = 20
+    RETRY_TOTAL = OpenLibraryHTTPClient.RETRY_TOTAL
+    RETRY_BACKOFF = OpenLibraryHTTPClient.RETRY_BACKOFF
+    RETRY_STATUSES = OpenLibraryHTTPClient.RETRY_STATUSES
+
+    def __init__(self):
+        transport = httpx.AsyncHTTPTransport(
+            # Connection-level retries; status retries are done in get()
+            retries=self.RETRY_TOTAL,
+            limits=httpx.Limits(
+                max_connections=self.MAX_CONNECTIONS,
+                max_keepalive_connections=self.MAX_KEEPALIVE,
+            ),
+        )
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            headers={"User-Agent": self.USER_AGENT},
+            timeout=self.TIMEOUT,
+            follow_redirects=True,  # requests does this by default
+        )
+        self._metrics = {"requests": 0, "retries": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._closer = None
+        self._closed = False
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        GET with backoff on 429/5xx (honours Retry-After). Like the sync client,
+        the last response is returned, so callers keep checking status_code.
+        """
+        if self._closer is None:
+            # First use: tie the client's lifetime to the running loop
+            self._closer = self._close_with_loop()
+            await self._closer.__anext__()
+        self._metrics["requests"] += 1
+        self._metrics["in_flight"] += 1
+        self._metrics["peak_in_flight"] = max(
+            self._metrics["peak_in_flight"], self._metrics["in_flight"]
+        )
+        try:
+            for attempt in range(self.RETRY_TOTAL + 1):
+                response = await self.client.get(url, **kwargs)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.RETRY_TOTAL:
+                    return response
+                self._metrics["retries"] += 1
+                retry_after = response.headers.get("Retry-After", "")
+                delay = (
+                    float(retry_after)
+                    if retry_after.isdigit()
+                    else self.RETRY_BACKOFF * (2 ** attempt)
+                )
+                await asyncio.sleep(delay)
+        finally:
+            self._metrics["in_flight"] -= 1
+
+    async def _close_with_loop(self):
+        """
+        Async generator parked at its yield for as long as the event loop
+        runs. asyncio closes the live async generators of a loop when it
+        shuts down (loop.shutdown_asyncgens(), done by asyncio.run(), so
+        also for the loop asgiref starts per async view under WSGI), which
+        runs the finally: the client is closed with its loop.
+        """
+        try:
+            yield
+        finally:
+            await self.aclose()
+
+    def stats(self) -> dict:
+        return dict(self._metrics)
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        await self.client.aclose()
+        _retire_async_client(self)
+
+
+# httpx.AsyncClient is bound to the event loop it was first used on, so keep
+# one client per loop (under ASGI that is one per process; under WSGI each
+# async view runs in a loop of its own). A client is closed when its loop
+# ends, and its counters move to _retired_async so the totals stay cumulative.
+_async_clients = weakref.WeakKeyDictionary()
+_retired_async = {"requests": 0, "retries": 0, "peak_in_flight": 0, "closed_clients": 0}
+_retired_async_lock = threading.Lock()
+
+
+def _retire_async_client(client: AsyncOpenLibraryHTTPClient):
+    for loop, live in list(_async_clients.items()):
+        if live is client:
+            del _async_clients[loop]
+    with _retired_async_lock:
+        _retired_async["requests"] += client._metrics["requests"]
+        _retired_async["retries"] += client._metrics["retries"]
+        _retired_async["peak_in_flight"] = max(
+            _retired_async["peak_in_flight"], client._metrics["peak_in_flight"]
+        )
+        _retired_async["closed_clients"] += 1
+
+
+def get_async_http_client() -> AsyncOpenLibraryHTTPClient:
+    """Return the client of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOpenLibraryHTTPClient()
+    return client
+
+
+def async_http_stats() -> dict:
+    """Counters summed over every async client, live or closed."""
+    with _retired_async_lock:
+        total = dict(_retired_async, in_flight=0, live_clients=0)
+    for client in list(_async_clients.values()):
+        total["live_clients"] += 1
+        for key, value in client.stats().items():
+            total[key] = max(total[key], value) if key == "peak_in_flight" else total[key] + value
+    return total
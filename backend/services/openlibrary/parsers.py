@@ -0,0 +1,567 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, NavigableString
+from lxml import etree
+
+BASE_URL = "https://openlibrary.org"
+
+
+class SearchResultParser(ABC):
+    """
+    Extracts records from OpenLibrary result pages.
+
+    Every backend must return identical records for the same HTML; the
+    strategies in search_page.py only talk to this interface, so the backend
+    can be swapped with the OPENLIBRARY_PARSER environment variable.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def parse_search_page(self, html: str) -> dict:
+        """Book / advanced search page -> {"books", "last_page", "hits"}."""
+
+    @abstractmethod
+    def parse_author_books(self, html: str) -> list:
+        """Book list of an author page."""
+
+    @abstractmethod
+    def parse_inside_results(self, html: str) -> dict:
+        """Search-inside page -> {"stats", "results"}."""
+
+
+def _absolute_image(img_src: str) -> str:
+    if img_src.startswith("//"):
+        return "https:" + img_src
+    if img_src.startswith("/"):
+        return urljoin(BASE_URL, img_src)
+    return img_src
+
+
+def _split_rating(rating_text: str):
+    rating_value, num_ratings = None, None
+    if rating_text:
+        parts = rating_text.split("(")
+        if parts:
+            rating_value = parts[0].strip()
+        if len(parts) > 1:
+            num_ratings = parts[1].replace("ratings", "").replace(")", "").strip()
+    return rating_value, num_ratings
+
+
+def _parse_hits(text: str) -> int:
+    match = re.search(r"([\d,]+)\s+hits", text, re.IGNORECASE)
+    if match:
+        return int(match.group(1).replace(",", ""))
+    return 0
+
+
+class SoupSearchParser(SearchResultParser):
+    """Reference backend: BeautifulSoup tree walking with CSS selectors."""
+
+    name = "bs4"
+
+    def parse_search_page(self, html: str) -> dict:
+        soup = BeautifulSoup(html, "lxml")
+        return {
+            "books": self._extract_books(soup),
+            "last_page": self._extract_last_page(soup),
+            "hits": self._extract_no_of_hits(soup),
+        }
+
+    def _extract_books(self, soup: BeautifulSoup) -> list:
+        results_container = soup.find("div", class_="resultsContainer")
+        results_list = (
+            results_container.find("ul", class_="list-books")
+            if results_container
+            else None
+        )
+        result_items = (
+            results_list.find_all("li", class_="searchResultItem")
+            if results_list
+            else []
+        )
+
+        books = []
+        for item in result_items:
+            img_tag = item.find("img", itemprop="image")
+            img_src = img_tag.get("src").strip() if img_tag else None
+            if img_src:
+                if img_src.startswith("//"):
+                    img_src = "https:" + img_src
+                elif img_src.startswith("/"):
+                    img_src = "https://openlibrary.org" + img_src
+
+            title_a = item.select_one("h3.booktitle a.results")
+            raw_title = title_a.get_text() if title_a else ""
+            book_title = re.sub(r"\s+", " ", raw_title).strip()
+            book_url = urljoin(BASE_URL, title_a.get("href")) if title_a else None
+
+            author_a = item.select_one("span.bookauthor a")
+            author_name = author_a.get_text(strip=True) if author_a else None
+
+            rating_span = item.select_one(
+                "span.ratingsByline span[itemprop='ratingValue']"
+            )
+            rating_text = rating_span.get_text(strip=True) if rating_span else ""
+            rating_value, num_ratings = _split_rating(rating_text)
+
+            details_span = item.select_one("span.resultDetails")
+            first_published, num_editions = None, None
+            if details_span:
+                details_text = details_span.get_text(" ", strip=True)
+                parts = details_text.split("—")
+                if len(parts) >= 1 and "First published in" in parts[0]:
+                    first_published = parts[0].replace("First published in", "").strip()
+                if len(parts) >= 2:
+                    edition_link = details_span.find("a")
+                    if edition_link:
+                        raw_editions = edition_link.get_text()
+                        num_editions = re.sub(r"\s+", " ", raw_editions).strip()
+            books.append(
+                {
+                    "imgSrc": img_src,
+                    "title": book_title,
+                    "url": book_url,
+                    "author": author_name,
+                    "rating": rating_value,
+                    "num_ratings": num_ratings,
+                    "first_published": first_published,
+                    "num_editions": num_editions,
+                }
+            )
+        return books
+
+    def _extract_last_page(self, soup: BeautifulSoup) -> int:
+        pagination = soup.find("div", class_="pagination")
+        if not pagination:
+            return 1
+        pages = pagination.find_all("a")
+        for page in reversed(pages):
+            if page.text.strip().isdigit():
+                return int(page.text.strip())
+        return 1
+
+    def _extract_no_of_hits(self, soup: BeautifulSoup) -> int:
+        hits_div = soup.find("div", class_="search-results-stats")
+        if not hits_div:
+            return 0
+        return _parse_hits(hits_div.get_text(strip=True))
+
+    def parse_author_books(self, html: str) -> list:
+        soup = BeautifulSoup(html, "lxml")
+        book_items = soup.select("li.searchResultItem.sri--w-main")
+
+        books = []
+        for book in book_items:
+            title_tag = book.select_one("h3.booktitle a.results")
+            book_title = title_tag.get_text(strip=True) if title_tag else ""
+            book_url = urljoin(BASE_URL, title_tag.get("href")) if title_tag else ""
+
+            img_tag = book.select_one("img[itemprop='image']")
+            image_src = _absolute_image(img_tag.get("src") if img_tag else "")
+
+            author_tag = book.select_one("span.bookauthor a")
+            book_author = author_tag.get_text(strip=True) if author_tag else ""
+
+            details = book.select_one("span.resultDetails")
+            first_published, editions = "", ""
+            if details:
+                spans = details.find_all("span")
+                if len(spans) >= 2:
+                    first_published = spans[0].get_text(strip=True)
+                    editions = spans[1].get_text(strip=True)
+
+            books.append(
+                {
+                    "title": book_title,
+                    "book_url": book_url,
+                    "image_src": image_src,
+                    "author": book_author,
+                    "first_published": first_published,
+                    "editions": editions,
+                }
+            )
+        return books
+
+    def parse_inside_results(self, html: str) -> dict:
+        soup = BeautifulSoup(html, "lxml")
+
+        # Stats
+        stats_element = soup.find("p", class_="search-results-stats")
+        stats_text = stats_element.get_text(strip=True) if stats_element else ""
+
+        # All result items
+        result_items = soup.find_all(
+            "li", class_=lambda c: c and "searchResultItem" in c
+        )
+        results = []
+
+        for item in result_items:
+            # Image
+            img_tag = item.find("img", itemprop="image")
+            img_src = _absolute_image(img_tag.get("src")) if img_tag else None
+
+            # Title + Book URL
+            title_element = item.find("h3", class_="booktitle")
+            book_title = ""
+            book_url = ""
+            if title_element:
+                link = title_element.find("a", class_="results")
+                if link:
+                    book_title = link.get_text(strip=True)
+                    book_url = urljoin(BASE_URL, link.get("href"))
+
+            # Authors
+            authors = []
+            author_span = item.find("span", class_="bookauthor")
+            if author_span:
+                for a in author_span.find_all("a"):
+                    authors.append(
+                        {
+                            "name": a.get_text(strip=True),
+                            "url": urljoin(BASE_URL, a.get("href")),
+                        }
+                    )
+
+            # Snippets
+            highlighted_snippets = []
+            snippet_container = item.find("ul", class_="fsi-snippet")
+            if snippet_container:
+                for snippet in snippet_container.find_all(
+                    "li", class_=lambda c: c and "fsi-snippet__main" in c
+                ):
+                    a_tag = snippet.find("a", class_="fsi-snippet__link")
+                    if a_tag:
+                        snippet_parts = []
+                        for child in a_tag.children:
+                            if isinstance(child, NavigableString):
+                                text = child.strip()
+                                if text:
+                                    snippet_parts.append(
+                                        {"text": text, "highlighted": False}
+                                    )
+                            elif child.name == "mark":
+                                marked_text = child.get_text(strip=True)
+                                if marked_text:
+                                    snippet_parts.append(
+                                        {"text": marked_text, "highlighted": True}
+                                    )
+
+                        snippet_url = urljoin(BASE_URL, a_tag.get("href"))
+
+                        highlighted_snippets.append(
+                            {"snippet_parts": snippet_parts, "url": snippet_url}
+                        )
+
+            results.append(
+                {
+                    "image_src": img_src,
+                    "title": book_title,
+                    "book_url": book_url,
+                    "authors": authors,
+                    "highlighted_snippets": highlighted_snippets,
+                }
+            )
+
+        return {"stats": stats_text, "results": results}
+
+
+# ---------------------------------------------------------------------------
+# lxml backend: precompiled XPath, no Python-level tree objects
+# ---------------------------------------------------------------------------
+
+def _has_class(name: str) -> str:
+    """XPath predicate with BeautifulSoup's `class_=name` semantics (token match)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath(expr: str) -> etree.XPath:
+    return etree.XPath(expr, smart_strings=False)
+
+
+_TEXT_NODES = _xpath(".//text()")  # text nodes only, like get_text() (no comments)
+
+
+def _text(el) -> str:
+    """get_text()"""
+    return "".join(_TEXT_NODES(el))
+
+
+def _stripped(el, separator: str = "") -> str:
+    """get_text(separator, strip=True)"""
+    return separator.join(s for s in (t.strip() for t in _TEXT_NODES(el)) if s)
+
+
+def _first(xpath: etree.XPath, el):
+    found = xpath(el)
+    return found[0] if found else None
+
+
+class LxmlSearchParser(SearchResultParser):
+    """
+    Fast backend: libxml2 tree queried with precompiled XPath.
+    Mirrors SoupSearchParser field by field; the parity tests in
+    api/tests.py keep the two in lockstep.
+    """
+
+    name = "lxml"
+
+    # Search page
+    _RESULTS_CONTAINER = _xpath(f"(//div[{_has_class('resultsContainer')}])[1]")
+    _LIST_BOOKS = _xpath(f"(.//ul[{_has_class('list-books')}])[1]")
+    _RESULT_ITEMS = _xpath(f".//li[{_has_class('searchResultItem')}]")
+    _IMAGE = _xpath("(.//img[@itemprop='image'])[1]")
+    _TITLE_LINK = _xpath(
+        f"(.//h3[{_has_class('booktitle')}]//a[{_has_class('results')}])[1]"
+    )
+    _AUTHOR_LINK = _xpath(f"(.//span[{_has_class('bookauthor')}]//a)[1]")
+    _RATING = _xpath(
+        f"(.//span[{_has_class('ratingsByline')}]//span[@itemprop='ratingValue'])[1]"
+    )
+    _DETAILS = _xpath(f"(.//span[{_has_class('resultDetails')}])[1]")
+    _FIRST_LINK = _xpath("(.//a)[1]")
+    _LINKS = _xpath(".//a")
+    _PAGINATION = _xpath(f"(//div[{_has_class('pagination')}])[1]")
+    _HITS = _xpath(f"(//div[{_has_class('search-results-stats')}])[1]")
+
+    # Author page
+    _AUTHOR_BOOK_ITEMS = _xpath(
+        f"//li[{_has_class('searchResultItem')} and {_has_class('sri--w-main')}]"
+    )
+    _SPANS = _xpath(".//span")
+
+    # Search inside page
+    _INSIDE_STATS = _xpath(f"(//p[{_has_class('search-results-stats')}])[1]")
+    _INSIDE_ITEMS = _xpath("//li[contains(@class, 'searchResultItem')]")
+    _BOOKTITLE = _xpath(f"(.//h3[{_has_class('booktitle')}])[1]")
+    _RESULTS_LINK = _xpath(f"(.//a[{_has_class('results')}])[1]")
+    _BOOKAUTHOR = _xpath(f"(.//span[{_has_class('bookauthor')}])[1]")
+    _SNIPPET_LIST = _xpath(f"(.//ul[{_has_class('fsi-snippet')}])[1]")
+    _SNIPPETS = _xpath(".//li[contains(@class, 'fsi-snippet__main')]")
+    _SNIPPET_LINK = _xpath(f"(.//a[{_has_class('fsi-snippet__link')}])[1]")
+
+    def _root(self, html: str):
+        # etree.HTML uses lxml's per-thread default parser, so this is thread-safe
+        if not html.strip():
+            return None
+        try:
+            return etree.HTML(html)
+        except ValueError:
+            # str input with an XML encoding declaration must go in as bytes
+            return etree.HTML(html.encode("utf-8"))
+
+    def parse_search_page(self, html: str) -> dict:
+        root = self._root(html)
+        if root is None:
+            return {"books": [], "last_page": 1, "hits": 0}
+        return {
+            "books": self._extract_books(root),
+            "last_page": self._extract_last_page(root),
+            "hits": self._extract_no_of_hits(root),
+        }
+
+    def _extract_books(self, root) -> list:
+        container = _first(self._RESULTS_CONTAINER, root)
+        results_list = _first(self._LIST_BOOKS, container) if container is not None else None
+        result_items = self._RESULT_ITEMS(results_list) if results_list is not None else []
+
+        books = []
+        for item in result_items:
+            img_tag = _first(self._IMAGE, item)
+            img_src = img_tag.get("src").strip() if img_tag is not None else None
+            if img_src:
+                if img_src.startswith("//"):
+                    img_src = "https:" + img_src
+                elif img_src.startswith("/"):
+                    img_src = "https://openlibrary.org" + img_src
+
+            title_a = _first(self._TITLE_LINK, item)
+            if title_a is not None:
+                book_title = re.sub(r"\s+", " ", _text(title_a)).strip()
+                book_url = urljoin(BASE_URL, title_a.get("href"))
+            else:
+                book_title, book_url = "", None
+
+            author_a = _first(self._AUTHOR_LINK, item)
+            author_name = _stripped(author_a) if author_a is not None else None
+
+            rating_span = _first(self._RATING, item)
+            rating_text = _stripped(rating_span) if rating_span is not None else ""
+            rating_value, num_ratings = _split_rating(rating_text)
+
+            details_span = _first(self._DETAILS, item)
+            first_published, num_editions = None, None
+            if details_span is not None:
+                parts = _stripped(details_span, " ").split("—")
+                if "First published in" in parts[0]:
+                    first_published = parts[0].replace("First published in", "").strip()
+                if len(parts) >= 2:
+                    edition_link = _first(self._FIRST_LINK, details_span)
+                    if edition_link is not None:
+                        num_editions = re.sub(r"\s+", " ", _text(edition_link)).strip()
+
+            books.append(
+                {
+                    "imgSrc": img_src,
+                    "title": book_title,
+                    "url": book_url,
+                    "author": author_name,
+                    "rating": rating_value,
+                    "num_ratings": num_ratings,
+                    "first_published": first_published,
+                    "num_editions": num_editions,
+                }
+            )
+        return books
+
+    def _extract_last_page(self, root) -> int:
+        pagination = _first(self._PAGINATION, root)
+        if pagination is None:
+            return 1
+        for page in reversed(self._LINKS(pagination)):
+            text = _text(page).strip()
+            if text.isdigit():
+                return int(text)
+        return 1
+
+    def _extract_no_of_hits(self, root) -> int:
+        hits_div = _first(self._HITS, root)
+        if hits_div is None:
+            return 0
+        return _parse_hits(_stripped(hits_div))
+
+    def parse_author_books(self, html: str) -> list:
+        root = self._root(html)
+        if root is None:
+            return []
+
+        books = []
+        for book in self._AUTHOR_BOOK_ITEMS(root):
+            title_tag = _first(self._TITLE_LINK, book)
+            book_title = _stripped(title_tag) if title_tag is not None else ""
+            book_url = urljoin(BASE_URL, title_tag.get("href")) if title_tag is not None else ""
+
+            img_tag = _first(self._IMAGE, book)
+            image_src = _absolute_image(img_tag.get("src") if img_tag is not None else "")
+
+            author_tag = _first(self._AUTHOR_LINK, book)
+            book_author = _stripped(author_tag) if author_tag is not None else ""
+
+            details = _first(self._DETAILS, book)
+            first_published, editions = "", ""
+            if details is not None:
+                spans = self._SPANS(details)
+                if len(spans) >= 2:
+                    first_published = _stripped(spans[0])
+                    editions = _stripped(spans[1])
+
+            books.append(
+                {
+                    "title": book_title,
+                    "book_url": book_url,
+                    "image_src": image_src,
+                    "author": book_author,
+                    "first_published": first_published,
+                    "editions": editions,
+                }
+            )
+        return books
+
+    def parse_inside_results(self, html: str) -> dict:
+        root = self._root(html)
+        if root is None:
+            return {"stats": "", "results": []}
+
+        stats_element = _first(self._INSIDE_STATS, root)
+        stats_text = _stripped(stats_element) if stats_element is not None else ""
+
+        results = []
+        for item in self._INSIDE_ITEMS(root):
+            img_tag = _first(self._IMAGE, item)
+            img_src = _absolute_image(img_tag.get("src")) if img_tag is not None else None
+
+            book_title, book_url = "", ""
+            title_element = _first(self._BOOKTITLE, item)
+            if title_element is not None:
+                link = _first(self._RESULTS_LINK, title_element)
+                if link is not None:
+                    book_title = _stripped(link)
+                    book_url = urljoin(BASE_URL, link.get("href"))
+
+            authors = []
+            author_span = _first(self._BOOKAUTHOR, item)
+            if author_span is not None:
+                for a in self._LINKS(author_span):
+                    authors.append(
+                        {"name": _stripped(a), "url": urljoin(BASE_URL, a.get("href"))}
+                    )
+
+            highlighted_snippets = []
+            snippet_container = _first(self._SNIPPET_LIST, item)
+            if snippet_container is not None:
+                for snippet in self._SNIPPETS(snippet_container):
+                    a_tag = _first(self._SNIPPET_LINK, snippet)
+                    if a_tag is not None:
+                        highlighted_snippets.append(
+                            {
+                                "snippet_parts": self._snippet_parts(a_tag),
+                                "url": urljoin(BASE_URL, a_tag.get("href")),
+                            }
+                        )
+
+            results.append(
+                {
+                    "image_src": img_src,
+                    "title": book_title,
+                    "book_url": book_url,
+                    "authors": authors,
+                    "highlighted_snippets": highlighted_snippets,
+                }
+            )
+
+        return {"stats": stats_text, "results": results}
+
+    @staticmethod
+    def _snippet_parts(a_tag) -> list:
+        # Direct children in document order: leading text, then each child
+        # followed by its tail. Comments count as plain text, as in bs4.
+        parts = []
+
+        def add(text, highlighted=False):
+            text = (text or "").strip()
+            if text:
+                parts.append({"text": text, "highlighted": highlighted})
+
+        add(a_tag.text)
+        for child in a_tag:
+            if child.tag is etree.Comment:
+                add(child.text)
+            elif child.tag == "mark":
+                add(_stripped(child), highlighted=True)
+            add(child.tail)
+        return parts
+
+
+PARSERS = {
+    SoupSearchParser.name: SoupSearchParser,
+    LxmlSearchParser.name: LxmlSearchParser,
+}
+
+_parsers = {}
+
+
+def get_search_parser(name: str = None) -> SearchResultParser:
+    """
+    Parser backend by name; defaults to $OPENLIBRARY_PARSER, else "lxml".
+    Parsers are stateless, so one instance per backend is shared.
+    """
+    name = name or os.getenv("OPENLIBRARY_PARSER", LxmlSearchParser.name)
+    if name not in _parsers:
+        if name not in PARSERS:
+            raise ValueError(f"Unknown parser backend: {name} (choose from {list(PARSERS)})")
+        _parsers[name] = PARSERS[name]()
+    return _parsers[name]
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+
+class PagePrefetcher:
+    """
+    Bounded background prefetcher for the remaining pages of a search.
+
+    After page 1 of a query is returned to the frontend, the strategy hands the
+    prefetcher the next pages (page_2..page_K) together with a function that
+    fetches one page and saves it into the cache. Pages are warmed on a small
+    shared thread pool so that clicking "next" is a cache hit.
+
+    Limits:
+      - MAX_WORKERS: global concurrency of upstream fetches
+      - MAX_PAGES_PER_QUERY: only the first K-1 pages after page 1 are warmed
+      - MAX_PENDING: global cap of queued + running pages; extra pages are dropped
+
+    Metrics count how many prefetched pages were actually read afterwards,
+    so we can tell whether K is worth its upstream cost.
+    """
+
+    MAX_WORKERS = 4
+    MAX_PAGES_PER_QUERY = 5
+    MAX_PENDING = 40
+    MAX_TRACKED = 5000  # unread prefetched pages remembered for the read metric
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS, thread_name_prefix="page-prefetch"
+        )
+        self._lock = threading.Lock()
+        self._pending = {}  # (query_key, page) -> Future
+        # (query_key, page) warmed but not read yet, oldest first
+        self._prefetched = OrderedDict()
+        self._metrics = {
+            "scheduled": 0,
+            "completed": 0,
+            "failed": 0,
+            "dropped": 0,
+            "read": 0,
+        }
+
+    def schedule(
+        self, query_key: str, pages: Iterable[int], fetch_page: Callable[[int], None]
+    ) -> int:
+        """
+        Queue `fetch_page(page)` for up to MAX_PAGES_PER_QUERY of `pages`.
+        Pages already queued are skipped; pages over the global cap are dropped.
+        Returns the number of pages actually scheduled.
+        """
+        scheduled = 0
+        for page in islice(pages, self.MAX_PAGES_PER_QUERY):
+            key = (query_key, page)
+            with self._lock:
+                if key in self._pending or key in self._prefetched:
+                    continue
+                if len(self._pending) >= self.MAX_PENDING:
+                    self._metrics["dropped"] += 1
+                    continue
+                future = self._executor.submit(self._run, key, fetch_page, page)
+                self._pending[key] = future
+                self._metrics["scheduled"] += 1
+            scheduled += 1
+
+        if scheduled:
+            print(f"[Prefetch] Scheduled {scheduled} page(s) for: {query_key}")
+        return scheduled
+
+    def _run(self, key, fetch_page: Callable[[int], None], page: int):
+        try:
+            fetch_page(page)
+            with self._lock:
+                if len(self._prefetched) >= self.MAX_TRACKED:
+                    self._prefetched.popitem(last=False)
+                self._prefetched[key] = None
+                self._metrics["completed"] += 1
+        except Exception as e:
+            print(f"[Prefetch] Failed page {page} for {key[0]}: {e}")
+            with self._lock:
+                self._metrics["failed"] += 1
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def record_read(self, query_key: str, page: int):
+        """Called on every cache hit; counts it if the page came from a prefetch."""
+        key = (query_key, page)
+        with self._lock:
+            if key in self._prefetched:
+                del self._prefetched[key]
+                self._metrics["read"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["in_flight"] = len(self._pending)
+            metrics["unread"] = len(self._prefetched)
+        completed = metrics["completed"]
+        metrics["read_ratio"] = round(metrics["read"] / completed, 3) if completed else 0.0
+        return metrics
+
+
+page_prefetcher = PagePrefetcher()
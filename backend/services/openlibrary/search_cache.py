@@ -0,0 +1,405 @@
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from services.cache_manager import cache_manager
+from services.openlibrary.book_index import index_search_page
+from services.query_normalizer import canonical_query, query_key_stats
+
+SEARCH_CACHE_DIR = (
+    Path(__file__).resolve().parent.parent.parent
+    / "data_cache"
+    / "openlibrary"
+    / "search_page"
+)
+DB_PATH = SEARCH_CACHE_DIR / "search_cache.db"
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query (see canonical_query), so equivalent queries share rows."""
+    return canonical_query(query)
+
+
+def advance_search_query(
+    title: str = "", author: str = "", isbn: str = "", subject: str = "", publisher: str = ""
+) -> str:
+    """Single cache query string for the advanced search fields."""
+    fields = {
+        "title": title,
+        "author": author,
+        "isbn": isbn,
+        "subject": subject,
+        "publisher": publisher,
+    }
+    return "|".join(f"{name}={normalize_query(value)}" for name, value in fields.items())
+
+
+class SearchCacheScope:
+    """
+    The cache rows of one search: (strategy, normalized query, sort).
+
+    Pages are stored one row each, so reading or writing page N never touches
+    the other pages. Per-search data that is not a page (last_page, hits,
+    sidebar_info, ...) lives in one small meta row.
+    """
+
+    def __init__(self, store: "SearchCacheStore", strategy: str, query: str, sort: str = ""):
+        self.store = store
+        self.strategy = strategy
+        self.raw_query = query
+        self.query = normalize_query(query)
+        self.sort = normalize_query(sort)
+
+    @property
+    def key(self) -> str:
+        return f"{self.strategy}:{self.query}:{self.sort}"
+
+    def record_lookup(self):
+        """Count a user lookup of this search in query_key_stats."""
+        query_key_stats.record(self.strategy, self.raw_query)
+
+    def get_page(self, page: int):
+        cache_manager.touch("search", self.key)
+        return self.store.get_page(self.strategy, self.query, self.sort, page)
+
+    def put_page(self, page: int, data):
+        self.store.put_page(self.strategy, self.query, self.sort, page, data)
+        index_search_page(self.strategy, data)
+
+    def cached_pages(self) -> list:
+        return self.store.cached_pages(self.strategy, self.query, self.sort)
+
+    def get_meta(self) -> dict:
+        cache_manager.touch("search", self.key)
+        return self.store.get_meta(self.strategy, self.query, self.sort)
+
+    def update_meta(self, **fields) -> dict:
+        return self.store.update_meta(self.strategy, self.query, self.sort, fields)
+
+
+class SearchCacheStore:
+    """
+    Per-page indexed cache for every OpenLibrary search strategy.
+
+    Backed by SQLite in WAL mode, so readers never block the writer and each
+    page is a point read/write on the (strategy, query, sort, page) primary
+    key instead of a rewrite of one big JSON file. Payloads are compact JSON
+    compressed with zlib.
+    One connection per thread; SQLite serializes writers across threads and
+    gunicorn workers.
+
+    Rows older than max_age seconds (the "search" TTL of the cache manager)
+    are never returned; the cache manager's janitor deletes them.
+    """
+
+    # strategy:query:sort, the SearchCacheScope.key of a row
+    _KEY_SQL = "strategy || ':' || query || ':' || sort"
+
+    def __init__(self, db_path=DB_PATH, max_age: float = None):
+        self.db_path = Path(db_path)
+        self.max_age = max_age
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; multi-statement updates open their own transaction
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_pages (
+                strategy TEXT NOT NULL,
+                query TEXT NOT NULL,
+                sort TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (strategy, query, sort, page)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_meta (
+                strategy TEXT NOT NULL,
+                query TEXT NOT NULL,
+                sort TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (strategy, query, sort)
+            ) WITHOUT ROWID
+            """
+        )
+
+    @staticmethod
+    def _encode(data) -> bytes:
+        raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        return zlib.compress(raw.encode("utf-8"))
+
+    @staticmethod
+    def _decode(blob: bytes):
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def scope(self, strategy: str, query: str, sort: str = "") -> SearchCacheScope:
+        return SearchCacheScope(self, strategy, query, sort)
+
+    def _fresh_since(self) -> float:
+        return time.time() - self.max_age if self.max_age else 0.0
+
+    def get_page(self, strategy: str, query: str, sort: str, page: int):
+        row = self._connect().execute(
+            "SELECT payload FROM search_pages"
+            " WHERE strategy=? AND query=? AND sort=? AND page=? AND updated_at >= ?",
+            (strategy, query, sort, page, self._fresh_since()),
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def put_page(self, strategy: str, query: str, sort: str, page: int, data):
+        payload = self._encode(data)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO search_pages VALUES (?, ?, ?, ?, ?, ?)",
+            (strategy, query, sort, page, payload, time.time()),
+        )
+        cache_manager.record_write(len(payload))
+
+    def cached_pages(self, strategy: str, query: str, sort: str) -> list:
+        rows = self._connect().execute(
+            "SELECT page FROM search_pages"
+            " WHERE strategy=? AND query=? AND sort=? AND updated_at >= ? ORDER BY page",
+            (strategy, query, sort, self._fresh_since()),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_meta(self, strategy: str, query: str, sort: str) -> dict:
+        row = self._connect().execute(
+            "SELECT payload FROM search_meta"
+            " WHERE strategy=? AND query=? AND sort=? AND updated_at >= ?",
+            (strategy, query, sort, self._fresh_since()),
+        ).fetchone()
+        return self._decode(row[0]) if row else {}
+
+    def update_meta(self, strategy: str, query: str, sort: str, fields: dict) -> dict:
+        """Merge `fields` into the meta row inside one write transaction."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = self.get_meta(strategy, query, sort)
+            meta.update(fields)
+            conn.execute(
+                "INSERT OR REPLACE INTO search_meta VALUES (?, ?, ?, ?, ?)",
+                (strategy, query, sort, self._encode(meta), time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return meta
+
+    def iter_pages(self, strategies):
+        """(strategy, page data) of every fresh cached page of these strategies."""
+        marks = ",".join("?" * len(strategies))
+        rows = self._connect().execute(
+            f"SELECT strategy, payload FROM search_pages"
+            f" WHERE strategy IN ({marks}) AND updated_at >= ?",
+            (*strategies, self._fresh_since()),
+        )
+        for strategy, payload in rows:
+            yield strategy, self._decode(payload)
+
+    # --- Housekeeping, for the cache manager ---------------------------------
+
+    def entries(self) -> list:
+        """(key, payload bytes, last update) of every cached search."""
+        return self._connect().execute(
+            f"""
+            SELECT {self._KEY_SQL}, SUM(LENGTH(payload)), MAX(updated_at) FROM (
+                SELECT strategy, query, sort, payload, updated_at FROM search_pages
+                UNION ALL
+                SELECT strategy, query, sort, payload, updated_at FROM search_meta
+            ) GROUP BY strategy, query, sort
+            """
+        ).fetchall()
+
+    def delete_searches(self, keys: list):
+        """Delete every page and the meta row of the searches with these keys."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("search_pages", "search_meta"):
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE {self._KEY_SQL} = ?", [(key,) for key in keys]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_expired(self, cutoff: float) -> list:
+        """
+        Delete rows last updated before `cutoff`.
+        Returns (key, bytes, last update) per search that lost rows.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = {}
+            for table in ("search_pages", "search_meta"):
+                rows = conn.execute(
+                    f"SELECT {self._KEY_SQL}, LENGTH(payload), updated_at FROM {table}"
+                    " WHERE updated_at < ?",
+                    (cutoff,),
+                ).fetchall()
+                for key, size, updated_at in rows:
+                    total, last = removed.get(key, (0, 0.0))
+                    removed[key] = (total + size, max(last, updated_at))
+                conn.execute(f"DELETE FROM {table} WHERE updated_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(key, size, last) for key, (size, last) in removed.items()]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCacheStore:
+    """
+    Return the process-wide search cache store, creating it on first use.
+    A brand-new database is seeded from the legacy JSON caches once.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                is_new = not DB_PATH.exists()
+                store = SearchCacheStore(max_age=cache_manager.ttl("search"))
+                if is_new:
+                    print("[Cache] New search cache database. Migrating legacy JSON caches...")
+                    print(f"[Cache] Migrated: {migrate_json_caches(store)}")
+                _store = store
+                cache_manager.start_janitor()
+    return _store
+
+
+# ---------------------------------------------------------------------------
+# One-shot migration of the legacy whole-file JSON caches
+# ---------------------------------------------------------------------------
+
+_PAGE_KEY = re.compile(r"^page_(\d+)$")
+# Sort options of the search strategies. Legacy advanced-search file names
+# turned their spaces into "_" too, so the sort is matched by name first;
+# any other sort is taken to be the last "_" part.
+LEGACY_SORTS = ("relevance", "most editions", "first published", "most recent", "top rated", "random")
+_ADVANCE_FILE = re.compile(
+    r"^title=(.*)_author=(.*)_isbn=(.*)_subject=(.*)_publisher=(.*?)_("
+    + "|".join(re.escape(sort.replace(" ", "_")) for sort in LEGACY_SORTS)
+    + r"|[^_]+)$"
+)
+
+
+def _page_items(data: dict):
+    for key, value in data.items():
+        match = _PAGE_KEY.match(key)
+        if match:
+            yield int(match.group(1)), value
+
+
+def _from_filename(part: str) -> str:
+    return part.replace("_", " ")
+
+
+def _migrate_books(store, path: Path, strategy: str, query: str, sort: str) -> int:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    scope = store.scope(strategy, query, sort)
+    pages = list(_page_items(data.get("pages", {})))
+    for page, books in pages:
+        scope.put_page(page, books)
+    scope.update_meta(
+        **{k: data[k] for k in ("last_page", "hits", "sidebar_info") if k in data}
+    )
+    return len(pages)
+
+
+def migrate_json_caches(store: SearchCacheStore = None, delete_files: bool = False) -> dict:
+    """
+    Load every legacy JSON file under data_cache/openlibrary/search_page into
+    the SQLite store. Safe to re-run: rows are upserted.
+    Legacy files are kept unless `delete_files` is True.
+    """
+    store = store or get_search_cache()
+    counts = {}
+    migrated = []
+
+    def done(kind, path, pages):
+        counts.setdefault(kind, {"files": 0, "pages": 0})
+        counts[kind]["files"] += 1
+        counts[kind]["pages"] += pages
+        migrated.append(path)
+
+    for path in sorted((SEARCH_CACHE_DIR / "search_by_books").glob("*.json")):
+        query, _, sort = path.stem.rpartition("__")
+        done("books", path, _migrate_books(store, path, "books", _from_filename(query), sort))
+
+    for path in sorted((SEARCH_CACHE_DIR / "search_by_advance_search").glob("*.json")):
+        match = _ADVANCE_FILE.match(path.stem)
+        if not match:
+            print(f"[Migrate] Skipping unrecognised file: {path.name}")
+            continue
+        *fields, sort = [_from_filename(part) for part in match.groups()]
+        query = advance_search_query(*fields)
+        done("advance", path, _migrate_books(store, path, "advance", query, sort))
+
+    for kind, prefix in (("author", "search_author_"), ("inside", "search_inside_")):
+        for path in sorted((SEARCH_CACHE_DIR / f"search_by_{kind}").glob(f"{prefix}*.json")):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            pages = list(_page_items(data))
+            query = data.get("query")
+            if not query:
+                # Inside-search files keep the query inside each page
+                query = next((p.get("query") for _, p in pages if isinstance(p, dict) and p.get("query")), None)
+            query = query or _from_filename(path.stem[len(prefix):])
+            scope = store.scope(kind, query)
+            for page, payload in pages:
+                scope.put_page(page, payload)
+            done(kind, path, len(pages))
+
+    for path in sorted((SEARCH_CACHE_DIR / "search_by_subject").glob("search_subject_*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        query = data.get("query") or _from_filename(path.stem[len("search_subject_"):])
+        store.scope("subject", query).put_page(1, data)
+        done("subject", path, 1)
+
+    if delete_files:
+        for path in migrated:
+            path.unlink()
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migrate legacy JSON search caches into the SQLite search cache."
+    )
+    parser.add_argument(
+        "--delete", action="store_true", help="Delete the JSON files after migrating them."
+    )
+    args = parser.parse_args()
+
+    result = migrate_json_caches(delete_files=args.delete)
+    print(json.dumps(result, indent=2))
@@ -1,416 +1,355 @@
-import requests
-import json
-import re
+import asyncio
+import os
 import time
-from pathlib import Path
-from bs4 import BeautifulSoup, NavigableString
+from bs4 import BeautifulSoup
 from urllib.parse import urljoin, quote_plus, urlencode
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Thread
 
-import undetected_chromedriver as uc
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from threading import Lock
-from typing import Callable
-
 from abc import ABC, abstractmethod
 
+from services.openlibrary.book_index import get_book_index
+from services.openlibrary.http_client import get_async_http_client, get_http_client
+from services.openlibrary.prefetcher import page_prefetcher
+from services.openlibrary.coalescer import search_coalescer
+from services.openlibrary.facets import fetch_sidebar_info
+from services.openlibrary.parsers import get_search_parser
+from services.openlibrary.search_cache import get_search_cache, advance_search_query
+
 
 class SearchStrategy(ABC):
+    # Range fetches: upstream pages fetched at once per request, pages per request
+    RANGE_CONCURRENCY = 4
+    MAX_RANGE_PAGES = 10
+
     @abstractmethod
     def search(self, page: int = 1) -> dict:
         """Perform a search and return the results."""
         pass
 
+    async def asearch(self, page: int = 1) -> dict:
+        """
+        Async search for the ASGI endpoints. Strategies without a native async
+        path run their sync search() on a worker thread.
+        """
+        return await asyncio.to_thread(self.search, page)
 
-class SearchByBookStrategy(SearchStrategy):
-    """
-    In this search strategy we are fetching content from source url where most of the content is static and some content (in the right sidebar) is dynamic. Here we are creating methods in such a way we get all things in frontend in minimum time.
+    def record_lookup(self):
+        """
+        Count one user lookup of this search in query_key_stats. Called once
+        per request by SearchContext, not per page fetched or prefetched.
+        """
+        self.cache.record_lookup()
 
-    For that we have divided content into 3 categories:
-    1) First page static data
-    2) Remaining page static data
-    3) Common dynamic data
+    async def asearch_pages(self, page_from: int, page_to: int) -> dict:
+        """
+        Results of pages page_from..page_to (clamped to last_page) in one call,
+        for strategies whose results look like {"pages": {"page_N": [...]}, ...}.
 
-    At start we are taking book title and filter(optional) from frontend by this we are creating customized url for data fetching.
-    By this url we are fetchin first page static data and returing it to frontend immediately so that user don't have to wait and saving it in cache so that when user search same book title second onwards time it will fetch data from cache this insure minimum response time.
-    After that in background we are fetching dynamic data where we wait for right sidebar to show up when it shows up we fetch content from it and return it immediately later we save data in same cache file.
-    At last we are fetching remaining pages using multi threading for fastest data fetching and later saves it in cache file.
+        The first page runs alone, so a search that is not cached yet is
+        fetched once (and its meta stored) before the rest go out. The
+        missing pages are then fetched concurrently, at most
+        RANGE_CONCURRENCY at a time. Each one goes through asearch(), so it
+        is cached and coalesced like a single-page request.
+        """
+        first = await self.asearch(page_from)
+        meta = {key: value for key, value in first.items() if key != "pages"}
+        found = dict(first["pages"])
 
-    Seens we are using threading for background task there can be senario of race condition for that we are putting thread lock on file insure only single function can write in cache file.
-    """
+        last_page = meta.get("last_page") or page_to
+        wanted = range(page_from, min(page_to, last_page) + 1)
+        semaphore = asyncio.Semaphore(self.RANGE_CONCURRENCY)
 
-    BASE_URL = "https://openlibrary.org"
-    SEARCH_URL_TEMPLATE = BASE_URL + "/search?q={query}{sort_suffix}&page={page}"
-    SIDEBAR_URL_TEMPLATE = BASE_URL + "/search?q={query}&mode=everything"
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "search_page"
-        / "search_by_books"
-    )
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        async def fetch(page: int) -> dict:
+            async with semaphore:
+                return (await self.asearch(page))["pages"]
 
-    def __init__(self, query: str, sort_by: str = "relevance", headless: bool = True):
-        self.query = query
-        self.headless = headless
-        self._file_lock = Lock()
+        missing = [page for page in wanted if f"page_{page}" not in found]
+        for pages in await asyncio.gather(*(fetch(page) for page in missing)):
+            found.update(pages)
 
-        self.sort_by = sort_by.lower()
-        self.encoded_query = quote_plus(query)
-        self.sort_suffix = self._get_sort_suffix()
+        # Only the requested slice; a fresh search also returns page_1
+        return {
+            "pages": {f"page_{page}": found[f"page_{page}"] for page in wanted},
+            **meta,
+        }
 
-        self.filename = (
-            self.CACHE_DIR / f"{query.replace(' ', '_').lower()}__{self.sort_by}.json"
-        )
+
+class SearchResultsStrategy(SearchStrategy):
+    """
+    Fetching and caching shared by the strategies that scrape OpenLibrary's
+    /search result pages (book and advanced search). Subclasses set
+    self.cache, self.prefetch_key and self.sort_by and build the URLs
+    (_search_url, _fetch_sidebar_info).
+
+    search() and asearch() differ only in how a page is fetched: the cache
+    lookup (_cached_result) and the parsing and caching of a fetched page
+    (_store_result) are the same sync steps, which asearch() runs on a
+    worker thread so neither SQLite nor the parser blocks the event loop.
+    """
+
+    SORT_SUFFIXES = {
+        "relevance": "",  # default
+        "most editions": "&sort=editions",
+        "first published": "&sort=old",
+        "most recent": "&sort=new",
+        "top rated": "&sort=rating",
+        "random": "&sort=random",
+    }
 
     def _get_sort_suffix(self) -> str:
-        sort_map = {
-            "relevance": "",  # default
-            "most editions": "&sort=editions",
-            "first published": "&sort=old",
-            "most recent": "&sort=new",
-            "top rated": "&sort=rating",
-            "random": "&sort=random",
-        }
-        return sort_map.get(self.sort_by.lower(), "")
+        return self.SORT_SUFFIXES.get(self.sort_by.lower(), "")
+
+    @abstractmethod
+    def _search_url(self, page: int) -> str:
+        """URL of one result page."""
+
+    @abstractmethod
+    def _fetch_sidebar_info(self) -> dict:
+        """Sidebar facets of the search."""
 
     def search(self, page: int = 1) -> dict:
+        """
+        Concurrent identical requests (same search and page, in this or another
+        worker) are coalesced into a single fetch; see RequestCoalescer.
+        """
+        return search_coalescer.run(
+            f"{self.cache.key}:page_{page}", lambda: self._search(page)
+        )
+
+    def _search(self, page: int = 1) -> dict:
         """
         Fetch search results and handle caching for each page.
         If the cache exists and the requested page exists in it, return cached data.
         If the requested page doesn't exist in the cache, fetch and update the cache for that page.
         Also initiates a background fetch for sidebar data if not already cached.
         """
+        result, meta = self._cached_result(page)
+        if result is None:
+            # A search that is not cached yet starts from page 1
+            html = self._fetch_search_page(page=page if meta else 1)
+            result = self._store_result(page, html, meta)
+        return result
+
+    async def asearch(self, page: int = 1) -> dict:
+        """
+        Async version of search() for the ASGI endpoints. Same cache, same
+        coalescing and same result shape, but while waiting on OpenLibrary or
+        the cache no thread is held.
+        """
+        return await search_coalescer.arun(
+            f"{self.cache.key}:page_{page}", lambda: self._asearch(page)
+        )
+
+    async def _asearch(self, page: int = 1) -> dict:
+        """Async version of _search(): only the fetch differs."""
+        result, meta = await asyncio.to_thread(self._cached_result, page)
+        if result is None:
+            html = await self._afetch_search_page(page=page if meta else 1)
+            result = await asyncio.to_thread(self._store_result, page, html, meta)
+        return result
+
+    def _cached_result(self, page: int):
+        """
+        (result, meta): the cached result for `page`, or None and the
+        search's meta when the page has to be fetched (empty meta: the
+        search itself is not cached yet).
+        """
         page_key = f"page_{page}"
+        meta = self.cache.get_meta()
 
-        # Scenario A: If the cache file exists
-        if self.filename.exists():
-            cached_data = json.loads(self.filename.read_text(encoding="utf-8"))
+        # Scenario A: This search is already cached (page 1 + meta)
+        if meta:
+            page_books = self.cache.get_page(page)
 
             # Scenario A1: Requested page is in cache
-            if page_key in cached_data.get("pages", {}):
-                print(
-                    f"[Cache Hit] Returning cached data for {page_key} from: {self.filename}"
-                )
-                return cached_data
+            if page_books is not None:
+                print(f"[Cache Hit] Returning cached {page_key} for: {self.cache.key}")
+                page_prefetcher.record_read(self.prefetch_key, page)
+                return {"pages": {page_key: page_books}, **meta}, meta
 
-            # Scenario A2: Page is not in cache – fetch and update
+            # Scenario A2: Page is not in cache – fetch and store only that page
             print(f"[Cache Miss] {page_key} not found. Fetching and updating cache.")
-            html = self._fetch_search_page(page=page)
-            soup = BeautifulSoup(html, "lxml")
-            page_books = self._extract_books(soup)
-
-            # Update cached_data and write it back
-            cached_data.setdefault("pages", {})[page_key] = page_books
-
-            self._save_to_cache(
-                lambda data: {
-                    **(data or {}),
-                    "pages": cached_data["pages"],
-                    "last_page": cached_data.get("last_page"),
-                    "hits": cached_data.get("hits"),
-                    "sidebar_info": cached_data.get(
-                        "sidebar_info"
-                    ),  # Preserve if already exists
-                }
-            )
+        else:
+            # Scenario B: Cache does not exist — fetch from scratch
+            print(f"[Cache] No cache found. Fetching new data.")
+        return None, meta
 
-            return {
-                "pages": cached_data["pages"],
-                "last_page": cached_data.get("last_page"),
-                "hits": cached_data.get("hits"),
-            }
+    def _store_result(self, page: int, html: str, meta: dict) -> dict:
+        """
+        Parse a fetched page, cache it and return it as a result. Without
+        `meta` the search was not cached and `html` is page 1: its meta is
+        stored too and the background tasks start.
+        """
+        parsed = get_search_parser().parse_search_page(html)
 
-        # Scenario B: Cache does not exist — fetch from scratch
-        print(f"[Cache] No cache found. Fetching new data.")
+        # Scenario A2: store only the requested page
+        if meta:
+            self.cache.put_page(page, parsed["books"])
+            return {"pages": {f"page_{page}": parsed["books"]}, **meta}
 
-        html = self._fetch_search_page(page=1)
-        soup = BeautifulSoup(html, "lxml")
-        page_1_books = self._extract_books(soup)
-        last_page = self._extract_last_page(soup)
-        hits = self._extract_no_of_hits(soup)
-
-        result = {
-            "pages": {"page_1": page_1_books},
-            "last_page": last_page,
-            "hits": hits,
-        }
+        # Scenario B: page first, meta marks the search as cached
+        self.cache.put_page(1, parsed["books"])
+        self.cache.update_meta(last_page=parsed["last_page"], hits=parsed["hits"])
 
-        # Save initial result to cache
-        self._save_to_cache(lambda _: result)
+        self._start_background_tasks(parsed["last_page"])
 
+        return {
+            "pages": {"page_1": parsed["books"]},
+            "last_page": parsed["last_page"],
+            "hits": parsed["hits"],
+        }
+
+    def _start_background_tasks(self, last_page: int):
+        """Sidebar facets and the next pages are fetched after page 1 is returned."""
         # Background thread: fetch sidebar data
         def background_fetch_sidebar():
             sidebar_info = self._fetch_sidebar_info()
             print("[Sidebar] Extracted:", sidebar_info)
-
-            def update(data):
-                data = data or {}
-                data["sidebar_info"] = sidebar_info
-                return data
-
-            self._save_to_cache(update)
-            uc.Chrome.__del__ = lambda self: None
+            self.cache.update_meta(sidebar_info=sidebar_info)
 
         Thread(target=background_fetch_sidebar).start()
 
-        return result
+        # Background: warm the next pages into the cache (bounded)
+        page_prefetcher.schedule(
+            self.prefetch_key, range(2, last_page + 1), self._prefetch_page
+        )
+
+    def _prefetch_page(self, page: int):
+        """Fetch one result page in the background and store it in the cache."""
+        # Same lock as a request for this page, so they never fetch it twice
+        with search_coalescer.lock(f"{self.cache.key}:page_{page}"):
+            if self.cache.get_page(page) is not None:
+                return
+            html = self._fetch_search_page(page=page)
+            page_books = get_search_parser().parse_search_page(html)["books"]
+            self.cache.put_page(page, page_books)
 
     def _fetch_search_page(self, page: int = 1) -> str:
-        search_url = self.SEARCH_URL_TEMPLATE.format(
-            query=self.encoded_query, page=page, sort_suffix=self.sort_suffix
-        )
+        search_url = self._search_url(page)
         print(f"[Fetch] Hitting URL: {search_url}")
-        response = requests.get(search_url)
+        response = get_http_client().get(search_url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch page {page}: {response.status_code}")
         return response.text
 
-    def _extract_books(self, soup: BeautifulSoup) -> list:
-        results_container = soup.find("div", class_="resultsContainer")
-        results_list = (
-            results_container.find("ul", class_="list-books")
-            if results_container
-            else None
-        )
-        result_items = (
-            results_list.find_all("li", class_="searchResultItem")
-            if results_list
-            else []
-        )
-
-        books = []
-        for item in result_items:
-            img_tag = item.find("img", itemprop="image")
-            img_src = img_tag.get("src").strip() if img_tag else None
-            if img_src:
-                if img_src.startswith("//"):
-                    img_src = "https:" + img_src
-                elif img_src.startswith("/"):
-                    img_src = "https://openlibrary.org" + img_src
-
-            title_a = item.select_one("h3.booktitle a.results")
-            raw_title = title_a.get_text() if title_a else ""
-            book_title = re.sub(r"\s+", " ", raw_title).strip()
-            book_url = urljoin(self.BASE_URL, title_a.get("href")) if title_a else None
-
-            author_a = item.select_one("span.bookauthor a")
-            author_name = author_a.get_text(strip=True) if author_a else None
-
-            rating_span = item.select_one(
-                "span.ratingsByline span[itemprop='ratingValue']"
-            )
-            rating_text = rating_span.get_text(strip=True) if rating_span else ""
-            rating_value, num_ratings = None, None
-
-            if rating_text:
-                parts = rating_text.split("(")
-                if parts:
-                    rating_value = parts[0].strip()
-                if len(parts) > 1:
-                    num_ratings = (
-                        parts[1].replace("ratings", "").replace(")", "").strip()
-                    )
-            details_span = item.select_one("span.resultDetails")
-            first_published, num_editions = None, None
-            if details_span:
-                details_text = details_span.get_text(" ", strip=True)
-                parts = details_text.split("—")
-                if len(parts) >= 1 and "First published in" in parts[0]:
-                    first_published = parts[0].replace("First published in", "").strip()
-                if len(parts) >= 2:
-                    edition_link = details_span.find("a")
-                    if edition_link:
-                        raw_editions = edition_link.get_text()
-                        num_editions = re.sub(r"\s+", " ", raw_editions).strip()
-            books.append(
-                {
-                    "imgSrc": img_src,
-                    "title": book_title,
-                    "url": book_url,
-                    "author": author_name,
-                    "rating": rating_value,
-                    "num_ratings": num_ratings,
-                    "first_published": first_published,
-                    "num_editions": num_editions,
-                }
-            )
-        return books
+    async def _afetch_search_page(self, page: int = 1) -> str:
+        search_url = self._search_url(page)
+        print(f"[Fetch] Hitting URL (async): {search_url}")
+        response = await get_async_http_client().get(search_url)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch page {page}: {response.status_code}")
+        return response.text
 
-    def _extract_last_page(self, soup: BeautifulSoup) -> int:
-        pagination = soup.find("div", class_="pagination")
-        if not pagination:
-            return 1
-        pages = pagination.find_all("a")
-        for page in reversed(pages):
-            if page.text.strip().isdigit():
-                return int(page.text.strip())
-        return 1
 
-    def _extract_no_of_hits(self, soup: BeautifulSoup) -> int:
-        hits_div = soup.find("div", class_="search-results-stats")
-        if not hits_div:
-            return 0
+class SearchByBookStrategy(SearchResultsStrategy):
+    """
+    In this search strategy we are fetching content from source url where most of the content is static and some content (in the right sidebar) is dynamic. Here we are creating methods in such a way we get all things in frontend in minimum time.
 
-        text = hits_div.get_text(strip=True)
-        match = re.search(r"([\d,]+)\s+hits", text, re.IGNORECASE)
+    For that we have divided content into 3 categories:
+    1) First page static data
+    2) Remaining page static data
+    3) Common dynamic data
 
-        if match:
-            hits_str = match.group(1).replace(",", "")
-            return int(hits_str)
-        return 0
+    At start we are taking book title and filter(optional) from frontend by this we are creating customized url for data fetching.
+    By this url we are fetchin first page static data and returing it to frontend immediately so that user don't have to wait and saving it in cache so that when user search same book title second onwards time it will fetch data from cache this insure minimum response time.
+    After that in background we are fetching dynamic data (the right sidebar facets) over plain HTTP from OpenLibrary's facets partial, falling back to a pooled browser only if that fails, and later we save data in the same cache entry.
+    At last we are prefetching the next few pages in background through the shared bounded PagePrefetcher (limited threads, per-query and global caps) and saving them in cache, so clicking "next" is a cache hit.
 
-    def _fetch_sidebar_info(self) -> dict:
-        options = Options()
-        options.headless = self.headless
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
+    Seens we are using threading for background task there can be senario of race condition, so every page is its own row in the SQLite search cache (WAL mode) and the sidebar is merged into the meta row in a transaction; writers never rewrite each other's data.
+    """
 
-        driver = uc.Chrome(options=options)
-        sidebar_url = self.SIDEBAR_URL_TEMPLATE.format(query=self.encoded_query)
-        print(f"[Sidebar] Fetching with undetected_selenium: {sidebar_url}")
+    BASE_URL = "https://openlibrary.org"
+    SEARCH_URL_TEMPLATE = BASE_URL + "/search?q={query}{sort_suffix}&page={page}"
+    SIDEBAR_URL_TEMPLATE = BASE_URL + "/search?q={query}&mode=everything"
+    def __init__(self, query: str, sort_by: str = "relevance", headless: bool = True):
+        self.query = query
+        self.headless = headless
 
-        driver.get(sidebar_url)
-        try:
-            # Wait up to 10 seconds for at least one facet to appear.
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div.facet h4.facetHead")
-                )
-            )
-        except Exception as e:
-            print("[Sidebar] Timeout or error waiting for facet head:", e)
+        self.sort_by = sort_by.lower()
+        self.encoded_query = quote_plus(query)
+        self.sort_suffix = self._get_sort_suffix()
 
-        html = driver.page_source
-        driver.quit()
+        self.cache = get_search_cache().scope("books", query, self.sort_by)
+        self.prefetch_key = self.cache.key
 
-        soup = BeautifulSoup(html, "lxml")
-        sidebar_info = {}
-        facet_groups = soup.find_all(
-            "div", class_=lambda x: x and x.startswith("facet")
+    def _search_url(self, page: int) -> str:
+        return self.SEARCH_URL_TEMPLATE.format(
+            query=self.encoded_query, page=page, sort_suffix=self.sort_suffix
         )
 
-        for group in facet_groups:
-            header = group.find("h4", class_="facetHead")
-            if not header:
-                continue
-            facet_name = header.get_text(strip=True)
-            entries = []
-            for entry in group.find_all("div", class_="facetEntry"):
-                a_tag = entry.find("a", href=True)
-                label_tag = entry.find("span", class_="small")
-                count_tag = entry.find("span", class_="smaller")
-
-                if a_tag and label_tag and count_tag:
-                    label = label_tag.get_text(strip=True)
-                    count_text = count_tag.get_text(strip=True)
-                    try:
-                        count = int(count_text)
-                    except ValueError:
-                        count = count_text
-
-                    relative_url = a_tag["href"]
-                    full_url = urljoin(self.BASE_URL, relative_url)
-
-                    entries.append({"label": label, "count": count, "url": full_url})
-            sidebar_info[facet_name] = entries
-        return sidebar_info
-
-    def _load_from_cache(self) -> dict:
-        try:
-            if self.filename.exists() and self.filename.stat().st_size > 0:
-                with self.filename.open("r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"[Warning] Failed to load JSON: {e}")
-        return {}
-
-    def _save_to_cache(self, update_fn: Callable[[dict], dict]):
-        with self._file_lock:
-            data = self._load_from_cache()
-            updated_data = update_fn(data)
-            try:
-                with self.filename.open("w", encoding="utf-8") as f:
-                    json.dump(updated_data, f, indent=2, ensure_ascii=False)
-                print(f"[Saved] JSON updated at: {self.filename}")
-            except Exception as e:
-                print(f"[Error] JSON save failed: {e}")
+    def _fetch_sidebar_info(self) -> dict:
+        sidebar_url = self.SIDEBAR_URL_TEMPLATE.format(query=self.encoded_query)
+        print(f"[Sidebar] Fetching facets: {sidebar_url}")
+        return fetch_sidebar_info(sidebar_url)
 
 
 class SearchByAuthorStrategy(SearchStrategy):
     """
     Strategy to fetch author search results and their books (only first author).
+
+    The whole bibliography can be loaded with iter_bibliography(): the
+    remaining book pages are fetched concurrently (bounded) and yielded as
+    they arrive.
     """
 
     BASE_URL = "https://openlibrary.org"
     AUTHOR_SEARCH_URL = BASE_URL + "/search/authors?q={query}&page={page}"
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "search_page"
-        / "search_by_author"
-    )
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    BIBLIOGRAPHY_WORKERS = 4
 
     def __init__(self, query: str, page: int = 1):
         self.query = query
         self.page = page
         self.encoded_query = quote_plus(query)
-        self.filename = self._build_cache_filename()
-        self.lock = Lock()
+        self.cache = get_search_cache().scope("author", query)
 
     def search(self, page: int = 1) -> dict:
         """
-        Fetch search results and handle caching for each page.
-        If the cache exists and the requested page exists in it, return cached data.
-        If the requested page doesn't exist in the cache, fetch and update the cache for that page.
+        Concurrent identical requests are coalesced into a single fetch.
         """
-        # If the cache file exists
-        if self.filename.exists():
-            cached_data = self._load_from_cache()
+        return search_coalescer.run(
+            f"{self.cache.key}:page_{page}", lambda: self._search(page)
+        )
 
-            # Check if the requested page is already in the cache
-            page_key = f"page_{page}"
-            if page_key in cached_data:
-                print(f"[Cache] Loaded {page_key} from {self.filename}")
-                return cached_data
+    def _search(self, page: int = 1) -> dict:
+        """
+        Fetch search results and handle caching for each page.
+        If the requested page exists in the cache, return it.
+        If the author is cached but the requested page isn't, fetch and cache only that page.
+        """
+        page_key = f"page_{page}"
 
-            # If the page isn't in the cache, call get_books_by_page to fetch and update cache
-            else:
-                print(f"[Cache] {page_key} not found. Fetching and updating cache.")
-                books = self.get_books_by_page(page)
+        # Check if the requested page is already in the cache
+        cached_page = self.cache.get_page(page)
+        if cached_page is not None:
+            print(f"[Cache] Loaded {page_key} for: {self.cache.key}")
+            return {"query": self.query, page_key: cached_page}
 
-                # After updating the cache, load and return the data
-                updated_cached_data = self._load_from_cache()
-                return updated_cached_data
+        # If the author is cached but not this page, call get_books_by_page to fetch and update cache
+        if self.cache.get_page(self.page) is not None:
+            print(f"[Cache] {page_key} not found. Fetching and updating cache.")
+            books = self.get_books_by_page(page)
+            return {"query": self.query, page_key: {"authors": [{"books": books}]}}
 
         # If the cache doesn't exist, fetch new data from the web
-        else:
-            print(f"[Cache] No cache found. Fetching new data.")
-            html = self._fetch_html()
-            data = self._parse_html(html)
-            self._save_to_cache(data)
-            return data
+        print(f"[Cache] No cache found. Fetching new data.")
+        html = self._fetch_html()
+        data = self._parse_html(html)
+        self._save_to_cache(data)
+        return data
 
     def get_books_by_page(self, page: int) -> list:
         """
         Fetch books from a specific page of the cached author's profile
-        and update the JSON cache using the centralized _save_to_cache method.
+        and store that page using the centralized _save_to_cache method.
         """
-        cached = self._load_from_cache()
-        first_page_key = f"page_{self.page}"
-        if first_page_key not in cached:
+        first_page = self.cache.get_page(self.page)
+        if first_page is None:
             raise ValueError(
-                f"Author data for {first_page_key} not in cache. Please run search() first."
+                f"Author data for page_{self.page} not in cache. Please run search() first."
             )
 
-        author_info = cached[first_page_key]["authors"][0]
+        author_info = first_page["authors"][0]
         author_url = author_info.get("author_url")
         if not author_url:
             raise ValueError("Author URL missing in cache.")
@@ -424,14 +363,10 @@ class SearchByAuthorStrategy(SearchStrategy):
 
         return books
 
-    def _build_cache_filename(self) -> Path:
-        safe_query = self.query.replace(" ", "_").lower()
-        return self.CACHE_DIR / f"search_author_{safe_query}.json"
-
     def _fetch_html(self) -> str:
         url = self.AUTHOR_SEARCH_URL.format(query=self.encoded_query, page=self.page)
         print(f"[Fetch] Requesting URL: {url}")
-        response = requests.get(url)
+        response = get_http_client().get(url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch author results: {response.status_code}")
         return response.text
@@ -462,9 +397,10 @@ class SearchByAuthorStrategy(SearchStrategy):
             about_tag = first_author.select_one("span.small.grey")
             about = about_tag.get_text(strip=True) if about_tag else ""
 
-            # Fetch page 1 books + total pages
-            books = self._fetch_author_books(author_url, page=1)
-            total_pages = self._get_total_pages(author_url)
+            # One request for page 1 gives both its books and the page count
+            first_page_html = self._fetch_author_page(author_url, page=1)
+            books = get_search_parser().parse_author_books(first_page_html or "")
+            total_pages = self._parse_total_pages(first_page_html or "")
 
             authors.append(
                 {
@@ -482,69 +418,27 @@ class SearchByAuthorStrategy(SearchStrategy):
             f"page_{self.page}": {"total_hits": total_hits, "authors": authors},
         }
 
-    def _fetch_author_books(self, author_url: str, page: int = 1) -> list:
+    def _fetch_author_page(self, author_url: str, page: int = 1):
+        """HTML of one page of the author's books, or None if it can't be fetched."""
         url = f"{author_url}?page={page}"
         print(f"[Fetch] Visiting author book page: {url}")
         try:
-            response = requests.get(url)
+            response = get_http_client().get(url)
             if response.status_code != 200:
-                return []
+                return None
         except Exception as e:
             print(f"[Error] While fetching page {page}: {e}")
-            return []
-
-        soup = BeautifulSoup(response.text, "lxml")
-        book_items = soup.select("li.searchResultItem.sri--w-main")
-
-        books = []
-        for book in book_items:
-            title_tag = book.select_one("h3.booktitle a.results")
-            book_title = title_tag.get_text(strip=True) if title_tag else ""
-            book_url = (
-                urljoin(self.BASE_URL, title_tag.get("href")) if title_tag else ""
-            )
-
-            img_tag = book.select_one("img[itemprop='image']")
-            image_src = img_tag.get("src") if img_tag else ""
-            if image_src.startswith("//"):
-                image_src = "https:" + image_src
-            elif image_src.startswith("/"):
-                image_src = urljoin(self.BASE_URL, image_src)
-
-            author_tag = book.select_one("span.bookauthor a")
-            book_author = author_tag.get_text(strip=True) if author_tag else ""
-
-            details = book.select_one("span.resultDetails")
-            first_published, editions = "", ""
-            if details:
-                spans = details.find_all("span")
-                if len(spans) >= 2:
-                    first_published = spans[0].get_text(strip=True)
-                    editions = spans[1].get_text(strip=True)
-
-            books.append(
-                {
-                    "title": book_title,
-                    "book_url": book_url,
-                    "image_src": image_src,
-                    "author": book_author,
-                    "first_published": first_published,
-                    "editions": editions,
-                }
-            )
-
-        return books
+            return None
+        return response.text
 
-    def _get_total_pages(self, author_url: str) -> int:
-        url = f"{author_url}?page=1"
-        try:
-            response = requests.get(url)
-            if response.status_code != 200:
-                return 1
-        except Exception:
-            return 1
+    def _fetch_author_books(self, author_url: str, page: int = 1) -> list:
+        html = self._fetch_author_page(author_url, page)
+        if html is None:
+            return []
+        return get_search_parser().parse_author_books(html)
 
-        soup = BeautifulSoup(response.text, "lxml")
+    def _parse_total_pages(self, html: str) -> int:
+        soup = BeautifulSoup(html, "lxml")
         pagination = soup.select_one("div.pagination")
         if pagination:
             links = pagination.select("a")
@@ -555,23 +449,63 @@ class SearchByAuthorStrategy(SearchStrategy):
                     return 1
         return 1
 
-    def _load_from_cache(self) -> dict:
-        with open(self.filename, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def iter_bibliography(self):
+        """
+        Yield the author's books page by page: {"page", "total_pages", "books"}.
 
-    def _save_to_cache(self, data: dict):
-        with self.lock:
-            if self.filename.exists():
-                with open(self.filename, "r+", encoding="utf-8") as f:
-                    existing = json.load(f)
-                    existing.update(data)
-                    f.seek(0)
-                    json.dump(existing, f, indent=2, ensure_ascii=False)
-                    f.truncate()
+        Page 1 (with the page count) comes from search(); cached pages are
+        yielded straight away. The rest are fetched by at most
+        BIBLIOGRAPHY_WORKERS threads and yielded in completion order, each
+        stored as its own cache row on arrival.
+        """
+        first = self.search(self.page)[f"page_{self.page}"]
+        if not first.get("authors"):
+            return
+        author = first["authors"][0]
+        author_url = author.get("author_url")
+        total_pages = author.get("total_pages", 1)
+        yield {"page": self.page, "total_pages": total_pages, "books": author.get("books", [])}
+
+        missing = []
+        for page in range(1, total_pages + 1):
+            if page == self.page:
+                continue
+            cached = self.cache.get_page(page)
+            if cached is None:
+                missing.append(page)
             else:
-                with open(self.filename, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-            print(f"[Saved] Data saved to {self.filename}")
+                yield {"page": page, "total_pages": total_pages, "books": cached["authors"][0]["books"]}
+
+        if not missing or not author_url:
+            return
+
+        def fetch(page: int) -> list:
+            html = self._fetch_author_page(author_url, page)
+            if html is None:
+                return []  # not cached, so a later load retries it
+            books = get_search_parser().parse_author_books(html)
+            self.cache.put_page(page, {"authors": [{"books": books}]})
+            return books
+
+        print(f"[Bibliography] Fetching {len(missing)} pages for: {self.cache.key}")
+        with ThreadPoolExecutor(max_workers=self.BIBLIOGRAPHY_WORKERS) as executor:
+            futures = {executor.submit(fetch, page): page for page in missing}
+            try:
+                for future in as_completed(futures):
+                    yield {"page": futures[future], "total_pages": total_pages, "books": future.result()}
+            finally:
+                # Client went away: don't start the pages that are still queued
+                for future in futures:
+                    future.cancel()
+
+    def _save_to_cache(self, data: dict):
+        """
+        Store every "page_N" entry of `data` as its own cache row.
+        """
+        for key, value in data.items():
+            if key.startswith("page_"):
+                self.cache.put_page(int(key[len("page_"):]), value)
+        print(f"[Saved] Data saved for: {self.cache.key}")
 
 
 class SearchByInsideStrategy(SearchStrategy):
@@ -586,20 +520,12 @@ class SearchByInsideStrategy(SearchStrategy):
       - Extract:
           • Result statistics (hits, response time)
           • Image, title, URL, author list (with URLs), and snippet highlights for each result
-      - Cache the results page-wise in a JSON file (e.g., "page_1", "page_2" as keys)
+      - Cache the results page-wise in the search cache (one row per page)
       - Reuse cache if available
     """
 
     BASE_URL = "https://openlibrary.org"
     SEARCH_INSIDE_URL = BASE_URL + "/search/inside?q={query}&page={page}"
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "search_page"
-        / "search_by_inside"
-    )
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
     def __init__(self, query: str):
         """
@@ -607,44 +533,41 @@ class SearchByInsideStrategy(SearchStrategy):
         """
         self.query = query
         self.encoded_query = quote_plus(query)
-        self.filename = self._build_cache_filename()
+        self.cache = get_search_cache().scope("inside", query)
 
     def search(self, page: int = 1) -> dict:
         """
         Entry point: Return results for the specified page.
+        Concurrent identical requests are coalesced into a single fetch.
+        """
+        return search_coalescer.run(
+            f"{self.cache.key}:page_{page}", lambda: self._search(page)
+        )
+
+    def _search(self, page: int = 1) -> dict:
+        """
         Use cache if available; else fetch, parse, and store.
         """
         key = f"page_{page}"
 
-        if self.filename.exists():
-            cached_data = self._load_from_cache()
-            if key in cached_data:
-                print(f"[Cache] Loaded {key} from {self.filename}")
-                return {key: cached_data[key]}
+        cached_page = self.cache.get_page(page)
+        if cached_page is not None:
+            print(f"[Cache] Loaded {key} for: {self.cache.key}")
+            return {key: cached_page}
 
         html = self._fetch_html(page)
         parsed_data = self._parse_html(html)
-
-        all_data = self._load_from_cache()
-        all_data[key] = parsed_data
-        self._save_to_cache(all_data)
+        self._save_to_cache(page, parsed_data)
 
         return {key: parsed_data}
 
-    def _build_cache_filename(self) -> Path:
-        """
-        Build a consistent filename for caching based on the query.
-        """
-        safe_query = self.query.replace(" ", "_").lower()
-        return self.CACHE_DIR / f"search_inside_{safe_query}.json"
-
     def _fetch_html(self, page: int) -> str:
         """
         Request the inside search page HTML from Open Library.
         """
         url = self.SEARCH_INSIDE_URL.format(query=self.encoded_query, page=page)
         print(f"[Fetch] Requesting URL: {url}")
-        response = requests.get(url)
+        response = get_http_client().get(url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch inside results: {response.status_code}")
         return response.text
@@ -653,109 +576,14 @@ class SearchByInsideStrategy(SearchStrategy):
         """
         Parse HTML and extract inside search results.
         """
-        soup = BeautifulSoup(html, "lxml")
-
-        # Stats
-        stats_element = soup.find("p", class_="search-results-stats")
-        stats_text = stats_element.get_text(strip=True) if stats_element else ""
-
-        # All result items
-        result_items = soup.find_all(
-            "li", class_=lambda c: c and "searchResultItem" in c
-        )
-        results = []
-
-        for item in result_items:
-            # Image
-            img_tag = item.find("img", itemprop="image")
-            img_src = None
-            if img_tag:
-                img_src = img_tag.get("src")
-                if img_src.startswith("//"):
-                    img_src = "https:" + img_src
-                elif img_src.startswith("/"):
-                    img_src = urljoin(self.BASE_URL, img_src)
-
-            # Title + Book URL
-            title_element = item.find("h3", class_="booktitle")
-            book_title = ""
-            book_url = ""
-            if title_element:
-                link = title_element.find("a", class_="results")
-                if link:
-                    book_title = link.get_text(strip=True)
-                    book_url = urljoin(self.BASE_URL, link.get("href"))
-
-            # Authors
-            authors = []
-            author_span = item.find("span", class_="bookauthor")
-            if author_span:
-                for a in author_span.find_all("a"):
-                    authors.append(
-                        {
-                            "name": a.get_text(strip=True),
-                            "url": urljoin(self.BASE_URL, a.get("href")),
-                        }
-                    )
-
-            # Snippets
-            highlighted_snippets = []
-            snippet_container = item.find("ul", class_="fsi-snippet")
-            if snippet_container:
-                for snippet in snippet_container.find_all(
-                    "li", class_=lambda c: c and "fsi-snippet__main" in c
-                ):
-                    a_tag = snippet.find("a", class_="fsi-snippet__link")
-                    if a_tag:
-                        snippet_parts = []
-                        for child in a_tag.children:
-                            if isinstance(child, NavigableString):
-                                text = child.strip()
-                                if text:
-                                    snippet_parts.append(
-                                        {"text": text, "highlighted": False}
-                                    )
-                            elif child.name == "mark":
-                                marked_text = child.get_text(strip=True)
-                                if marked_text:
-                                    snippet_parts.append(
-                                        {"text": marked_text, "highlighted": True}
-                                    )
-
-                        snippet_url = urljoin(self.BASE_URL, a_tag.get("href"))
-
-                        highlighted_snippets.append(
-                            {"snippet_parts": snippet_parts, "url": snippet_url}
-                        )
-
-            results.append(
-                {
-                    "image_src": img_src,
-                    "title": book_title,
-                    "book_url": book_url,
-                    "authors": authors,
-                    "highlighted_snippets": highlighted_snippets,
-                }
-            )
-
-        return {"query": self.query, "stats": stats_text, "results": results}
-
-    def _load_from_cache(self) -> dict:
-        """
-        Load the full cached file as a dictionary.
-        """
-        if self.filename.exists():
-            with open(self.filename, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+        return {"query": self.query, **get_search_parser().parse_inside_results(html)}
 
-    def _save_to_cache(self, data: dict):
+    def _save_to_cache(self, page: int, data: dict):
         """
-        Save the full JSON file, merging pages progressively.
+        Save one page as its own cache row; other pages are untouched.
         """
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"[Saved] Data saved to {self.filename}")
+        self.cache.put_page(page, data)
+        print(f"[Saved] page_{page} saved for: {self.cache.key}")
 
 
 class SearchBySubjectStrategy(SearchStrategy):
@@ -765,24 +593,20 @@ class SearchBySubjectStrategy(SearchStrategy):
     This strategy fetches subject-related results from the Open Library's subject search page.
 
     Responsibilities:
-      - Build and encode the search URL
+      - Build and encode the search URL for the requested page
       - Fetch and parse HTML content
       - Extract:
-          • Total number of hits
+          • Total number of hits and the last page
           • Subject name, URL, and book count per result
-      - Cache the results as a JSON file (reused if already present)
+      - Cache the results page-wise in the search cache (one row per page)
+      - Reuse cache if available
+
+    The works of a subject are not part of this result; they are loaded on
+    demand, page by page, with SubjectWorksStrategy.
     """
 
     BASE_URL = "https://openlibrary.org"
-    SUBJECT_SEARCH_URL = BASE_URL + "/search/subjects?q={query}"
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "search_page"
-        / "search_by_subject"
-    )
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    SUBJECT_SEARCH_URL = BASE_URL + "/search/subjects?q={query}&page={page}"
 
     def __init__(self, query: str):
         """
@@ -790,40 +614,44 @@ class SearchBySubjectStrategy(SearchStrategy):
         """
         self.query = query
         self.encoded_query = quote_plus(query)
-        self.filename = self._build_cache_filename()
+        self.cache = get_search_cache().scope("subject", query)
 
-    def search(self) -> dict:
+    def search(self, page: int = 1) -> dict:
         """
-        Entrypoint for fetching subject results. Uses cache if available.
+        Entrypoint: Return subject results for the specified page.
+        Concurrent identical requests are coalesced into a single fetch.
         """
-        if self.filename.exists():
-            print(f"[Cache] Loading cached data from {self.filename}")
-            return self._load_from_cache()
-
-        html = self._fetch_html()
-        data = self._parse_html(html)
-        self._save_to_cache(data)
-        return data
+        return search_coalescer.run(
+            f"{self.cache.key}:page_{page}", lambda: self._search(page)
+        )
 
-    def _build_cache_filename(self) -> Path:
+    def _search(self, page: int = 1) -> dict:
         """
-        Build a consistent, readable filename for caching based on the query.
+        Use cache if available; else fetch, parse, and store only this page.
         """
-        safe_query = self.query.replace(" ", "_").lower()
-        return self.CACHE_DIR / f"search_subject_{safe_query}.json"
+        cached_data = self._load_from_cache(page)
+        if cached_data is not None:
+            print(f"[Cache] Loaded page_{page} for: {self.cache.key}")
+            # Entries cached before pagination hold page 1 only
+            return {"page": page, "last_page": 1, **cached_data}
 
-    def _fetch_html(self) -> str:
+        html = self._fetch_html(page)
+        data = self._parse_html(html, page)
+        self._save_to_cache(page, data)
+        return data
+
+    def _fetch_html(self, page: int = 1) -> str:
         """
         Request the subject search page HTML from Open Library.
         """
-        url = self.SUBJECT_SEARCH_URL.format(query=self.encoded_query)
+        url = self.SUBJECT_SEARCH_URL.format(query=self.encoded_query, page=page)
         print(f"[Fetch] Requesting URL: {url}")
-        response = requests.get(url)
+        response = get_http_client().get(url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch subject results: {response.status_code}")
         return response.text
 
-    def _parse_html(self, html: str) -> dict:
+    def _parse_html(self, html: str, page: int = 1) -> dict:
         """
         Parse HTML and extract subject search data.
         """
@@ -858,51 +686,139 @@ class SearchBySubjectStrategy(SearchStrategy):
                     }
                 )
 
-        return {"query": self.query, "total_hits": total_hits, "subjects": subjects}
+        return {
+            "query": self.query,
+            "page": page,
+            "last_page": self._extract_last_page(soup),
+            "total_hits": total_hits,
+            "subjects": subjects,
+        }
+
+    def _extract_last_page(self, soup: BeautifulSoup) -> int:
+        pagination = soup.find("div", class_="pagination")
+        if not pagination:
+            return 1
+        for link in reversed(pagination.find_all("a")):
+            if link.get_text(strip=True).isdigit():
+                return int(link.get_text(strip=True))
+        return 1
 
-    def _load_from_cache(self) -> dict:
+    def _load_from_cache(self, page: int = 1):
         """
-        Load previously cached JSON results.
+        Load a previously cached page (None if not cached).
         """
-        with open(self.filename, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return self.cache.get_page(page)
 
-    def _save_to_cache(self, data: dict):
+    def _save_to_cache(self, page: int, data: dict):
         """
-        Save scraped results to JSON cache.
+        Save one page as its own cache row; other pages are untouched.
         """
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"[Saved] Data saved to {self.filename}")
+        self.cache.put_page(page, data)
+        print(f"[Saved] page_{page} saved for: {self.cache.key}")
+
 
+class SubjectWorksStrategy(SearchStrategy):
+    """
+    Works of one subject (e.g. "fiction"), loaded lazily a page at a time.
 
-class SearchByAdvanceSearchtrategy(SearchStrategy):
+    Uses OpenLibrary's subjects JSON API with limit/offset, so a subject with
+    millions of works costs one small request per page the user actually
+    opens. Works are returned in the same shape as book search results, and
+    each page is its own row in the search cache.
+    """
+
+    BASE_URL = "https://openlibrary.org"
+    SUBJECT_WORKS_URL = BASE_URL + "/subjects/{slug}.json?limit={limit}&offset={offset}"
+    COVER_URL = "https://covers.openlibrary.org/b/id/{cover_id}-M.jpg"
+    WORKS_PER_PAGE = 20
+
+    def __init__(self, subject: str):
+        """
+        `subject` is a subject name ("Science fiction"), slug ("science_fiction")
+        or the subject URL returned by SearchBySubjectStrategy.
+        """
+        self.slug = self._to_slug(subject)
+        self.cache = get_search_cache().scope("subject_works", self.slug)
+
+    @staticmethod
+    def _to_slug(subject: str) -> str:
+        if "/subjects/" in subject:
+            return subject.split("/subjects/", 1)[1].strip("/")
+        return subject.strip().lower().replace(" ", "_")
+
+    def search(self, page: int = 1) -> dict:
+        """
+        Concurrent identical requests are coalesced into a single fetch.
+        """
+        return search_coalescer.run(
+            f"{self.cache.key}:page_{page}", lambda: self._search(page)
+        )
+
+    def _search(self, page: int = 1) -> dict:
+        cached_page = self.cache.get_page(page)
+        if cached_page is not None:
+            print(f"[Cache] Loaded page_{page} for: {self.cache.key}")
+            return cached_page
+
+        url = self.SUBJECT_WORKS_URL.format(
+            slug=quote_plus(self.slug, safe=":"),
+            limit=self.WORKS_PER_PAGE,
+            offset=(page - 1) * self.WORKS_PER_PAGE,
+        )
+        print(f"[Fetch] Requesting URL: {url}")
+        response = get_http_client().get(url)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch subject works: {response.status_code}")
+
+        data = self._parse_json(response.json(), page)
+        self.cache.put_page(page, data)
+        return data
+
+    def _parse_json(self, payload: dict, page: int) -> dict:
+        work_count = payload.get("work_count", 0)
+        works = []
+        for work in payload.get("works", []):
+            cover_id = work.get("cover_id")
+            authors = work.get("authors") or [{}]
+            works.append(
+                {
+                    "imgSrc": self.COVER_URL.format(cover_id=cover_id) if cover_id else "",
+                    "title": work.get("title", ""),
+                    "url": urljoin(self.BASE_URL, work.get("key", "")),
+                    "author": authors[0].get("name", ""),
+                    "first_published": str(work.get("first_publish_year") or ""),
+                    "num_editions": f"{work.get('edition_count', 0)} editions",
+                }
+            )
+
+        return {
+            "subject": payload.get("name", self.slug),
+            "work_count": work_count,
+            "page": page,
+            "last_page": max(1, -(-work_count // self.WORKS_PER_PAGE)),
+            "works": works,
+        }
+
+
+class SearchByAdvanceSearchtrategy(SearchResultsStrategy):
     """
     In this search strategy we are fetching content from source url where most of the content is static and some content (in the right sidebar) is dynamic. Here we are creating methods in such a way we get all things in frontend in minimum time.
 
-    For that we have divided content into 2 categories:
+    For that we have divided content into 3 categories:
     1) First page static data
-    2) Common dynamic data
+    2) Remaining page static data (prefetched in background, same as SearchByBookStrategy)
+    3) Common dynamic data
 
     At start we are taking book title and filter(optional) from frontend by this we are creating customized url for data fetching.
     By this url we are fetchin first page static data and returing it to frontend immediately so that user don't have to wait and saving it in cache so that when user search same book title second onwards time it will fetch data from cache this insure minimum response time.
-    After that in background we are fetching dynamic data where we wait for right sidebar to show up when it shows up we fetch content from it and return it immediately later we save data in same cache file.
+    After that in background we are fetching dynamic data (the right sidebar facets) over plain HTTP from OpenLibrary's facets partial, falling back to a pooled browser only if that fails, and later we save data in the same cache entry.
 
-    Seens we are using threading for background task there can be senario of race condition for that we are putting thread lock on file insure only single function can write in cache file.
+    Seens we are using threading for background task there can be senario of race condition, so every page is its own row in the SQLite search cache (WAL mode) and the sidebar is merged into the meta row in a transaction; writers never rewrite each other's data.
     """
 
     BASE_URL = "https://openlibrary.org"
     SEARCH_URL_TEMPLATE = BASE_URL + "/search?{query_params}{sort_suffix}&page={page}"
     SIDEBAR_URL_TEMPLATE = BASE_URL + "/search?{query_params}&mode=everything"
-    CACHE_DIR = (
-        Path(__file__).resolve().parent.parent.parent
-        / "data_cache"
-        / "openlibrary"
-        / "search_page"
-        / "search_by_advance_search"
-    )
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-
     def __init__(
         self,
         title: str = "",
@@ -914,7 +830,6 @@ class SearchByAdvanceSearchtrategy(SearchStrategy):
         headless: bool = True,
     ):
         self.headless = headless
-        self._file_lock = Lock()
 
         self.title = title
         self.author = author
@@ -925,9 +840,12 @@ class SearchByAdvanceSearchtrategy(SearchStrategy):
         self.sort_by = sort_by.lower()
         self.sort_suffix = self._get_sort_suffix()
 
-        raw_filename = f"title={title}_author={author}_isbn={isbn}_subject={subject}_publisher={publisher}_{self.sort_by}"
-        safe_filename = raw_filename.replace(" ", "_").replace("/", "_").lower()
-        self.filename = self.CACHE_DIR / f"{safe_filename}.json"
+        self.cache = get_search_cache().scope(
+            "advance",
+            advance_search_query(title, author, isbn, subject, publisher),
+            self.sort_by,
+        )
+        self.prefetch_key = self.cache.key
 
         self.encoded_query = self._generate_query_params()
 
@@ -947,278 +865,72 @@ class SearchByAdvanceSearchtrategy(SearchStrategy):
         clean_params = {k: v for k, v in params.items() if v}
         return urlencode(clean_params)
 
-    def _get_sort_suffix(self) -> str:
-        sort_map = {
-            "relevance": "",  # default
-            "most editions": "&sort=editions",
-            "first published": "&sort=old",
-            "most recent": "&sort=new",
-            "top rated": "&sort=rating",
-            "random": "&sort=random",
-        }
-        return sort_map.get(self.sort_by.lower(), "")
-
-    def search(self, page: int = 1) -> dict:
-        """
-        Fetch search results and handle caching for each page.
-        If the cache exists and the requested page exists in it, return cached data.
-        If the requested page doesn't exist in the cache, fetch and update the cache for that page.
-        Also initiates a background fetch for sidebar data if not already cached.
-        """
-        page_key = f"page_{page}"
-
-        # Scenario A: If the cache file exists
-        if self.filename.exists():
-            cached_data = json.loads(self.filename.read_text(encoding="utf-8"))
-
-            # Scenario A1: Requested page is in cache
-            if page_key in cached_data.get("pages", {}):
-                print(
-                    f"[Cache Hit] Returning cached data for {page_key} from: {self.filename}"
-                )
-                return cached_data
-
-            # Scenario A2: Page is not in cache – fetch and update
-            print(f"[Cache Miss] {page_key} not found. Fetching and updating cache.")
-            html = self._fetch_search_page(page=page)
-            soup = BeautifulSoup(html, "lxml")
-            page_books = self._extract_books(soup)
-
-            # Update cached_data and write it back
-            cached_data.setdefault("pages", {})[page_key] = page_books
-
-            self._save_to_cache(
-                lambda data: {
-                    **(data or {}),
-                    "pages": cached_data["pages"],
-                    "last_page": cached_data.get("last_page"),
-                    "hits": cached_data.get("hits"),
-                    "sidebar_info": cached_data.get(
-                        "sidebar_info"
-                    ),  # Preserve if already exists
-                }
-            )
-
-            return {
-                "pages": cached_data["pages"],
-                "last_page": cached_data.get("last_page"),
-                "hits": cached_data.get("hits"),
-            }
-
-        # Scenario B: Cache does not exist — fetch from scratch
-        print(f"[Cache] No cache found. Fetching new data.")
-
-        html = self._fetch_search_page(page=1)
-        soup = BeautifulSoup(html, "lxml")
-        page_1_books = self._extract_books(soup)
-        last_page = self._extract_last_page(soup)
-        hits = self._extract_no_of_hits(soup)
-
-        result = {
-            "pages": {"page_1": page_1_books},
-            "last_page": last_page,
-            "hits": hits,
-        }
-
-        # Save initial result to cache
-        self._save_to_cache(lambda _: result)
-
-        # Background thread: fetch sidebar data
-        def background_fetch_sidebar():
-            sidebar_info = self._fetch_sidebar_info()
-            print("[Sidebar] Extracted:", sidebar_info)
-
-            def update(data):
-                data = data or {}
-                data["sidebar_info"] = sidebar_info
-                return data
-
-            self._save_to_cache(update)
-            uc.Chrome.__del__ = lambda self: None
-
-        Thread(target=background_fetch_sidebar).start()
-
-        return result
-
-    def _fetch_search_page(self, page: int = 1) -> str:
-        search_url = self.SEARCH_URL_TEMPLATE.format(
+    def _search_url(self, page: int) -> str:
+        return self.SEARCH_URL_TEMPLATE.format(
             query_params=self.encoded_query, page=page, sort_suffix=self.sort_suffix
         )
-        print(f"[Fetch] Hitting URL: {search_url}")
-        response = requests.get(search_url)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch page {page}: {response.status_code}")
-        return response.text
-
-    def _extract_books(self, soup: BeautifulSoup) -> list:
-        results_container = soup.find("div", class_="resultsContainer")
-        results_list = (
-            results_container.find("ul", class_="list-books")
-            if results_container
-            else None
-        )
-        result_items = (
-            results_list.find_all("li", class_="searchResultItem")
-            if results_list
-            else []
-        )
-
-        books = []
-        for item in result_items:
-            img_tag = item.find("img", itemprop="image")
-            img_src = img_tag.get("src").strip() if img_tag else None
-            if img_src:
-                if img_src.startswith("//"):
-                    img_src = "https:" + img_src
-                elif img_src.startswith("/"):
-                    img_src = "https://openlibrary.org" + img_src
-
-            title_a = item.select_one("h3.booktitle a.results")
-            raw_title = title_a.get_text() if title_a else ""
-            book_title = re.sub(r"\s+", " ", raw_title).strip()
-            book_url = urljoin(self.BASE_URL, title_a.get("href")) if title_a else None
-
-            author_a = item.select_one("span.bookauthor a")
-            author_name = author_a.get_text(strip=True) if author_a else None
-
-            rating_span = item.select_one(
-                "span.ratingsByline span[itemprop='ratingValue']"
-            )
-            rating_text = rating_span.get_text(strip=True) if rating_span else ""
-            rating_value, num_ratings = None, None
-
-            if rating_text:
-                parts = rating_text.split("(")
-                if parts:
-                    rating_value = parts[0].strip()
-                if len(parts) > 1:
-                    num_ratings = (
-                        parts[1].replace("ratings", "").replace(")", "").strip()
-                    )
-            details_span = item.select_one("span.resultDetails")
-            first_published, num_editions = None, None
-            if details_span:
-                details_text = details_span.get_text(" ", strip=True)
-                parts = details_text.split("—")
-                if len(parts) >= 1 and "First published in" in parts[0]:
-                    first_published = parts[0].replace("First published in", "").strip()
-                if len(parts) >= 2:
-                    edition_link = details_span.find("a")
-                    if edition_link:
-                        raw_editions = edition_link.get_text()
-                        num_editions = re.sub(r"\s+", " ", raw_editions).strip()
-            books.append(
-                {
-                    "imgSrc": img_src,
-                    "title": book_title,
-                    "url": book_url,
-                    "author": author_name,
-                    "rating": rating_value,
-                    "num_ratings": num_ratings,
-                    "first_published": first_published,
-                    "num_editions": num_editions,
-                }
-            )
-        return books
-
-    def _extract_last_page(self, soup: BeautifulSoup) -> int:
-        pagination = soup.find("div", class_="pagination")
-        if not pagination:
-            return 1
-        pages = pagination.find_all("a")
-        for page in reversed(pages):
-            if page.text.strip().isdigit():
-                return int(page.text.strip())
-        return 1
-
-    def _extract_no_of_hits(self, soup: BeautifulSoup) -> int:
-        hits_div = soup.find("div", class_="search-results-stats")
-        if not hits_div:
-            return 0
-
-        text = hits_div.get_text(strip=True)
-        match = re.search(r"([\d,]+)\s+hits", text, re.IGNORECASE)
-
-        if match:
-            hits_str = match.group(1).replace(",", "")
-            return int(hits_str)
-        return 0
 
     def _fetch_sidebar_info(self) -> dict:
-        options = Options()
-        options.headless = self.headless
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        driver = uc.Chrome(options=options)
         sidebar_url = self.SIDEBAR_URL_TEMPLATE.format(query_params=self.encoded_query)
-        print(f"[Sidebar] Fetching with undetected_selenium: {sidebar_url}")
+        print(f"[Sidebar] Fetching facets: {sidebar_url}")
+        return fetch_sidebar_info(sidebar_url)
 
-        driver.get(sidebar_url)
-        try:
-            # Wait up to 10 seconds for at least one facet to appear.
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div.facet h4.facetHead")
-                )
-            )
-        except Exception as e:
-            print("[Sidebar] Timeout or error waiting for facet head:", e)
 
-        html = driver.page_source
-        driver.quit()
+class SearchByLocalIndexStrategy(SearchStrategy):
+    """
+    Book search answered from the local full-text index (see BookIndex)
+    first, without a request to OpenLibrary.
+
+    When the index holds fewer than MIN_LOCAL_RESULTS matches for the query
+    it is not trusted to be complete, and the search goes to OpenLibrary
+    through FALLBACK_STRATEGY instead; those results are cached and so
+    indexed for the next time. "source" in the result says which one
+    answered ("local" or "openlibrary").
+    """
 
-        soup = BeautifulSoup(html, "lxml")
-        sidebar_info = {}
-        facet_groups = soup.find_all(
-            "div", class_=lambda x: x and x.startswith("facet")
-        )
+    MIN_LOCAL_RESULTS = int(os.environ.get("LOCAL_SEARCH_MIN_RESULTS", "10"))
+    FALLBACK_STRATEGY = SearchByBookStrategy
 
-        for group in facet_groups:
-            header = group.find("h4", class_="facetHead")
-            if not header:
-                continue
-            facet_name = header.get_text(strip=True)
-            entries = []
-            for entry in group.find_all("div", class_="facetEntry"):
-                a_tag = entry.find("a", href=True)
-                label_tag = entry.find("span", class_="small")
-                count_tag = entry.find("span", class_="smaller")
-
-                if a_tag and label_tag and count_tag:
-                    label = label_tag.get_text(strip=True)
-                    count_text = count_tag.get_text(strip=True)
-                    try:
-                        count = int(count_text)
-                    except ValueError:
-                        count = count_text
-
-                    relative_url = a_tag["href"]
-                    full_url = urljoin(self.BASE_URL, relative_url)
-
-                    entries.append({"label": label, "count": count, "url": full_url})
-            sidebar_info[facet_name] = entries
-        return sidebar_info
-
-    def _load_from_cache(self) -> dict:
-        try:
-            if self.filename.exists() and self.filename.stat().st_size > 0:
-                with self.filename.open("r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"[Warning] Failed to load JSON: {e}")
-        return {}
+    def __init__(self, query: str, sort_by: str = "relevance"):
+        self.query = query
+        self.sort_by = sort_by
 
-    def _save_to_cache(self, update_fn: Callable[[dict], dict]):
-        with self._file_lock:
-            data = self._load_from_cache()
-            updated_data = update_fn(data)
-            try:
-                with self.filename.open("w", encoding="utf-8") as f:
-                    json.dump(updated_data, f, indent=2, ensure_ascii=False)
-                print(f"[Saved] JSON updated at: {self.filename}")
-            except Exception as e:
-                print(f"[Error] JSON save failed: {e}")
+    def record_lookup(self):
+        # Counted under the keys of the fallback's cache, answered locally or not
+        self.FALLBACK_STRATEGY(self.query, sort_by=self.sort_by).record_lookup()
+
+    def search(self, page: int = 1) -> dict:
+        local = self._search_local(page)
+        if local is not None:
+            return local
+        result = self.FALLBACK_STRATEGY(self.query, sort_by=self.sort_by).search(page)
+        return {**result, "source": "openlibrary"}
+
+    async def asearch(self, page: int = 1) -> dict:
+        local = await asyncio.to_thread(self._search_local, page)
+        if local is not None:
+            return local
+        result = await self.FALLBACK_STRATEGY(self.query, sort_by=self.sort_by).asearch(page)
+        return {**result, "source": "openlibrary"}
+
+    def _search_local(self, page: int):
+        """The local result page, or None when the index has too few matches."""
+        started = time.perf_counter()
+        found = get_book_index().search(self.query, page=page, sort_by=self.sort_by)
+        took_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        if found["hits"] < self.MIN_LOCAL_RESULTS:
+            print(f"[Local] {found['hits']} local hits for '{self.query}', asking OpenLibrary")
+            return None
+
+        print(f"[Local] {found['hits']} hits for '{self.query}' in {took_ms} ms")
+        return {
+            "pages": {f"page_{page}": found["books"]},
+            "last_page": found["last_page"],
+            "hits": found["hits"],
+            "source": "local",
+            "took_ms": took_ms,
+        }
 
 
 class SearchContext:
@@ -1226,8 +938,17 @@ class SearchContext:
         self.search_strategy = strategy
 
     def search(self, page: int = 1):
+        self.search_strategy.record_lookup()
         return self.search_strategy.search(page)
 
+    async def asearch(self, page: int = 1):
+        self.search_strategy.record_lookup()
+        return await self.search_strategy.asearch(page)
+
+    async def asearch_pages(self, page_from: int, page_to: int):
+        self.search_strategy.record_lookup()
+        return await self.search_strategy.asearch_pages(page_from, page_to)
+
     def set_new_strategy(self, new_strategy: SearchStrategy):
         self.search_strategy = new_strategy
 
@@ -1251,7 +972,7 @@ if __name__ == "__main__":
     # json.dumps(results, indent=2, ensure_ascii=False)
 
     # strategy = SearchBySubjectStrategy("data science")
-    # result = strategy.search()
+    # result = strategy.search(page=2)
     # print(json.dumps(result, indent=2))
 
     # strategy = SearchByAdvanceSearchtrategy(
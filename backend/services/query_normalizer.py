@@ -0,0 +1,99 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Punctuation that changes what a query means ("c++", "c#", "at&t") is kept
+_KEPT_PUNCTUATION = set("+#&")
+_SLUG_UNSAFE = re.compile(r"[^a-z0-9]+")
+SLUG_MAX_LENGTH = 60
+
+
+def canonical_query(query: str) -> str:
+    """
+    The canonical form of a search query, shared by every cache key.
+
+    Unicode NFKC (full-width and compatibility characters become plain
+    ones), case folding, punctuation folded to spaces and whitespace
+    collapsed. "Atomic  Habits", "atomic habits " and "Atomic-Habits" all
+    become "atomic habits".
+    """
+    text = unicodedata.normalize("NFKC", str(query or "")).casefold()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") and ch not in _KEPT_PUNCTUATION else ch
+        for ch in text
+    )
+    return " ".join(text.split())
+
+
+def query_hash(query: str) -> str:
+    """Stable hash of the canonical query (same on every machine and run)."""
+    return hashlib.sha1(canonical_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+def query_filename(query: str, suffix: str = ".json") -> str:
+    """
+    A safe, bounded file name for a query: a readable ASCII slug plus the
+    hash of the full canonical query, so no input can produce an invalid
+    path and truncated slugs never collide.
+    """
+    slug = _SLUG_UNSAFE.sub("_", canonical_query(query)).strip("_")[:SLUG_MAX_LENGTH]
+    return f"{slug or 'query'}-{query_hash(query)}{suffix}"
+
+
+def legacy_query_key(query: str) -> str:
+    """The old file-name key (`query.replace(" ", "_").lower()`), for comparison only."""
+    return str(query or "").replace(" ", "_").lower()
+
+
+class QueryKeyStats:
+    """
+    Shadow hit rates of the legacy and the canonical cache keys.
+
+    Every lookup records both keys of the query. A lookup counts as a hit for
+    a scheme when that scheme's key was seen before, which is the hit rate a
+    cache with that key scheme (and no expiry) would reach on the same
+    traffic. The gap between the two is what canonical keys gain. Up to
+    MAX_KEYS recent keys per scheme and namespace are remembered.
+    """
+
+    MAX_KEYS = 50000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = {}  # (namespace, scheme) -> OrderedDict of keys
+        self._counts = {}  # namespace -> counters
+
+    def _hit(self, namespace: str, scheme: str, key: str) -> bool:
+        seen = self._seen.setdefault((namespace, scheme), OrderedDict())
+        hit = key in seen
+        seen[key] = None
+        seen.move_to_end(key)
+        if len(seen) > self.MAX_KEYS:
+            seen.popitem(last=False)
+        return hit
+
+    def record(self, namespace: str, query: str):
+        with self._lock:
+            counts = self._counts.setdefault(
+                namespace, {"lookups": 0, "legacy_hits": 0, "canonical_hits": 0}
+            )
+            counts["lookups"] += 1
+            counts["legacy_hits"] += self._hit(namespace, "legacy", legacy_query_key(query))
+            counts["canonical_hits"] += self._hit(namespace, "canonical", canonical_query(query))
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {}
+            for namespace, counts in self._counts.items():
+                lookups = counts["lookups"] or 1
+                report[namespace] = dict(
+                    counts,
+                    legacy_hit_rate=round(counts["legacy_hits"] / lookups, 3),
+                    canonical_hit_rate=round(counts["canonical_hits"] / lookups, 3),
+                )
+            return report
+
+
+query_key_stats = QueryKeyStats()
@@ -0,0 +1,352 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from services.cache_manager import DATA_CACHE_DIR, DAY
+from services.query_normalizer import canonical_query
+from services.semantic_scholar.search_page import scrape_semantic_scholar
+
+DB_PATH = DATA_CACHE_DIR / "jobs" / "semantic_scholar.db"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ScrapeJobQueue:
+    """
+    Semantic Scholar scrapes as jobs in a small SQLite table that every
+    worker process of the host shares.
+
+      - One row per canonical query: a query is queued or running at most
+        once, whichever gunicorn worker the polls land on.
+      - Each process runs WORKERS threads claiming queued jobs, oldest
+        first, and never more than MAX_RUNNING jobs run over all processes
+        (each one holds a Chrome of the browser pool).
+      - An attempt gets TIMEOUT seconds. A failed or timed-out attempt is
+        queued again after a backoff, up to MAX_ATTEMPTS; then the job is
+        "failed" with its last error, and a request RETRY_FAILED_AFTER
+        seconds later queues it anew.
+      - A running job holds a lease; one whose process died is taken back
+        from the table when the lease runs out.
+      - A timed-out scrape cannot be interrupted (Selenium calls block), so
+        its thread and browser live on after the job is retried. Until the
+        thread exits it stays in the "abandoned" table, which counts
+        against MAX_RUNNING like a running job.
+
+    The scrape writes the results cache itself; "done" only means the
+    results can be read from there.
+    """
+
+    WORKERS = int(os.getenv("SEMANTIC_SCHOLAR_WORKERS", "2"))  # per process
+    MAX_RUNNING = int(os.getenv("SEMANTIC_SCHOLAR_MAX_RUNNING", "2"))  # over all processes
+    TIMEOUT = int(os.getenv("SEMANTIC_SCHOLAR_JOB_TIMEOUT", "120"))  # seconds per attempt
+    MAX_ATTEMPTS = 3
+    RETRY_BACKOFF = 10  # seconds before the 2nd attempt, doubled for each next one
+    RETRY_FAILED_AFTER = 300
+    LEASE_GRACE = 30  # beyond TIMEOUT, before another process takes a job back
+    ABANDONED_LEASE = 10 * 60  # an abandoned scrape of a dead process stops counting after this
+    POLL_INTERVAL = 2.0  # idle workers look for jobs queued by other processes
+    DEFAULT_DURATION = 30  # ETA per job until some have finished
+    KEEP_FINISHED = DAY
+
+    def __init__(self, run=scrape_semantic_scholar, db_path=DB_PATH):
+        self.run = run
+        self.db_path = Path(db_path)
+        self.owner = f"{os.getpid()}:{id(self):x}"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._workers = []
+        self._metrics = {"submitted": 0, "completed": 0, "retried": 0, "failed": 0, "timeouts": 0}
+        self._last_prune = 0.0
+
+    # --- Database ---------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; updates that read first open their own transaction
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    enqueued_at REAL NOT NULL,
+                    not_before REAL NOT NULL,
+                    started_at REAL,
+                    lease_until REAL,
+                    finished_at REAL,
+                    owner TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, enqueued_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS abandoned (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    lease_until REAL NOT NULL
+                )
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction: claims and state changes of other processes wait for it."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Clients ----------------------------------------------------------------
+
+    def submit(self, query: str) -> dict:
+        """
+        Queue a scrape of `query` unless one is queued or running, or failed
+        less than RETRY_FAILED_AFTER seconds ago; returns its status().
+        """
+        key = canonical_query(query)
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status, finished_at FROM jobs WHERE key = ?", (key,)).fetchone()
+            # A "done" job whose results are requested again has left the cache
+            requeue = (
+                row is None
+                or row["status"] == DONE
+                or (row["status"] == FAILED and now - row["finished_at"] >= self.RETRY_FAILED_AFTER)
+            )
+            if requeue:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs (key, query, status, enqueued_at, not_before)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, query, QUEUED, now, now),
+                )
+        if requeue:
+            self._count("submitted")
+            print(f"[ScholarJobs] Queued: {query}")
+            self._start_workers()
+            self._wake.set()
+        return self.status(query)
+
+    def status(self, query: str):
+        """
+        {"status", "attempts", "error", "position", "eta_seconds"} of the job
+        of `query`, or None. `position` is the number of queued jobs ahead of
+        it; `eta_seconds` a guess from the recent job durations.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE key = ?", (canonical_query(query),)).fetchone()
+        if row is None:
+            return None
+        job = {"status": row["status"], "attempts": row["attempts"], "error": row["error"]}
+        now = time.time()
+        duration = self._typical_duration(conn)
+        if row["status"] == QUEUED:
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND (enqueued_at < ? OR (enqueued_at = ? AND key < ?))",
+                (QUEUED, row["enqueued_at"], row["enqueued_at"], row["key"]),
+            ).fetchone()[0]
+            # Jobs run MAX_RUNNING at a time: ours starts after the waves ahead of it
+            waves = ahead // max(1, self.MAX_RUNNING) + 1
+            wait = max(0.0, row["not_before"] - now)
+            job.update(position=ahead, eta_seconds=math.ceil(wait + waves * duration))
+        elif row["status"] == RUNNING:
+            job.update(position=0, eta_seconds=math.ceil(max(1.0, row["started_at"] + duration - now)))
+        return job
+
+    def _typical_duration(self, conn: sqlite3.Connection) -> float:
+        """Mean run time of the last 20 finished jobs."""
+        mean = conn.execute(
+            "SELECT AVG(finished_at - started_at) FROM"
+            " (SELECT finished_at, started_at FROM jobs WHERE status = ? ORDER BY finished_at DESC LIMIT 20)",
+            (DONE,),
+        ).fetchone()[0]
+        return mean if mean is not None else self.DEFAULT_DURATION
+
+    # --- Workers ----------------------------------------------------------------
+
+    def _start_workers(self):
+        with self._lock:
+            if self._workers:
+                return
+            for n in range(max(1, self.WORKERS)):
+                worker = threading.Thread(target=self._work, name=f"scholar-job-{n}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"[ScholarJobs] Claim failed: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.POLL_INTERVAL)
+                self._wake.clear()
+                continue
+            self._execute(job)
+
+    def _claim(self):
+        """The oldest due job, marked running under our lease; None if none or at MAX_RUNNING."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs of a process that died (or hung) past their lease count as a timed-out attempt
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,"
+                " error = 'lease expired', finished_at = ?, not_before = ?, owner = NULL"
+                " WHERE status = ? AND lease_until <= ?",
+                (self.MAX_ATTEMPTS, FAILED, QUEUED, now, now, RUNNING, now),
+            )
+            if now - self._last_prune > 60:
+                self._last_prune = now
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                    (DONE, FAILED, now - self.KEEP_FINISHED),
+                )
+            conn.execute("DELETE FROM abandoned WHERE lease_until <= ?", (now,))
+            if self._busy(conn) >= self.MAX_RUNNING:
+                return None
+            row = conn.execute(
+                "SELECT key, query, attempts FROM jobs WHERE status = ? AND not_before <= ?"
+                " ORDER BY enqueued_at, key LIMIT 1",
+                (QUEUED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            attempt = row["attempts"] + 1
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, started_at = ?, lease_until = ?, owner = ?"
+                " WHERE key = ?",
+                (RUNNING, attempt, now, now + self.TIMEOUT + self.LEASE_GRACE, self.owner, row["key"]),
+            )
+        return {"key": row["key"], "query": row["query"], "attempt": attempt}
+
+    @staticmethod
+    def _busy(conn: sqlite3.Connection) -> int:
+        """Scrapes holding a browser: running jobs plus abandoned attempts still alive."""
+        running = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)).fetchone()[0]
+        return running + conn.execute("SELECT COUNT(*) FROM abandoned").fetchone()[0]
+
+    def _execute(self, job: dict):
+        outcome = {}
+        finished = threading.Event()
+        state = threading.Lock()  # orders "finished" against "abandoned"
+
+        def attempt():
+            try:
+                self.run(job["query"])
+            except Exception as e:
+                outcome["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                with state:
+                    finished.set()
+                    abandoned = outcome.get("abandoned")
+                if abandoned is not None:
+                    self._release_abandoned(abandoned)
+
+        # Own thread, so that the worker can give up on a hung scrape. That
+        # thread is left to finish on its own (Selenium calls cannot be
+        # interrupted) and counts against MAX_RUNNING until it does.
+        threading.Thread(target=attempt, name=f"scholar-scrape-{job['key'][:20]}", daemon=True).start()
+        finished.wait(self.TIMEOUT)
+        with state:
+            if finished.is_set():
+                error = outcome.get("error")
+            else:
+                error = f"timed out after {self.TIMEOUT} s"
+                outcome["abandoned"] = self._abandon(job)
+                self._count("timeouts")
+        self._finish(job, error)
+
+    def _abandon(self, job: dict) -> int:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO abandoned (key, owner, lease_until) VALUES (?, ?, ?)",
+                (job["key"], self.owner, time.time() + self.ABANDONED_LEASE),
+            )
+        return cursor.lastrowid
+
+    def _release_abandoned(self, abandoned_id: int):
+        try:
+            self._connect().execute("DELETE FROM abandoned WHERE id = ?", (abandoned_id,))
+        except sqlite3.Error as e:
+            print(f"[ScholarJobs] Could not release abandoned attempt: {e}")  # expires with its lease
+        self._wake.set()  # a slot is free
+
+    def _finish(self, job: dict, error):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, attempts, owner FROM jobs WHERE key = ?", (job["key"],)
+            ).fetchone()
+            if row is None or row["status"] != RUNNING or row["owner"] != self.owner or row["attempts"] != job["attempt"]:
+                return  # lease expired and the job was taken back meanwhile
+            if error is None:
+                status, not_before = DONE, now
+            elif job["attempt"] < self.MAX_ATTEMPTS:
+                status, not_before = QUEUED, now + self.RETRY_BACKOFF * 2 ** (job["attempt"] - 1)
+            else:
+                status, not_before = FAILED, now
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, not_before = ?,"
+                " lease_until = NULL, owner = NULL WHERE key = ?",
+                (status, error, now, not_before, job["key"]),
+            )
+
+        outcome = {DONE: "completed", QUEUED: "retried", FAILED: "failed"}[status]
+        self._count(outcome)
+        if error:
+            print(f"[ScholarJobs] Attempt {job['attempt']} of '{job['query']}' failed ({error}); {status}")
+        else:
+            print(f"[ScholarJobs] Done: {job['query']}")
+        self._wake.set()  # a slot is free
+
+    # --- Metrics ----------------------------------------------------------------
+
+    def _count(self, key: str):
+        with self._lock:
+            self._metrics[key] += 1
+
+    def stats(self) -> dict:
+        """Queue depth over all processes, plus this process's counters."""
+        conn = self._connect()
+        by_status = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(enqueued_at) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        abandoned = conn.execute(
+            "SELECT COUNT(*) FROM abandoned WHERE lease_until > ?", (time.time(),)
+        ).fetchone()[0]
+        with self._lock:
+            metrics = dict(self._metrics)
+            workers = len(self._workers)
+        return {
+            **{status: by_status.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+            "abandoned": abandoned,
+            "oldest_queued_seconds": round(time.time() - oldest, 1) if oldest else 0,
+            "typical_duration_seconds": round(self._typical_duration(conn), 1),
+            "workers": workers,
+            "max_running": self.MAX_RUNNING,
+            **metrics,
+        }
+
+
+semantic_scholar_jobs = ScrapeJobQueue()
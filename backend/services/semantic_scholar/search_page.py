@@ -1,59 +1,51 @@
-import os
-import json
 import time
 import urllib.parse
-import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from services.browser_pool import browser_pool
+from services.cache_manager import cache_manager
+from services.query_normalizer import legacy_query_key, query_filename
+
+CACHE_SOURCE = "semantic_scholar"  # data_cache/semantic_scholar/<safe_filename>
+
 
 def safe_filename(query: str) -> str:
-    return query.replace(" ", "_").lower() + ".json"
+    """Cache file name of a query; equivalent queries share it (see query_filename)."""
+    return query_filename(query)
+
+
+def load_cached_results(query: str):
+    """Cached results for `query`, or None if not cached (or expired)."""
+    cached = cache_manager.read_json(CACHE_SOURCE, safe_filename(query))
+    if cached is None:
+        # Files written before canonical keys; re-saved under the new name on a hit
+        legacy_name = legacy_query_key(query) + ".json"
+        if len(legacy_name) <= 255 and not set("/\\") & set(legacy_name):
+            cached = cache_manager.read_json(CACHE_SOURCE, legacy_name)
+            if cached is not None:
+                cache_manager.write_json(
+                    CACHE_SOURCE, safe_filename(query), cached, ensure_ascii=False, indent=2
+                )
+    return cached
 
 
 def scrape_semantic_scholar(query: str):
-    # Custom cache path
-    cache_dir = os.path.join("data_cache", "semantic_scholar")
-    os.makedirs(cache_dir, exist_ok=True)
-
     filename = safe_filename(query)
-    cache_path = os.path.join(cache_dir, filename)
 
     # Return from cache if it exists
-    if os.path.exists(cache_path):
-        with open(cache_path, "r", encoding="utf-8") as f:
-            print(f"[CACHE HIT] Returning cached data for: '{query}'")
-            return json.load(f)
+    cached = load_cached_results(query)
+    if cached is not None:
+        print(f"[CACHE HIT] Returning cached data for: '{query}'")
+        return cached
 
     # Start scraping
     print(f"[CACHE MISS] Scraping Semantic Scholar for: '{query}'")
     
-    # --- Start of updated undetected_chromedriver configurations ---
-    options = uc.ChromeOptions()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920x1080")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-extensions")
-
-    driver = uc.Chrome(options=options)
-    
-    # Add the user-agent override for consistency
-    custom_user_agent = (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/117.0.0.0 Safari/537.36"
-    )
-    driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": custom_user_agent})
-    print(f"[INFO] User-Agent overridden to: {custom_user_agent}")
-    # --- End of updated undetected_chromedriver configurations ---
-
     results = []
 
-    try:
+    with browser_pool.browser() as driver:
         encoded_query = urllib.parse.quote(query)
         url = f"https://www.semanticscholar.org/search?q={encoded_query}&sort=relevance"
         driver.get(url)
@@ -124,14 +116,9 @@ def scrape_semantic_scholar(query: str):
             }
             results.append(item)
 
-    finally:
-        driver.quit()
-        uc.Chrome.__del__ = lambda self: None # This line prevents a known issue with undetected_chromedriver not fully quitting
-
     # Save to cache
-    with open(cache_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-        print(f"[CACHE SAVE] Results cached at: {cache_path}")
+    cache_manager.write_json(CACHE_SOURCE, filename, results, ensure_ascii=False, indent=2)
+    print(f"[CACHE SAVE] Results cached as: {filename}")
 
     return results
 
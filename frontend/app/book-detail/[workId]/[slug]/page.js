@@ -18,6 +18,13 @@ const BookDetailPage = () => {
   const [editionsCardHeight, setEditionsCardHeight] = useState(0);
   const [readersCardHeight, setReadersCardHeight] = useState(0);
 
+  // Editions: the detail response has the first few, the rest come a page
+  // at a time from /editions, following next_cursor
+  const [editions, setEditions] = useState([]);
+  const [editionsTotal, setEditionsTotal] = useState(0);
+  const [editionsCursor, setEditionsCursor] = useState(null);
+  const [loadingEditions, setLoadingEditions] = useState(false);
+
   const editionsCardRef = useRef(null);
   const readersCardRef = useRef(null);
 
@@ -48,6 +55,9 @@ const BookDetailPage = () => {
 
         // Set state directly from the API response
         setBookData(response.data);
+        setEditions(response.data.editions || []);
+        setEditionsTotal(response.data.editions_total || 0);
+        setEditionsCursor(response.data.editions_next_cursor || null);
         setError(null);
       } catch (err) {
         console.error("Failed to fetch book details:", err);
@@ -60,6 +70,51 @@ const BookDetailPage = () => {
     fetchBookDetails();
   }, [params, searchParams]);
 
+  // The carousels are scraped in the background on a cache miss: while they
+  // are "pending", listen on /dynamic/stream and merge them in once they
+  // arrive. EventSource reconnects by itself if the stream ends still pending.
+  const dynamicStatus = bookData?.dynamic_status;
+  useEffect(() => {
+    if (dynamicStatus !== "pending") return;
+    const edition = searchParams.get("edition");
+    const streamUrl = `${process.env.NEXT_PUBLIC_API_URL}/book-detail/${params.workId}/${params.slug}/dynamic/stream?edition=${encodeURIComponent(edition)}`;
+    const source = new EventSource(streamUrl);
+
+    source.addEventListener("dynamic", (event) => {
+      const dynamic = JSON.parse(event.data);
+      if (dynamic.dynamic_status === "pending") return;
+      source.close();
+      setBookData((previous) => ({ ...previous, ...dynamic }));
+    });
+    source.addEventListener("error", (event) => {
+      // A server-side "error" event carries data; a dropped connection does not
+      if (event.data) {
+        console.error("Failed to load recommendations:", event.data);
+        source.close();
+      }
+    });
+
+    return () => source.close();
+  }, [dynamicStatus, params, searchParams]);
+
+  // Fetch the next page of editions and append it to the list
+  const loadMoreEditions = async () => {
+    if (!editionsCursor || loadingEditions) return;
+    setLoadingEditions(true);
+    try {
+      const edition = searchParams.get("edition");
+      const apiUrl = `${process.env.NEXT_PUBLIC_API_URL}/book-detail/${params.workId}/${params.slug}/editions?edition=${encodeURIComponent(edition)}&cursor=${encodeURIComponent(editionsCursor)}`;
+      const response = await axios.get(apiUrl);
+      setEditions((previous) => [...previous, ...response.data.editions]);
+      setEditionsTotal(response.data.total);
+      setEditionsCursor(response.data.next_cursor);
+    } catch (err) {
+      console.error("Failed to load more editions:", err);
+    } finally {
+      setLoadingEditions(false);
+    }
+  };
+
   // Effect to measure card heights for dynamic button sizing
   useEffect(() => {
     const timer = setTimeout(() => {
@@ -542,7 +597,7 @@ const BookDetailPage = () => {
             )}
 
             {/* More Editions - Mapped from API */}
-            {bookData?.editions && bookData.editions.length > 0 && (
+            {editions.length > 0 && (
               <div className="border-t pt-4">
                 <h3
                   className={`text-2xl font-bold mb-4 ${
@@ -550,6 +605,11 @@ const BookDetailPage = () => {
                   }`}
                 >
                   More Editions
+                  {editionsTotal > editions.length && (
+                    <span className="ml-2 text-base font-normal text-gray-500">
+                      ({editions.length} of {editionsTotal})
+                    </span>
+                  )}
                 </h3>
                 <div className="relative group">
                   {editionsCardHeight > 0 && (
@@ -593,7 +653,7 @@ const BookDetailPage = () => {
                     className="flex space-x-4 overflow-x-auto scroll-smooth touch-pan-x py-4 px-2"
                     style={{ scrollbarWidth: "none" }}
                   >
-                    {bookData.editions.map((edition, index) => (
+                    {editions.map((edition, index) => (
                       <div
                         key={index}
                         ref={index === 0 ? editionsCardRef : null}
@@ -644,6 +704,19 @@ const BookDetailPage = () => {
                         </div>
                       </div>
                     ))}
+                    {editionsCursor && (
+                      <button
+                        onClick={loadMoreEditions}
+                        disabled={loadingEditions}
+                        className={`flex-shrink-0 w-40 p-3 rounded-lg shadow-md text-sm font-semibold transition-colors disabled:opacity-60 ${
+                          darkMode
+                            ? "bg-gray-200 hover:bg-gray-300 text-gray-800"
+                            : "bg-gray-700 hover:bg-gray-600 text-white"
+                        }`}
+                      >
+                        {loadingEditions ? "Loading..." : "Load more editions"}
+                      </button>
+                    )}
                   </div>
                 </div>
               </div>
@@ -31,7 +31,7 @@ export default function Research({ searchTerm, hasSearched }) {
         return;
       }
 
-      const maxRetries = 15;
+      const maxRetries = 60;
       if (retryCount >= maxRetries) {
         setError("Failed to fetch results from the server after multiple attempts.");
         setLoading(false);
@@ -61,8 +61,12 @@ export default function Research({ searchTerm, hasSearched }) {
         );
 
         if (res.status === 202) {
-          console.log("Backend is processing... retrying in 4 seconds.");
-          setTimeout(() => fetchPapers(retryCount + 1), 4000);
+          // Queued or running scrape job: poll again when the server suggests
+          const retryAfter = Number(res.headers["retry-after"]) || 4;
+          console.log(
+            `Backend job ${res.data?.status} (position ${res.data?.position}, ~${res.data?.eta_seconds}s)... retrying in ${retryAfter} seconds.`
+          );
+          setTimeout(() => fetchPapers(retryCount + 1), retryAfter * 1000);
         } else {
           setPapers(res.data || []);
           setLoading(false);